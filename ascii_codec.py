@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - ASCII Array Codec
+Converts between strings and the zero-padded code arrays the dataset uses for
+*_path fields. Codes below 256 go through bytes in C; anything else (code
+points above 255, non-integer items) takes the per-character path, so results
+and errors are the same as the original loops.
+"""
+
+ASCII_ARRAY_LENGTH = 256
+
+
+def string_to_ascii_array(text, target_length=ASCII_ARRAY_LENGTH):
+    """Convert a string to ASCII array with padding."""
+    try:
+        return list(text.encode('latin-1')[:target_length].ljust(target_length, b"\0"))
+    except UnicodeEncodeError:
+        ascii_codes = [ord(char) for char in text]
+        ascii_codes.extend([0] * (target_length - len(ascii_codes)))
+        return ascii_codes[:target_length]
+
+
+def ascii_array_to_string(ascii_array):
+    """Convert ASCII array back to string (up to the first 0)."""
+    try:
+        end_index = ascii_array.index(0)
+    except ValueError:
+        end_index = len(ascii_array)
+    codes = ascii_array[:end_index]
+    try:
+        return bytes(codes).decode('latin-1')
+    except (TypeError, ValueError):
+        return ''.join(chr(code) for code in codes)
+
+
+def encode_paths(paths, target_length=ASCII_ARRAY_LENGTH):
+    """Encode many strings; returns {path: array} in input order (duplicates once)"""
+    return {path: string_to_ascii_array(path, target_length) for path in paths}
+
+
+def is_ascii_array(value):
+    """True for a non-empty list of ints in 0..255"""
+    if not isinstance(value, list) or not value:
+        return False
+    try:
+        bytes(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _is_padded_string(value):
+    # Encoded strings are zero-padded and do not start with the padding
+    return is_ascii_array(value) and value[-1] == 0 and value[0] != 0
+
+
+def json_pointer_token(key):
+    """Escape one key for a JSON pointer (RFC 6901)"""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def decode_document(data, all_arrays=False, location="", pointers=False):
+    """
+    Decode the ASCII arrays of a parsed JSON document.
+
+    Args:
+        data: Parsed JSON.
+        all_arrays (bool): Decode every zero-padded list of byte values, not
+            only the values of *_path keys.
+        pointers (bool): Report JSON pointers ('/cameras/CHN1CAM0001/model_0_path')
+            instead of dotted locations.
+
+    Returns:
+        list: (location, string) pairs in document order; locations look
+        like 'cameras.CHN1CAM0001.model_0_path'.
+    """
+    found = []
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if pointers:
+                child = f"{location}/{json_pointer_token(key)}"
+            else:
+                child = f"{location}.{key}" if location else str(key)
+            if str(key).endswith('_path') and is_ascii_array(value):
+                found.append((child, ascii_array_to_string(value)))
+            else:
+                found.extend(decode_document(value, all_arrays, child, pointers))
+    elif isinstance(data, list):
+        if all_arrays and _is_padded_string(data):
+            found.append((location, ascii_array_to_string(data)))
+        else:
+            for index, item in enumerate(data):
+                if isinstance(item, (dict, list)):
+                    child = f"{location}/{index}" if pointers else f"{location}[{index}]"
+                    found.extend(decode_document(item, all_arrays, child, pointers))
+    return found
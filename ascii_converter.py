@@ -7,16 +7,58 @@ This utility helps convert between regular strings and ASCII arrays for ISSP con
 import sys
 import json
 
-def string_to_ascii_array(text, target_length=256):
-    """Convert a string to ASCII array with padding."""
-    ascii_codes = [ord(char) for char in text]
-    ascii_codes.extend([0] * (target_length - len(ascii_codes)))
-    return ascii_codes[:target_length]
+import json_backend
+from ascii_codec import (ASCII_ARRAY_LENGTH, ascii_array_to_string, decode_document, encode_paths,
+                         string_to_ascii_array)
 
-def ascii_array_to_string(ascii_array):
-    """Convert ASCII array back to string."""
-    end_index = ascii_array.index(0) if 0 in ascii_array else len(ascii_array)
-    return ''.join(chr(code) for code in ascii_array[:end_index])
+def _get_option(flag, cast=str, default=None):
+    if flag not in sys.argv:
+        return default
+    try:
+        return cast(sys.argv[sys.argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {flag} requires a value", file=sys.stderr)
+        sys.exit(1)
+
+def _read_input(source):
+    """Text of a file, or of stdin for '-' / no source"""
+    if not source or source == "-" or source.startswith("--"):
+        return sys.stdin.read()
+    with open(source, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def batch_encode(source, target_length=ASCII_ARRAY_LENGTH, compact=False):
+    """
+    Encode one path per line (blank lines and '#' comments skipped) and print
+    a JSON object {path: array}; warnings go to stderr so stdout stays JSON.
+    """
+    paths = [line.strip() for line in _read_input(source).splitlines()]
+    paths = [path for path in paths if path and not path.startswith('#')]
+    for path in paths:
+        if len(path) > target_length:
+            print(f"Warning: '{path}' is longer than {target_length} characters and will be truncated", file=sys.stderr)
+    arrays = encode_paths(paths, target_length)
+    if compact:
+        lines = [f"  {json.dumps(path)}: {json.dumps(array, separators=(',', ':'))}" for path, array in arrays.items()]
+        print("{\n" + ",\n".join(lines) + "\n}")
+    else:
+        print(json.dumps(arrays, indent=2))
+    print(f"Encoded {len(arrays)} path(s)", file=sys.stderr)
+
+def decode_json_document(source, all_arrays=False, as_json=False):
+    """Print every decoded *_path array (or every padded byte array) of a JSON document"""
+    try:
+        data = json_backend.loads(_read_input(source))
+    except (OSError, ValueError) as e:
+        print(f"Error reading JSON document: {e}", file=sys.stderr)
+        sys.exit(1)
+    found = decode_document(data, all_arrays)
+    if as_json:
+        print(json.dumps(dict(found), indent=2))
+    else:
+        for location, text in found:
+            print(f"{location}: '{text}'")
+    print(f"Decoded {len(found)} array(s)", file=sys.stderr)
 
 def main():
     if len(sys.argv) < 2:
@@ -24,6 +66,8 @@ def main():
         print("Usage:")
         print("  python ascii_converter.py 'string_to_convert'")
         print("  python ascii_converter.py --from-ascii 47,104,111,109,101...")
+        print("  python ascii_converter.py --batch [paths.txt|-] [--length N] [--compact]")
+        print("  python ascii_converter.py --decode-json [file.json|-] [--all-arrays] [--json]")
         print("  python ascii_converter.py --help")
         sys.exit(1)
     
@@ -38,6 +82,23 @@ def main():
         print("  Convert ASCII array to string:")
         print("    python ascii_converter.py --from-ascii '47,104,111,109,101,47,105,115,115'")
         print()
+        print("  Convert many paths (one per line, from a file or stdin) to a JSON object of arrays:")
+        print("    python ascii_converter.py --batch new_paths.txt > arrays.json")
+        print("    ls /home/iss/issp_oms_models/*.onnx | python ascii_converter.py --batch --compact")
+        print()
+        print("  Decode every *_path array of a JSON document (--all-arrays: every zero-padded byte array):")
+        print("    python ascii_converter.py --decode-json issp_dataset.json")
+        print()
+        return
+
+    if sys.argv[1] == "--batch":
+        batch_encode(sys.argv[2] if len(sys.argv) > 2 else None,
+                     _get_option("--length", int, ASCII_ARRAY_LENGTH), "--compact" in sys.argv)
+        return
+
+    if sys.argv[1] == "--decode-json":
+        decode_json_document(sys.argv[2] if len(sys.argv) > 2 else None, "--all-arrays" in sys.argv,
+                             "--json" in sys.argv)
         return
     
     if sys.argv[1] == "--from-ascii":
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Micro-Benchmark Suite
+Times the core replacement and validation functions on synthetic projects of
+several sizes and stores the results as JSON, so runs of different versions
+can be compared for regressions.
+"""
+
+import contextlib
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import checkJson
+import json_backend
+import set_settings
+from config_layers import load_rule_file
+from generate_test_data import write_project
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SIZES = {
+    'small': {'cameras': 8, 'path_fields': 4, 'depth': 3, 'processes': 10, 'env_entries': 40},
+    'medium': {'cameras': 64, 'path_fields': 8, 'depth': 4, 'processes': 100, 'env_entries': 80},
+    'large': {'cameras': 256, 'path_fields': 16, 'depth': 5, 'processes': 500, 'env_entries': 120},
+}
+DEFAULT_SIZES = ["small", "medium"]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+# Configurations whose rules the benchmarks apply
+DATASET_CONFIG = os.path.join(TOOLS_DIR, "bmw_f11")
+ESME_CONFIG = os.path.join(TOOLS_DIR, "bmw_f11")
+STEERING_CONFIG = os.path.join(TOOLS_DIR, "etron")
+
+
+def _load_config(folder, file_name):
+    config = load_rule_file(folder, file_name)
+    if config is None:
+        raise OSError(f"No {file_name} in {folder} or its base layers")
+    return config
+
+
+def _text_patterns(config_data):
+    patterns = []
+    for rule in config_data.get('replacements', []):
+        from_patterns = rule['from'] if isinstance(rule['from'], list) else [rule['from']]
+        patterns.extend((from_pattern, rule['to']) for from_pattern in from_patterns)
+    return patterns
+
+
+def _corrupt(content):
+    """Drop every 50th comma so the error finder has work to do"""
+    parts = content.split(',')
+    return ''.join(part + (',' if index % 50 else '') for index, part in enumerate(parts[:-1])) + parts[-1]
+
+
+def build_benchmarks(files, work_dir):
+    """
+    Benchmarks for one synthetic project.
+
+    Returns:
+        list: (name, setup, function) tuples; setup() returns the arguments for
+        function() and is not timed.
+    """
+    with open(files['dataset'], 'r') as f:
+        dataset_content = f.read()
+    dataset_data = json.loads(dataset_content)
+    dataset_config = _load_config(DATASET_CONFIG, "issp_dataset_replacements.json")
+    text_patterns = _text_patterns(dataset_config)
+    path_rules = dataset_config.get('ascii_path_replacements', {}).get('automatic_replacements', [])
+    steering_rules = _load_config(STEERING_CONFIG, "issp_dataset_replacements.json")['steering_wheel_replacements']['replacements']
+    corrupted = _corrupt(dataset_content)
+    esme_copy = os.path.join(work_dir, "esme_manifest_copy.json")
+
+    def flexible_replace(content):
+        for from_pattern, to_pattern in text_patterns:
+            content, _ = set_settings.flexible_string_replace(content, from_pattern, to_pattern)
+
+    def replace_paths(data):
+        for rule in path_rules:
+            data = set_settings.replace_path_in_ascii_arrays(data, rule['old_path'], rule['new_path'])
+
+    def copy_esme():
+        shutil.copyfile(files['esme'], esme_copy)
+        return (esme_copy, ESME_CONFIG, {'journal': False})
+
+    return [
+        ("flexible_string_replace", lambda: (dataset_content,), flexible_replace),
+        ("replace_path_in_ascii_arrays", lambda: (copy.deepcopy(dataset_data),), replace_paths),
+        ("replace_steering_wheel_values", lambda: (copy.deepcopy(dataset_data), steering_rules),
+         set_settings.replace_steering_wheel_values),
+        ("apply_esme_replacements", copy_esme, set_settings.apply_esme_replacements),
+        ("checkJson.check_json_file", lambda: (files['dataset'],), checkJson.check_json_file),
+        ("checkJson.find_all_json_errors", lambda: (corrupted,), checkJson.find_all_json_errors),
+        ("checkJson.scan_json_incremental", lambda: (dataset_content,), checkJson.scan_json_incremental),
+    ]
+
+
+def time_benchmark(setup, function, repeat):
+    """Run function(*setup()) `repeat` times with output suppressed; return wall times"""
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(repeat):
+            args = setup()
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                function(*args)
+                times.append(time.perf_counter() - start)
+    return times
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=TOOLS_DIR,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(sizes=None, repeat=DEFAULT_REPEAT, name_filter=None):
+    """
+    Generate a project per size and time every benchmark on it.
+
+    Args:
+        sizes (list, optional): Size names from SIZES (default: small, medium).
+        repeat (int): Timed runs per benchmark.
+        name_filter (str, optional): Only run benchmarks whose name contains this.
+
+    Returns:
+        dict: Run metadata and a 'results' list.
+    """
+    results = []
+    for size in sizes or DEFAULT_SIZES:
+        with tempfile.TemporaryDirectory(prefix="json_tools_bench_") as work_dir:
+            files = write_project(os.path.join(work_dir, "project"), **SIZES[size])
+            dataset_bytes = os.path.getsize(files['dataset'])
+            esme_bytes = os.path.getsize(files['esme'])
+            print(f"\n📏 {size}: dataset {dataset_bytes:,} bytes, ESME manifest {esme_bytes:,} bytes")
+            for name, setup, function in build_benchmarks(files, work_dir):
+                if name_filter and name_filter not in name:
+                    continue
+                times = time_benchmark(setup, function, repeat)
+                result = {
+                    'name': name,
+                    'size': size,
+                    'bytes': esme_bytes if name == "apply_esme_replacements" else dataset_bytes,
+                    'repeat': repeat,
+                    'min_s': min(times),
+                    'median_s': statistics.median(times),
+                    'mean_s': statistics.mean(times),
+                }
+                results.append(result)
+                print(f"   {name:<36} median {result['median_s'] * 1000:10.2f} ms   min {result['min_s'] * 1000:10.2f} ms")
+    return {
+        'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': json_backend.BACKEND,
+        'sizes': {size: SIZES[size] for size in sizes or DEFAULT_SIZES},
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Print median time changes between two result files.
+
+    Returns:
+        bool: True if no benchmark got slower by more than `threshold`.
+    """
+    old = {(result['name'], result['size']): result for result in baseline['results']}
+    ok = True
+    print(f"📊 {baseline.get('commit') or 'baseline'} → {current.get('commit') or 'current'}"
+          f" (regression threshold {threshold:.0%})")
+    for result in current['results']:
+        key = (result['name'], result['size'])
+        if key not in old:
+            print(f"   🆕 {result['name']:<36} {result['size']:<7} {result['median_s'] * 1000:10.2f} ms")
+            continue
+        change = result['median_s'] / old[key]['median_s'] - 1 if old[key]['median_s'] else 0.0
+        if change > threshold:
+            icon = "❌"
+            ok = False
+        elif change < -threshold:
+            icon = "🚀"
+        else:
+            icon = "✅"
+        print(f"   {icon} {result['name']:<36} {result['size']:<7} {old[key]['median_s'] * 1000:10.2f} ms → "
+              f"{result['median_s'] * 1000:10.2f} ms ({change:+.1%})")
+    return ok
+
+
+def _get_option_value(argv, flag, cast=str, default=None):
+    if flag not in argv:
+        return default
+    try:
+        return cast(argv[argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        print(f"❌ Error: {flag} requires a value")
+        sys.exit(1)
+
+
+def _compare_files(argv):
+    """BASELINE.json and the optional CURRENT.json: the arguments right after --compare"""
+    files = []
+    for arg in argv[argv.index("--compare") + 1:]:
+        if arg.startswith("--") or len(files) == 2:
+            break
+        files.append(arg)
+    return files
+
+
+if __name__ == "__main__":
+    if "--help" in sys.argv:
+        print("Usage: python benchmark.py [--sizes small,medium,large] [--repeat N] [--filter NAME] [--output FILE]")
+        print("       python benchmark.py --compare BASELINE.json [CURRENT.json] [--threshold 0.10]")
+        print("Without CURRENT.json, --compare runs the suite and compares against BASELINE.json.")
+        sys.exit(0)
+
+    threshold = _get_option_value(sys.argv, "--threshold", float, DEFAULT_THRESHOLD)
+    compare_files = []
+    if "--compare" in sys.argv:
+        compare_files = _compare_files(sys.argv)
+        if not compare_files:
+            print("❌ Error: --compare requires a baseline result file")
+            sys.exit(1)
+        with open(compare_files[0], 'r') as f:
+            baseline = json.load(f)
+
+    if len(compare_files) == 2:
+        with open(compare_files[1], 'r') as f:
+            current = json.load(f)
+    else:
+        sizes = _get_option_value(sys.argv, "--sizes", lambda value: value.split(','), None)
+        if compare_files and not sizes:
+            sizes = list(baseline.get('sizes', {})) or None
+        for size in sizes or []:
+            if size not in SIZES:
+                print(f"❌ Error: Unknown size '{size}' (choose from {', '.join(SIZES)})")
+                sys.exit(1)
+        current = run_suite(sizes, _get_option_value(sys.argv, "--repeat", int, DEFAULT_REPEAT),
+                            _get_option_value(sys.argv, "--filter"))
+        output_path = _get_option_value(sys.argv, "--output", str, f"benchmark_{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(output_path, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results saved to: {output_path}")
+
+    if compare_files:
+        print()
+        sys.exit(0 if compare_results(baseline, current, threshold) else 1)
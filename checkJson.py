@@ -1,16 +1,24 @@
 import json
+import os
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-def check_json_file(filepath):
+import json_backend
+from profiler import count_bytes, profile_phase, start_profiling, stop_profiling
+
+def check_json_file(filepath, profile=None):
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with profile_phase(profile, "read"):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        count_bytes(profile, read=len(content))
         
         # First, try to parse the JSON to get the first error
         first_error = None
         try:
-            json.loads(content)
+            with profile_phase(profile, "json.loads"):
+                json_backend.loads(content)
             print("✅ JSON is valid.")
             return
         except json.JSONDecodeError as e:
@@ -20,12 +28,13 @@ def check_json_file(filepath):
         print("=" * 50)
         
         # Find ALL errors using comprehensive analysis
-        all_errors = find_all_json_errors(content)
+        with profile_phase(profile, "find_all_json_errors"):
+            all_errors = find_all_json_errors(content)
         
         if all_errors:
             print(f"Found {len(all_errors)} syntax error(s) at these lines:")
             for error in all_errors:
-                print(f"Line {error['line']}: {error['type']}")
+                print(f"Line {error['line']}: {classify_error_type(error['message'])}")
         else:
             # Fallback to original error if comprehensive analysis fails
             print(f"Syntax error at Line {first_error.lineno}, Column {first_error.colno}: {first_error.msg}")
@@ -162,13 +171,7 @@ def analyze_line_for_errors(line, line_num, all_lines):
     
     return errors
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python checkJson.py <json_file_path>")
-        sys.exit(1)
-    
-    json_file = sys.argv[1]
-    check_json_file(json_file)
+def print_detailed_errors(errors):
     """Print detailed error information"""
     print("=" * 80)
     print("🔍 DETAILED ERROR ANALYSIS")
@@ -319,13 +322,16 @@ def check_json_structure(lines):
     
     return errors
 
-def validate_json_with_fixes(filepath):
+def validate_json_with_fixes(filepath, profile=None):
     """Show what the file would look like with suggested fixes"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with profile_phase(profile, "read"):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        count_bytes(profile, read=len(content))
         
-        errors = find_all_json_errors(content)
+        with profile_phase(profile, "find_all_json_errors"):
+            errors = find_all_json_errors(content)
         if not errors:
             return
         
@@ -362,7 +368,7 @@ def validate_json_with_fixes(filepath):
         # Try to validate the corrected version
         try:
             corrected_content = '\n'.join(fixed_lines)
-            json.loads(corrected_content)
+            json_backend.loads(corrected_content)
             print("\n✅ The corrected version is valid JSON!")
         except json.JSONDecodeError as e:
             print(f"\n⚠️  The corrected version still has issues: {e.msg}")
@@ -370,14 +376,475 @@ def validate_json_with_fixes(filepath):
     except Exception as e:
         print(f"Error generating corrections: {e}")
 
+# Files below this size are validated in-process; spawning workers costs more
+# than the work itself.
+JSONL_PARALLEL_MIN_BYTES = 1024 * 1024
+
+def is_jsonl_path(filepath):
+    """Return True if the file name suggests JSON Lines / NDJSON content"""
+    return filepath.lower().endswith(('.jsonl', '.ndjson'))
+
+def _jsonl_byte_ranges(file_size, workers):
+    """Split a file into contiguous [start, end) byte ranges, one per worker"""
+    if file_size == 0:
+        return [(0, 0)]
+    workers = max(1, min(workers, file_size))
+    step = -(-file_size // workers)
+    return [(start, min(start + step, file_size)) for start in range(0, file_size, step)]
+
+def check_jsonl_range(filepath, start, end, max_errors=None):
+    """
+    Validate every JSON Lines record whose first byte lies in [start, end).
+
+    A record that straddles `start` belongs to the previous range, so ranges can
+    be cut at arbitrary byte offsets. Line numbers in the result are local to
+    the range (1 = first record owned by this range).
+
+    Returns:
+        dict: {'start', 'lines', 'records', 'errors', 'stopped'}
+    """
+    result = {'start': start, 'lines': 0, 'records': 0, 'errors': [], 'stopped': False}
+    with open(filepath, 'rb') as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                f.readline()
+        position = f.tell()
+        while position < end:
+            raw_line = f.readline()
+            if not raw_line:
+                break
+            position += len(raw_line)
+            result['lines'] += 1
+            line = raw_line.rstrip(b'\r\n')
+            if not line.strip():
+                continue
+            result['records'] += 1
+            try:
+                json_backend.loads(line)
+            except ValueError as e:
+                line_content = line.decode('utf-8', errors='replace')
+                result['errors'].append({
+                    'line': result['lines'],
+                    'column': getattr(e, 'colno', 1),
+                    'message': getattr(e, 'msg', str(e)),
+                    'line_content': truncate_text(line_content, 120)
+                })
+                if max_errors and len(result['errors']) >= max_errors:
+                    result['stopped'] = True
+                    break
+    return result
+
+def check_jsonl_file(filepath, workers=None, max_errors=None):
+    """
+    Validate a JSON Lines file record by record.
+
+    The file is cut into byte ranges that are validated in parallel worker
+    processes; each worker streams its range line by line, so memory stays
+    constant regardless of file size.
+
+    Args:
+        filepath (str): Path to the .jsonl/.ndjson file.
+        workers (int, optional): Number of worker processes (default: CPU count).
+        max_errors (int, optional): Stop after this many invalid records.
+
+    Returns:
+        bool: True if every record is valid JSON.
+    """
+    try:
+        file_size = os.path.getsize(filepath)
+    except OSError:
+        print(f"❌ Error: File '{filepath}' not found.")
+        return False
+
+    workers = workers or os.cpu_count() or 1
+    if file_size < JSONL_PARALLEL_MIN_BYTES:
+        workers = 1
+    ranges = _jsonl_byte_ranges(file_size, workers)
+
+    errors = []
+    total_lines = 0
+    total_records = 0
+    stopped = False
+
+    def collect(result):
+        nonlocal total_lines, total_records, stopped
+        for error in result['errors']:
+            error['line'] += total_lines
+            errors.append(error)
+        total_lines += result['lines']
+        total_records += result['records']
+        if result['stopped'] or (max_errors and len(errors) >= max_errors):
+            stopped = True
+
+    if len(ranges) == 1:
+        collect(check_jsonl_range(filepath, 0, file_size, max_errors))
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(check_jsonl_range, filepath, start, end, max_errors)
+                       for start, end in ranges]
+            # Results are consumed in file order so line numbers can be offset
+            # by the line counts of all preceding ranges.
+            for future in futures:
+                collect(future.result())
+                if stopped:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+
+    if max_errors:
+        errors = errors[:max_errors]
+
+    if not errors:
+        print(f"✅ JSONL is valid ({total_records} records).")
+        return True
+
+    print("❌ JSONL is invalid!")
+    print("=" * 50)
+    if stopped:
+        print(f"Stopped after {len(errors)} invalid record(s) (--max-errors {max_errors}):")
+    else:
+        print(f"Found {len(errors)} invalid record(s) out of {total_records}:")
+    for error in errors:
+        print(f"Line {error['line']}, Column {error['column']}: {error['message']}")
+        print(f"   {error['line_content']}")
+    return False
+
+# Scanner state is checkpointed roughly every this many characters.
+CHECKPOINT_INTERVAL = 4096
+
+_JSON_TOKEN_RE = re.compile(r'''[ \t\n\r]*(?:
+    (?P<string>"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")
+  | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)
+  | (?P<literal>true|false|null|NaN|Infinity|-Infinity)
+  | (?P<punct>[{}\[\]:,])
+)''', re.VERBOSE)
+
+_JSON_WS_RE = re.compile(r'[ \t\n\r]*')
+
+_EXPECT_MESSAGES = {
+    'value': 'Expecting value',
+    'value_or_close': 'Expecting value',
+    'key': 'Expecting property name enclosed in double quotes',
+    'key_or_close': 'Expecting property name enclosed in double quotes',
+    'colon': "Expecting ':' delimiter",
+    'comma_or_close': "Expecting ',' delimiter",
+    'end': 'Extra data',
+}
+
+def scan_json_incremental(content, start=None, checkpoint_every=CHECKPOINT_INTERVAL, resync=None):
+    """
+    Validate JSON syntax with a resumable scanner.
+
+    The scanner state (offset, open bracket stack, expected token) is recorded
+    at token boundaries roughly every `checkpoint_every` characters so a later
+    scan can resume from any checkpoint instead of from the top of the file.
+
+    Args:
+        content (str): Document text.
+        start (dict, optional): Checkpoint to resume from (default: start of file).
+        checkpoint_every (int): Distance between recorded checkpoints.
+        resync (dict, optional): {'from': offset, 'delta': shift, 'states': {old_offset: checkpoint}}.
+            Once the scan passes `from`, reaching a token boundary whose shifted
+            offset has an identical old checkpoint stops the scan early, because
+            everything after it is unchanged.
+
+    Returns:
+        dict: {'error': None or {'pos', 'message'}, 'checkpoints': [...],
+               'resynced_at': new offset or None, 'scanned': characters scanned}
+    """
+    state = start or {'pos': 0, 'stack': '', 'expect': 'value'}
+    pos, stack, expect = state['pos'], state['stack'], state['expect']
+    scan_start = pos
+    checkpoints = [dict(state)]
+    next_checkpoint = pos + checkpoint_every
+    length = len(content)
+    match_token = _JSON_TOKEN_RE.match
+    resync_from = resync['from'] if resync else length + 1
+    resync_delta = resync['delta'] if resync else 0
+    resync_states = resync['states'] if resync else {}
+
+    def result(error=None, resynced_at=None):
+        return {'error': error, 'checkpoints': checkpoints,
+                'resynced_at': resynced_at, 'scanned': pos - scan_start}
+
+    while True:
+        if pos >= resync_from:
+            old = resync_states.get(pos - resync_delta)
+            if old is not None and old['stack'] == stack and old['expect'] == expect:
+                return result(resynced_at=pos)
+        if pos >= next_checkpoint:
+            checkpoints.append({'pos': pos, 'stack': stack, 'expect': expect})
+            next_checkpoint = pos + checkpoint_every
+
+        match = match_token(content, pos)
+        if match is None:
+            token_pos = _JSON_WS_RE.match(content, pos).end()
+            if token_pos == length:
+                if expect == 'end':
+                    return result()
+                return result({'pos': length, 'message': _EXPECT_MESSAGES[expect]})
+            if content[token_pos] == '"':
+                return result({'pos': token_pos, 'message': 'Unterminated string or invalid escape'})
+            return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+
+        kind = match.lastgroup
+        token = match.group(kind)
+        token_pos = match.end() - len(token)
+
+        if expect == 'end':
+            return result({'pos': token_pos, 'message': 'Extra data'})
+
+        if kind == 'punct':
+            if token in '{[':
+                if expect not in ('value', 'value_or_close'):
+                    return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+                stack += token
+                expect = 'key_or_close' if token == '{' else 'value_or_close'
+            elif token in '}]':
+                opening = '{' if token == '}' else '['
+                closable = (expect == 'comma_or_close'
+                            or (expect == 'key_or_close' and token == '}')
+                            or (expect == 'value_or_close' and token == ']'))
+                if not closable or not stack or stack[-1] != opening:
+                    return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+                stack = stack[:-1]
+                expect = 'comma_or_close' if stack else 'end'
+            elif token == ':':
+                if expect != 'colon':
+                    return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+                expect = 'value'
+            else:
+                if expect != 'comma_or_close':
+                    return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+                expect = 'key' if stack[-1] == '{' else 'value'
+        elif expect in ('key', 'key_or_close'):
+            if kind != 'string':
+                return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+            expect = 'colon'
+        elif expect in ('value', 'value_or_close'):
+            expect = 'comma_or_close' if stack else 'end'
+        else:
+            return result({'pos': token_pos, 'message': _EXPECT_MESSAGES[expect]})
+
+        pos = match.end()
+
+# Strings are compared in blocks so finding the edited range costs one pass
+# of C-level comparisons instead of a Python loop over characters.
+_COMPARE_BLOCK = 64 * 1024
+
+def _common_prefix_length(a, b):
+    """Length of the common prefix of two strings"""
+    limit = min(len(a), len(b))
+    low = 0
+    while low + _COMPARE_BLOCK <= limit and a[low:low + _COMPARE_BLOCK] == b[low:low + _COMPARE_BLOCK]:
+        low += _COMPARE_BLOCK
+    high = min(low + _COMPARE_BLOCK, limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def _common_suffix_length(a, b, limit):
+    """Length of the common suffix of two strings, not exceeding `limit`"""
+    len_a, len_b = len(a), len(b)
+    low = 0
+    while (low + _COMPARE_BLOCK <= limit and
+           a[len_a - low - _COMPARE_BLOCK:len_a - low] == b[len_b - low - _COMPARE_BLOCK:len_b - low]):
+        low += _COMPARE_BLOCK
+    high = min(low + _COMPARE_BLOCK, limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len_a - mid:len_a - low] == b[len_b - mid:len_b - low]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def _shift_error(error, delta):
+    return dict(error, pos=error['pos'] + delta) if error else None
+
+def revalidate_json(previous, old_content, new_content):
+    """
+    Re-validate an edited document, re-scanning only around the edited range.
+
+    Scanning resumes from the nearest checkpoint before the edit and stops as
+    soon as the scanner state matches a checkpoint recorded for the unchanged
+    text after the edit. When the edit leaves the document invalid, the
+    checkpoints of the unchanged tail are kept (as 'tail') so fixing the error
+    on the next save is incremental again.
+
+    Args:
+        previous (dict): Result of scan_json_incremental()/revalidate_json() for old_content.
+        old_content (str): Text that `previous` was computed for.
+        new_content (str): Edited text.
+
+    Returns:
+        dict: Same shape as scan_json_incremental(), plus 'resumed_from'.
+    """
+    prefix = _common_prefix_length(old_content, new_content)
+    suffix = _common_suffix_length(old_content, new_content,
+                                   min(len(old_content), len(new_content)) - prefix)
+    delta = len(new_content) - len(old_content)
+    old_edit_end = len(old_content) - suffix
+
+    segments = [(previous['checkpoints'], previous['error'])]
+    if previous.get('tail'):
+        segments.append((previous['tail']['checkpoints'], previous['tail']['error']))
+    resync_states = {}
+    owners = {}
+    for index, (checkpoints, _) in enumerate(segments):
+        for cp in checkpoints:
+            if cp['pos'] >= old_edit_end and cp['pos'] not in resync_states:
+                resync_states[cp['pos']] = cp
+                owners[cp['pos']] = index
+
+    # A number token's extent depends on a few characters of lookahead, so a
+    # checkpoint is only trusted if it lies clearly before the first edit.
+    checkpoints = previous['checkpoints']
+    resume_index = max(i for i, cp in enumerate(checkpoints)
+                       if cp['pos'] == 0 or cp['pos'] + 4 <= prefix)
+
+    scan = scan_json_incremental(new_content, start=checkpoints[resume_index],
+                                 resync={'from': len(new_content) - suffix, 'delta': delta,
+                                         'states': resync_states})
+    scan['checkpoints'] = checkpoints[:resume_index] + scan['checkpoints']
+    scan['resumed_from'] = checkpoints[resume_index]['pos']
+
+    if scan['resynced_at'] is not None:
+        old_resync = scan['resynced_at'] - delta
+        owner = owners[old_resync]
+        owner_checkpoints, owner_error = segments[owner]
+        scan['checkpoints'] += [dict(cp, pos=cp['pos'] + delta)
+                                for cp in owner_checkpoints if cp['pos'] > old_resync]
+        scan['error'] = _shift_error(owner_error, delta)
+        if owner + 1 < len(segments):
+            tail_checkpoints, tail_error = segments[owner + 1]
+            scan['tail'] = {'checkpoints': [dict(cp, pos=cp['pos'] + delta) for cp in tail_checkpoints],
+                            'error': _shift_error(tail_error, delta)}
+    elif scan['error']:
+        for tail_checkpoints, tail_error in reversed(segments):
+            kept = [dict(cp, pos=cp['pos'] + delta) for cp in tail_checkpoints if cp['pos'] >= old_edit_end]
+            if kept:
+                scan['tail'] = {'checkpoints': kept, 'error': _shift_error(tail_error, delta)}
+                break
+    return scan
+
+def _describe_json_error(content, error):
+    """Turn an error offset into line/column/line_content"""
+    line = content.count('\n', 0, error['pos']) + 1
+    line_start = content.rfind('\n', 0, error['pos']) + 1
+    line_end = content.find('\n', error['pos'])
+    line_content = content[line_start:line_end if line_end != -1 else len(content)]
+    return {'line': line, 'column': error['pos'] - line_start + 1,
+            'message': error['message'], 'line_content': truncate_text(line_content.rstrip(), 120)}
+
+def watch_json_file(filepath, interval=0.2):
+    """
+    Re-validate a JSON file every time it is saved.
+
+    The first scan checkpoints the scanner state; after each save only the
+    text from the nearest checkpoint before the edit is re-tokenized, until
+    the scanner re-synchronizes with the state recorded for the unchanged tail.
+    Stop with Ctrl+C.
+    """
+    import time
+
+    def read():
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def report(content, scan, elapsed, note):
+        if scan['error']:
+            error = _describe_json_error(content, scan['error'])
+            print(f"❌ Line {error['line']}, Column {error['column']}: {error['message']} ({note}, {elapsed * 1000:.1f} ms)")
+            print(f"   {error['line_content']}")
+        else:
+            print(f"✅ JSON is valid ({note}, {elapsed * 1000:.1f} ms)")
+
+    try:
+        stat = os.stat(filepath)
+        content = read()
+    except OSError as e:
+        print(f"❌ Error reading file: {e}")
+        return
+    started = time.perf_counter()
+    scan = scan_json_incremental(content)
+    report(content, scan, time.perf_counter() - started, f"full scan of {len(content)} chars")
+    print(f"👀 Watching {filepath} (Ctrl+C to stop)")
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    try:
+        while True:
+            time.sleep(interval)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == signature:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            try:
+                new_content = read()
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️  Could not read file: {e}")
+                continue
+            if new_content == content:
+                continue
+            started = time.perf_counter()
+            scan = revalidate_json(scan, content, new_content)
+            elapsed = time.perf_counter() - started
+            content = new_content
+            report(content, scan, elapsed,
+                   f"re-scanned {scan['scanned']} chars from offset {scan['resumed_from']}")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+def _get_option_value(argv, flag, cast=str):
+    """Return the value following `flag` in argv, or None if absent"""
+    if flag not in argv:
+        return None
+    index = argv.index(flag)
+    if index + 1 >= len(argv):
+        print(f"❌ Error: {flag} requires a value")
+        sys.exit(1)
+    try:
+        return cast(argv[index + 1])
+    except ValueError:
+        print(f"❌ Error: invalid value for {flag}: {argv[index + 1]}")
+        sys.exit(1)
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python checkJson.py <json_file>")
+    if len(sys.argv) < 2:
+        print("Usage: python checkJson.py <json_file> [options]")
+        print("Options:")
+        print("  --jsonl           Validate as JSON Lines (auto-detected for .jsonl/.ndjson)")
+        print("  --workers N       Worker processes for JSON Lines validation")
+        print("  --max-errors N    Stop after N invalid JSON Lines records")
+        print("  --watch           Re-validate incrementally every time the file is saved")
+        print("  --profile         Time each phase; --profile-output FILE, --pstats FILE")
+        print("  --mem-report      Report peak/retained memory per phase (tracemalloc + RSS)")
         print("Example: python checkJson.py test.json")
     else:
         filepath = sys.argv[1]
-        print(f"🔍 Checking JSON file: {filepath}")
-        print("=" * 40)
-        
-        check_json_file(filepath)
-        validate_json_with_fixes(filepath)
\ No newline at end of file
+        profile = start_profiling(sys.argv, "checkJson")
+        if "--watch" in sys.argv:
+            watch_json_file(filepath)
+        elif "--jsonl" in sys.argv or is_jsonl_path(filepath):
+            print(f"🔍 Checking JSON Lines file: {filepath}")
+            print("=" * 40)
+            with profile_phase(profile, "check_jsonl_file"):
+                check_jsonl_file(filepath,
+                                 workers=_get_option_value(sys.argv, "--workers", int),
+                                 max_errors=_get_option_value(sys.argv, "--max-errors", int))
+            if os.path.exists(filepath):
+                count_bytes(profile, read=os.path.getsize(filepath))
+        else:
+            print(f"🔍 Checking JSON file: {filepath}")
+            print("=" * 40)
+
+            check_json_file(filepath, profile)
+            validate_json_with_fixes(filepath, profile)
+        stop_profiling(profile)
\ No newline at end of file
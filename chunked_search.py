@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Parallel Chunked Search
+Finds literal patterns in a memory-mapped file using several worker processes
+and applies all replacements in one ordered write.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this size the file is searched in-process; worker start-up would cost
+# more than the search itself.
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def _search_chunk(file_path, start, end, patterns):
+    """
+    Find every occurrence of every pattern that starts in [start, end).
+
+    The searched window extends len(longest pattern) - 1 bytes past `end` so
+    matches crossing the chunk boundary are found by the chunk they start in.
+
+    Returns:
+        list: (offset, pattern_index) tuples.
+    """
+    matches = []
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for index, pattern in enumerate(patterns):
+                window_end = min(end + len(pattern) - 1, len(view))
+                position = view.find(pattern, start, window_end)
+                while position != -1:
+                    matches.append((position, index))
+                    position = view.find(pattern, position + 1, window_end)
+    return matches
+
+
+def _chunk_ranges(file_size, workers, longest):
+    chunk_size = max(-(-file_size // workers), 4 * longest, 1)
+    return [(start, min(start + chunk_size, file_size)) for start in range(0, file_size, chunk_size)]
+
+
+def find_pattern_matches(file_path, patterns, workers=None):
+    """
+    Locate all patterns in a file, splitting the search across processes.
+
+    Matches are merged the way a single left-to-right scan with a combined
+    alternation (longest pattern first) would pick them: the leftmost match
+    wins, ties go to the longer pattern, and overlapping matches are dropped.
+
+    Args:
+        file_path (str): File to search.
+        patterns (list): Byte strings to find.
+        workers (int, optional): Worker processes (default: CPU count).
+
+    Returns:
+        list: Non-overlapping (start, end, pattern_index) tuples in file order.
+    """
+    file_size = os.path.getsize(file_path)
+    patterns = list(patterns)
+    if file_size == 0 or not patterns:
+        return []
+    longest = max(len(pattern) for pattern in patterns)
+
+    workers = workers or os.cpu_count() or 1
+    if file_size < PARALLEL_MIN_BYTES:
+        workers = 1
+    ranges = _chunk_ranges(file_size, workers, longest)
+
+    if len(ranges) == 1:
+        found = _search_chunk(file_path, 0, file_size, patterns)
+    else:
+        found = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [executor.submit(_search_chunk, file_path, start, end, patterns) for start, end in ranges]
+            for future in futures:
+                found.extend(future.result())
+
+    found.sort(key=lambda match: (match[0], -len(patterns[match[1]])))
+    merged = []
+    last_end = 0
+    for position, index in found:
+        if position >= last_end:
+            last_end = position + len(patterns[index])
+            merged.append((position, last_end, index))
+    return merged
+
+
+def write_with_replacements(file_path, matches, replacements):
+    """
+    Rewrite a file with every match replaced, in a single ordered write.
+
+    The output is streamed from the memory-mapped original into a temporary
+    file next to it, which then atomically replaces the original.
+
+    Args:
+        file_path (str): File to rewrite.
+        matches (list): (start, end, pattern_index) tuples from find_pattern_matches().
+        replacements (list): Replacement bytes per pattern index.
+    """
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(file_path, 'rb') as source, open(temp_path, 'wb') as target:
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            position = 0
+            for start, end, index in matches:
+                target.write(view[position:start])
+                target.write(replacements[index])
+                position = end
+            target.write(view[position:])
+    try:
+        os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+    except OSError:
+        pass
+    os.replace(temp_path, file_path)
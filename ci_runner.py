@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Change-Driven CI Runs
+Applies configurations only to the project/config pairs a change can affect.
+The changed files come from plain git (diff against the merge base with a
+base ref, plus uncommitted and untracked files). A pair is re-run when a file
+in its config folder or one of its base layers, one of its project's manifests
+or the tool code changed; every other pair is skipped with the reason recorded.
+
+Pairs are listed in a matrix file (paths relative to the file):
+
+    {
+      "pairs": [
+        {"project": "projects/prj_a", "config": "etron"},
+        {"project": "projects/prj_b", "config": "bmw_f11", "modes": ["esme", "dataset", "steering"]}
+      ]
+    }
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from config_layers import layer_chain
+from project_discovery import discover_project_files
+from settings_session import DEFAULT_PROJECT_MODES, MODES, apply_to_project, new_session
+from undo_journal import new_run_id
+
+TOOLS_DIR = os.path.dirname(os.path.realpath(__file__))
+
+DEFAULT_BASE_REF = "origin/main"
+
+GIT_TIMEOUT = 60
+
+
+def _git(repo_dir, *args):
+    result = subprocess.run(["git", "-C", repo_dir] + list(args), capture_output=True, text=True,
+                            timeout=GIT_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def changed_files(repo_dir, base_ref):
+    """
+    Files changed in the git repository at repo_dir (its top level) since its
+    merge base with base_ref: committed, uncommitted and untracked. Renamed
+    files are reported under both names.
+
+    Returns:
+        set: Absolute paths.
+
+    Raises:
+        RuntimeError: Unknown ref, git failed.
+    """
+    try:
+        merge_base = _git(repo_dir, "merge-base", base_ref, "HEAD").strip()
+        names = _git(repo_dir, "diff", "--name-only", "--no-renames", merge_base).splitlines()
+        names += _git(repo_dir, "ls-files", "--others", "--exclude-standard").splitlines()
+    except (OSError, subprocess.SubprocessError) as e:
+        raise RuntimeError(str(e)) from None
+    return {os.path.normpath(os.path.join(repo_dir, name)) for name in names if name}
+
+
+def repository_root(path):
+    """Top level of the git repository containing path; RuntimeError if there is none"""
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    try:
+        return os.path.normpath(_git(directory, "rev-parse", "--show-toplevel").strip())
+    except (OSError, subprocess.SubprocessError) as e:
+        raise RuntimeError(str(e)) from None
+
+
+def _is_within(path, directory):
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def load_matrix(matrix_path):
+    """
+    Read a matrix file.
+
+    Returns:
+        list: {'project', 'config', 'modes'} dicts with absolute paths.
+
+    Raises:
+        OSError, ValueError: Unreadable file, missing keys, unknown mode.
+    """
+    with open(matrix_path, 'r') as f:
+        matrix = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(matrix_path))
+    pairs = []
+    for index, entry in enumerate(matrix.get('pairs', [])):
+        if not entry.get('project') or not entry.get('config'):
+            raise ValueError(f"Pair {index + 1} needs 'project' and 'config'")
+        modes = tuple(entry.get('modes', DEFAULT_PROJECT_MODES))
+        unknown = [mode for mode in modes if mode not in MODES]
+        if unknown:
+            raise ValueError(f"Pair {index + 1}: unknown mode(s) {', '.join(unknown)}")
+        pairs.append({
+            'project': os.path.normpath(os.path.join(base_dir, entry['project'])),
+            'config': os.path.normpath(os.path.join(base_dir, entry['config'])),
+            'modes': modes,
+        })
+    return pairs
+
+
+def plan_runs(pairs, base_ref, use_cache=True):
+    """
+    Decide for every pair whether it has to run.
+
+    When the changed files cannot be determined for a pair (no git, unknown
+    base ref) it runs, so a broken diff never skips work.
+
+    Returns:
+        list: The pairs with 'action' ('run' or 'skip') and 'reason' added.
+    """
+    roots = {}
+    diffs = {}
+
+    def changes_for(path):
+        # One diff per repository, however many pairs live in it
+        if path not in roots:
+            try:
+                roots[path] = repository_root(path)
+            except RuntimeError as e:
+                roots[path] = e
+        root = roots[path]
+        if isinstance(root, RuntimeError):
+            return root
+        if root not in diffs:
+            try:
+                diffs[root] = changed_files(root, base_ref)
+            except RuntimeError as e:
+                diffs[root] = e
+        return diffs[root]
+
+    planned = []
+    for pair in pairs:
+        pair = dict(pair)
+        # git reports changed files under the symlink-resolved repository root
+        project_dir = os.path.realpath(pair['project'])
+        config_dir = os.path.realpath(pair['config'])
+        try:
+            layers = [os.path.realpath(layer) for layer in layer_chain(config_dir)]
+        except (OSError, ValueError):
+            layers = [config_dir]  # Loading the configuration reports the error
+        # A change to a base layer affects every configuration extending it
+        layer_changes = [(layer, changes_for(layer)) for layer in layers]
+        project_changes = changes_for(project_dir)
+        # Tool changes only count when the tools live in the same repository
+        tool_changes = changes_for(TOOLS_DIR)
+        if all(tool_changes is not changes for changes in [project_changes] + [c for _, c in layer_changes]):
+            tool_changes = set()
+        files = discover_project_files(project_dir, use_cache=use_cache)
+        manifests = [path for path in [files['esme'], files['dataset']] + files['dataset_siblings'] if path]
+
+        errors = [changes for changes in [tool_changes, project_changes] + [c for _, c in layer_changes]
+                  if isinstance(changes, RuntimeError)]
+        config_changed = sorted({os.path.relpath(path, config_dir) for layer, changes in layer_changes
+                                 for path in changes if _is_within(path, layer)}) if not errors else []
+        if errors:
+            pair['action'], pair['reason'] = 'run', f"changes unknown ({errors[0]})"
+        elif any(path.endswith(".py") and _is_within(path, TOOLS_DIR) for path in tool_changes):
+            pair['action'], pair['reason'] = 'run', "tool code changed"
+        elif config_changed:
+            pair['action'], pair['reason'] = 'run', f"config changed: {', '.join(config_changed)}"
+        elif any(os.path.normpath(path) in project_changes for path in manifests):
+            changed = [os.path.basename(path) for path in manifests if os.path.normpath(path) in project_changes]
+            pair['action'], pair['reason'] = 'run', f"manifest changed: {', '.join(changed)}"
+        elif not manifests:
+            pair['action'], pair['reason'] = 'skip', "no manifests found in project"
+        else:
+            pair['action'], pair['reason'] = 'skip', f"no config, manifest or tool change since {base_ref}"
+        planned.append(pair)
+    return planned
+
+
+def run_pairs(planned, dry_run=False, use_cache=True):
+    """
+    Apply the configuration of every pair planned to run.
+
+    Returns:
+        dict: {'run_id', 'pairs'}; each pair gets 'status' ('skipped',
+        'planned' for a dry run, 'ok' or 'error') and its per-mode results.
+    """
+    run_id = new_run_id()
+    sessions = {}
+    for pair in planned:
+        pair['results'] = []
+        if pair['action'] == 'skip':
+            pair['status'] = 'skipped'
+            continue
+        if dry_run:
+            pair['status'] = 'planned'
+            continue
+        try:
+            if pair['config'] not in sessions:
+                sessions[pair['config']] = new_session(pair['config'])
+            outcome = apply_to_project(sessions[pair['config']], pair['project'], pair['modes'], run_id=run_id,
+                                       use_cache=use_cache)
+        except (OSError, ValueError) as e:
+            pair['status'] = 'error'
+            pair['results'] = [{'status': 'error', 'errors': [str(e)]}]
+            continue
+        pair['results'] = [{'mode': result['mode'], 'file': result['file'], 'status': result['status'],
+                            'applied': result['applied'], 'errors': result['errors']}
+                           for result in outcome['results']]
+        pair['status'] = 'error' if any(result['status'] == 'error' for result in outcome['results']) else 'ok'
+    return {'run_id': run_id, 'pairs': planned}
+
+
+def print_summary(report):
+    for pair in report['pairs']:
+        label = f"{os.path.basename(pair['project'])} × {os.path.basename(pair['config'])}"
+        if pair['status'] == 'skipped':
+            print(f"⏭️  {label}: skipped ({pair['reason']})")
+            continue
+        icon = {'ok': "✅", 'planned': "📝", 'error': "❌"}[pair['status']]
+        print(f"{icon} {label}: {pair['reason']}")
+        for result in pair['results']:
+            detail = f", {result['applied']} rule(s) hit" if result.get('applied') else ""
+            print(f"   {result.get('mode', '-')}: {result['status']}{detail}")
+            for error in result.get('errors', []):
+                print(f"      ❌ {error}")
+    counts = {}
+    for pair in report['pairs']:
+        counts[pair['status']] = counts.get(pair['status'], 0) + 1
+    print(f"\n📊 {len(report['pairs'])} pair(s): " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+
+
+def _get_option_value(argv, flag, default=None):
+    if flag not in argv:
+        return default
+    index = argv.index(flag)
+    if index + 1 >= len(argv) or argv[index + 1].startswith("--"):
+        print(f"❌ Error: {flag} requires a value")
+        sys.exit(1)
+    return argv[index + 1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print("Usage: python ci_runner.py <matrix.json> [options]")
+        print("Options:")
+        print(f"  --base REF            Compare against the merge base with REF (default: $CI_BASE_REF or {DEFAULT_BASE_REF})")
+        print("  --all                 Run every pair regardless of changes")
+        print("  --dry-run             Only show which pairs would run and why")
+        print("  --report FILE         Write the decisions and results as JSON")
+        print("  --no-discovery-cache  Rescan projects instead of using cached manifest locations")
+        sys.exit(1)
+
+    base_ref = _get_option_value(sys.argv, "--base", os.environ.get("CI_BASE_REF") or DEFAULT_BASE_REF)
+    use_cache = "--no-discovery-cache" not in sys.argv
+    try:
+        pairs = load_matrix(sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read matrix {sys.argv[1]}: {e}")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    if "--all" in sys.argv:
+        planned = [dict(pair, action='run', reason="--all") for pair in pairs]
+    else:
+        planned = plan_runs(pairs, base_ref, use_cache)
+    report = run_pairs(planned, "--dry-run" in sys.argv, use_cache)
+    report.update(base_ref=base_ref, seconds=round(time.perf_counter() - start_time, 3))
+    print_summary(report)
+
+    report_path = _get_option_value(sys.argv, "--report")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"🧾 Report written to: {report_path}")
+    sys.exit(1 if any(pair['status'] == 'error' for pair in report['pairs']) else 0)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Layered Configurations
+Lets a configuration folder declare base layers in a config_layers.json file
+instead of carrying full copies of the shared rule files:
+
+    {"extends": "../common"}            or    {"extends": ["../common", "../oms"]}
+
+The rule files of the layers are merged base first. Objects are merged key by
+key; rule lists are merged by the rule's match key ('from', 'pattern',
+'old_path', 'target_camera' + 'field_name', or an environment rule's 'key' +
+'processes' + 'requires'): an override with the match key of a base rule
+replaces the keys it sets in place, an override with "remove": true drops the
+base rule and new rules are appended. Other lists and values are replaced.
+
+The merged files of a folder are cached per hash of the layer chain and its
+files, under the cache directory and in a small in-memory LRU, so a layer
+file shared by many vehicles is usually parsed once per process.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from project_discovery import get_cache_dir
+from rule_analyzer import RULE_FILES
+
+LAYERS_FILE = "config_layers.json"
+
+# Bump when the merge rules change, so merged configurations cached by an
+# older version are not used.
+LAYERS_FORMAT_VERSION = 3
+
+# Fields identifying a rule, in the order they are tried, and the defaults the
+# replacement code assumes for missing ones
+RULE_KEYS = (("from",), ("pattern",), ("old_path",), ("target_camera", "field_name"), ("key", "processes", "requires"))
+RULE_KEY_DEFAULTS = {'field_name': "steering_wheel"}
+
+# Parsed layer files by content hash and merged configurations by chain hash,
+# least recently used first. Every edit gives a new hash, so the caches are
+# bounded for long-running processes (--watch, ci_runner.py).
+MEMORY_CACHE_SIZE = 32
+_parsed_files = OrderedDict()
+_resolved_configs = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_merged_dir():
+    return os.path.join(get_cache_dir(), "merged_configs")
+
+
+def _read_declaration(config_dir):
+    file_path = os.path.join(config_dir, LAYERS_FILE)
+    if not os.path.isfile(file_path):
+        return {}
+    with open(file_path, 'r') as f:
+        declaration = json.load(f)
+    if not isinstance(declaration, dict):
+        raise ValueError(f"{file_path}: expected an object with 'extends'")
+    return declaration
+
+
+def layer_chain(config_dir, _visiting=()):
+    """
+    The layers of a configuration folder, base first, ending with the folder.
+
+    Raises:
+        OSError, ValueError: Unreadable declaration, missing base folder or
+        layers extending each other.
+    """
+    config_dir = os.path.normpath(os.path.abspath(config_dir))
+    if config_dir in _visiting:
+        cycle = " → ".join(os.path.basename(layer) for layer in _visiting + (config_dir,))
+        raise ValueError(f"Configuration layers extend each other: {cycle}")
+    extends = _read_declaration(config_dir).get('extends', [])
+    if isinstance(extends, str):
+        extends = [extends]
+    chain = []
+    for base in extends:
+        base_dir = os.path.normpath(os.path.join(config_dir, base))
+        if not os.path.isdir(base_dir):
+            raise ValueError(f"{os.path.join(config_dir, LAYERS_FILE)}: base layer '{base}' not found")
+        for layer in layer_chain(base_dir, _visiting + (config_dir,)):
+            if layer not in chain:
+                chain.append(layer)
+    chain.append(config_dir)
+    return chain
+
+
+def rule_key(rule):
+    """The match key of a rule dict, or None if it has none"""
+    for fields in RULE_KEYS:
+        if fields[0] in rule:
+            # 'from' may be a list of alternative patterns
+            return tuple(json.dumps(rule.get(field, RULE_KEY_DEFAULTS.get(field))) for field in fields)
+    return None
+
+
+def _is_rule_list(items):
+    return all(isinstance(item, dict) and rule_key(item) is not None for item in items)
+
+
+def _without_removed(value):
+    if isinstance(value, list) and _is_rule_list(value):
+        return [{key: item_value for key, item_value in item.items() if key != 'remove'}
+                for item in value if not item.get('remove')]
+    return value
+
+
+def _merge_rules(base, override):
+    merged = list(base)
+    positions = {rule_key(rule): index for index, rule in enumerate(merged)}
+    for rule in override:
+        key = rule_key(rule)
+        if rule.get('remove'):
+            if key in positions:
+                merged[positions.pop(key)] = None
+            continue
+        if key in positions:
+            merged[positions[key]] = merge_layers(merged[positions[key]], rule)
+        else:
+            positions[key] = len(merged)
+            merged.append(rule)
+    return [rule for rule in merged if rule is not None]
+
+
+def merge_layers(base, override):
+    """
+    Merge one layer of a rule file over another.
+
+    Args:
+        base: Parsed content of the lower layer.
+        override: Parsed content of the upper layer.
+
+    Returns:
+        The merged content; shares unchanged parts with the inputs.
+    """
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for key, value in override.items():
+            merged[key] = merge_layers(base[key], value) if key in base else _without_removed(value)
+        return merged
+    if isinstance(base, list) and isinstance(override, list) and _is_rule_list(base) and _is_rule_list(override):
+        return _merge_rules(base, override)
+    return _without_removed(override)
+
+
+def _cache_get(cache, key):
+    with _cache_lock:
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+
+def _cache_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MEMORY_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _parse(data):
+    # Layers shared by several vehicles are parsed once
+    key = hashlib.sha256(data).hexdigest()
+    content = _cache_get(_parsed_files, key)
+    if content is None:
+        content = json.loads(data.decode('utf-8'))
+        _cache_put(_parsed_files, key, content)
+    return content
+
+
+def _cache_path(chain_hash):
+    return os.path.join(get_merged_dir(), f"{chain_hash}.json")
+
+
+def _read_cached(chain_hash):
+    try:
+        with open(_cache_path(chain_hash), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached(resolved):
+    try:
+        os.makedirs(get_merged_dir(), exist_ok=True)
+        temp_path = _cache_path(resolved['hash']) + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(resolved, f)
+        os.replace(temp_path, _cache_path(resolved['hash']))
+    except OSError:
+        pass  # The cache is an optimization only
+
+
+def resolve_config(config_dir, use_cache=True):
+    """
+    Merge the rule files of a configuration folder's layers.
+
+    Args:
+        config_dir (str): Configuration folder.
+        use_cache (bool): Use and update the merged configurations cached on
+            disk (only written for folders with base layers).
+
+    Returns:
+        dict: {'hash', 'layers', 'files': {file name: merged content}}; rule
+        files missing from every layer are left out. Shared between callers,
+        treat as read-only.
+
+    Raises:
+        OSError, ValueError: A declaration or rule file cannot be read or parsed.
+    """
+    chain = layer_chain(config_dir)
+    digest = hashlib.sha256(f"layers-v{LAYERS_FORMAT_VERSION}".encode('ascii'))
+    sources = {}
+    for layer in chain:
+        digest.update(layer.encode('utf-8') + b"\0")
+        for file_name in RULE_FILES:
+            file_path = os.path.join(layer, file_name)
+            if not os.path.isfile(file_path):
+                continue
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            digest.update(file_name.encode('utf-8') + b"\0" + data + b"\0")
+            sources.setdefault(file_name, []).append((file_path, data))
+    chain_hash = digest.hexdigest()
+
+    resolved = _cache_get(_resolved_configs, chain_hash)
+    if resolved is not None:
+        return resolved
+    resolved = _read_cached(chain_hash) if use_cache and len(chain) > 1 else None
+    if resolved is None:
+        files = {}
+        for file_name, layers in sources.items():
+            merged = None
+            for file_path, data in layers:
+                try:
+                    content = _parse(data)
+                except ValueError as e:
+                    raise ValueError(f"{file_path}: {e}") from None
+                merged = content if merged is None else merge_layers(merged, content)
+            files[file_name] = merged
+        resolved = {'hash': chain_hash, 'layers': chain, 'files': files}
+        if use_cache and len(chain) > 1:
+            _write_cached(resolved)
+    _cache_put(_resolved_configs, chain_hash, resolved)
+    return resolved
+
+
+def load_rule_file(config_dir, file_name):
+    """
+    One merged rule file of a configuration folder.
+
+    Returns:
+        dict or None: A copy of the merged content, None if no layer has the file.
+
+    Raises:
+        OSError, ValueError: A declaration or rule file cannot be read or parsed.
+    """
+    content = resolve_config(config_dir)['files'].get(file_name)
+    return copy.deepcopy(content) if content is not None else None
+
+
+def describe_layers(config_dir):
+    """'common → etron' for a layered folder, '' for a plain one"""
+    chain = layer_chain(config_dir)
+    if len(chain) == 1:
+        return ""
+    return " → ".join(os.path.basename(layer) for layer in chain)
+
+
+def _rule_count(content):
+    return (len(content.get('replacements', []))
+            + len(content.get('regex_replacements', []))
+            + len(content.get('environment_updates', []))
+            + len(content.get('ascii_path_replacements', {}).get('automatic_replacements', []))
+            + len(content.get('steering_wheel_replacements', {}).get('replacements', [])))
+
+
+def show_config(config_dir, file_name=None):
+    """Print the layers of a folder and its merged rule files (or one of them in full)"""
+    resolved = resolve_config(config_dir)
+    print(f"📁 {config_dir}")
+    for layer in resolved['layers']:
+        present = [name for name in RULE_FILES if os.path.isfile(os.path.join(layer, name))]
+        print(f"   📚 {layer}: {', '.join(present) or 'no rule files'}")
+    if file_name:
+        if file_name not in resolved['files']:
+            print(f"ℹ️  No layer has {file_name}")
+            return False
+        print(json.dumps(resolved['files'][file_name], indent=4))
+        return True
+    for name, content in resolved['files'].items():
+        print(f"📋 {name}: {_rule_count(content)} rule(s) after merging")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "show":
+        print("Usage: python config_layers.py show <config_folder> [rule_file]")
+        print(f"A folder declares its base layers in {LAYERS_FILE}: {{\"extends\": \"../common\"}}")
+        sys.exit(1)
+    try:
+        ok = show_config(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
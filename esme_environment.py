@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Structured ESME Environment Updates
+Edits the "environment" lists of ESME manifest processes by variable name
+instead of by text. One token scan of the manifest indexes every process's
+list ({variable: entry positions}), so each rule is a dictionary lookup per
+process. Upserting a variable replaces its first entry and drops repeated
+ones, so running the rules again changes nothing. Only the changed lists are
+spliced back; every other byte of the manifest is kept.
+
+Rules live in esme_replacements.json next to the text rules:
+
+    "environment_updates": [
+        {"description": "OMS libraries", "key": "LD_LIBRARY_PATH",
+         "value": "$LD_LIBRARY_PATH:/home/issp/workspace/issp_oms_so",
+         "requires": "MGC_BODYPOSE2D_MODEL_PATH"},
+        {"description": "Drop debug switch", "key": "ISSP_DEBUG", "remove": true,
+         "processes": ["issp_aos_*"]}
+    ]
+
+'processes' (name patterns) and 'requires' (a variable the list must
+already contain) narrow the processes a rule applies to.
+"""
+
+import fnmatch
+import json
+import re
+
+from reporter import INFO, WARNING, flush_reporter, new_reporter, report
+
+ENVIRONMENT_SECTION = "environment_updates"
+
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"(\s*:)?|[\[\]{}]')
+_LEAD = re.compile(rb'\s*')
+_SEPARATOR = re.compile(rb'\s*,\s*')
+
+_OPEN_OBJECT, _OPEN_ARRAY = ord('{'), ord('[')
+
+
+def _decode_string(raw):
+    return json.loads(raw) if b"\\" in raw else raw[1:-1].decode('utf-8')
+
+
+def variable_name(entry):
+    """'LD_LIBRARY_PATH' for 'LD_LIBRARY_PATH=/lib'"""
+    return entry.split("=", 1)[0]
+
+
+def _line_indent(data, position):
+    line_start = data.rfind(b"\n", 0, position) + 1
+    return _LEAD.match(data, line_start).group(0)
+
+
+def _environment_entry(data, frame):
+    start, end, items = frame['environment']
+    # Only lists of plain strings can be edited entry by entry
+    position = start + 1
+    for index, (item_start, item_end) in enumerate(items):
+        gap = _LEAD if index == 0 else _SEPARATOR
+        if not gap.fullmatch(data, position, item_start):
+            return {'name': frame['name'], 'start': start, 'end': end, 'valid': False}
+        position = item_end
+    if not _LEAD.fullmatch(data, position, end - 1):
+        return {'name': frame['name'], 'start': start, 'end': end, 'valid': False}
+
+    entries = [_decode_string(data[item_start:item_end]) for item_start, item_end in items]
+    keys = {}
+    for index, entry in enumerate(entries):
+        keys.setdefault(variable_name(entry), []).append(index)
+    return {'name': frame['name'], 'start': start, 'end': end, 'valid': True,
+            'items': items, 'entries': entries, 'keys': keys}
+
+
+def index_environments(data):
+    """
+    Locate the environment lists of all processes in one scan.
+
+    Args:
+        data (bytes): The ESME manifest.
+
+    Returns:
+        list: One dict per object with an "environment" list, in document
+        order: 'name' (the object's "name" or None), 'start'/'end' of the
+        list, 'valid' (False if it holds anything but strings), and for valid
+        lists 'items' (entry spans), 'entries' (decoded strings) and 'keys'
+        ({variable: [entry indexes]}).
+    """
+    processes = []
+    stack = []
+    key = None  # Key whose value comes next
+    for match in _TOKEN.finditer(data):
+        start = match.start()
+        first = data[start]
+        if first == _OPEN_OBJECT or first == _OPEN_ARRAY:
+            parent_key = key if stack and stack[-1]['open'] == _OPEN_OBJECT else None
+            stack.append({'open': first, 'key': parent_key, 'start': start, 'items': [], 'name': None,
+                          'environment': None})
+            key = None
+        elif match.group(1) is None and first == ord('"'):
+            frame = stack[-1] if stack else None
+            if frame is not None and frame['open'] == _OPEN_ARRAY:
+                frame['items'].append((start, match.end()))
+            elif frame is not None and key == "name":
+                frame['name'] = _decode_string(data[start:match.end()])
+            key = None
+        elif match.group(1) is not None:
+            key = _decode_string(data[start:match.start(1)])
+        else:
+            frame = stack.pop()
+            if frame['open'] == _OPEN_ARRAY and frame['key'] == "environment" and stack:
+                stack[-1]['environment'] = (frame['start'], match.end(), frame['items'])
+            elif frame['open'] == _OPEN_OBJECT and frame['environment'] is not None:
+                processes.append(_environment_entry(data, frame))
+            key = None
+    return sorted(processes, key=lambda process: process['start'])
+
+
+def is_valid_rule(rule):
+    key = rule.get('key')
+    if not isinstance(key, str) or not key or "=" in key:
+        return False
+    return bool(rule.get('remove')) or isinstance(rule.get('value'), str)
+
+
+def rule_description(rule):
+    action = "Remove" if rule.get('remove') else "Set"
+    return rule.get('description', f"{action} {rule.get('key')}")
+
+
+def _applies_to(rule, process, keys):
+    patterns = rule.get('processes')
+    if patterns and not any(fnmatch.fnmatchcase(process['name'] or "", pattern) for pattern in patterns):
+        return False
+    return not rule.get('requires') or rule['requires'] in keys
+
+
+def _edit_environment(data, process, rules, hits):
+    """New bytes for one environment list, or None if no rule changes it"""
+    items = [{'raw': data[start:end], 'text': text, 'live': True, 'original': index}
+             for index, ((start, end), text) in enumerate(zip(process['items'], process['entries']))]
+    keys = {key: list(indexes) for key, indexes in process['keys'].items()}
+    changed = False
+    for rule_index, rule in enumerate(rules):
+        if rule_index not in hits or not _applies_to(rule, process, keys):
+            continue
+        key = rule['key']
+        indexes = keys.get(key, [])
+        if rule.get('remove'):
+            if not indexes:
+                continue
+            for index in indexes:
+                items[index]['live'] = False
+            del keys[key]
+        else:
+            text = f"{key}={rule['value']}"
+            if indexes and len(indexes) == 1 and items[indexes[0]]['text'] == text:
+                continue  # Already set
+            if indexes:
+                # Keep the first entry's position, drop the repeated ones
+                for index in indexes[1:]:
+                    items[index]['live'] = False
+                if items[indexes[0]]['text'] != text:
+                    items[indexes[0]].update(text=text, raw=json.dumps(text, ensure_ascii=False).encode('utf-8'))
+                keys[key] = indexes[:1]
+            else:
+                keys[key] = [len(items)]
+                items.append({'raw': json.dumps(text, ensure_ascii=False).encode('utf-8'), 'text': text,
+                              'live': True, 'original': None})
+        hits[rule_index] += 1
+        changed = True
+    if not changed:
+        return None
+
+    start, end, spans = process['start'], process['end'], process['items']
+    if spans:
+        lead = data[start + 1:spans[0][0]]
+        trail = data[spans[-1][1]:end - 1]
+    else:
+        indent = _line_indent(data, start)
+        lead, trail = b"\n" + indent + b"  ", b"\n" + indent
+    # New entries continue the layout of the first one
+    separator = b"," + lead
+    live = [item for item in items if item['live']]
+    if not live:
+        return b"[]"
+    parts = [b"[", lead, live[0]['raw']]
+    for item in live[1:]:
+        original = item['original']
+        if original is not None and original > 0:
+            parts.append(data[spans[original - 1][1]:spans[original][0]])
+        else:
+            parts.append(separator)
+        parts.append(item['raw'])
+    parts += [trail, b"]"]
+    return b"".join(parts)
+
+
+def apply_environment_updates(data, rules, reporter=None):
+    """
+    Apply environment rules to an ESME manifest.
+
+    Args:
+        data (bytes): The manifest.
+        rules (list): The 'environment_updates' rules.
+        reporter (dict, optional): Reporter for per-process events (default: console).
+
+    Returns:
+        tuple: (new data, splices as (start, end, new bytes) in order, hits
+        per rule: the number of processes each rule changed; None for
+        invalid rules).
+    """
+    reporter = reporter or new_reporter()
+    hits = {}
+    for rule_index, rule in enumerate(rules):
+        if is_valid_rule(rule):
+            hits[rule_index] = 0
+        else:
+            report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid environment rule: {description}",
+                   description=rule_description(rule))
+
+    splices = []
+    for process in index_environments(data):
+        label = process['name'] or f"list at byte {process['start']}"
+        if not process['valid']:
+            report(reporter, WARNING, "environment_not_editable",
+                   "⚠️  Environment of {process} holds non-string entries: left unchanged", process=label)
+            continue
+        new_text = _edit_environment(data, process, rules, hits)
+        if new_text is not None and new_text != data[process['start']:process['end']]:
+            splices.append((process['start'], process['end'], new_text))
+            report(reporter, INFO, "environment_updated", "   🧩 {process}: environment updated", process=label)
+    flush_reporter(reporter)
+
+    parts, position = [], 0
+    for start, end, new_text in splices:
+        parts += [data[position:start], new_text]
+        position = end
+    parts.append(data[position:])
+    return b"".join(parts), splices, [hits.get(rule_index) for rule_index in range(len(rules))]
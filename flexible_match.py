@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Whitespace-Flexible Matching
+Backs flexible_string_replace: a dataset rule such as
+
+    "reference_table": [ 4, 4, 3 ]
+
+also matches the table when it is pretty-printed over several lines. Both the
+pattern and the content are normalized by dropping the whitespace outside
+JSON strings, and the pattern is searched for in the normalized view with
+str.find, so a rule costs one linear pass over the file however much
+whitespace the pattern holds (a regex with a '\\s*' per space backtracks
+exponentially on near misses). Matches are mapped back to the original text,
+so the bytes around them are kept as they are.
+
+A pattern may start inside a JSON string ('model path": [1]'), so it is
+normalized twice: as starting outside a string and as starting inside one.
+Each match site only accepts the variant for its own string state.
+
+Every rule gets a time budget; a rule that runs out of it raises TimeoutError
+instead of stalling a build.
+"""
+
+import bisect
+import re
+import time
+
+# Seconds one flexible rule may take (set_settings.py --rule-budget)
+RULE_TIME_BUDGET = 30.0
+
+# One segment: the significant text (JSON strings whole, any other
+# non-whitespace character) and the whitespace after it. A string not closed
+# on its line is taken as a single quote character, unless it runs to the end
+# of the text (a pattern that ends inside a string).
+_SEGMENT = re.compile(r'((?:"(?:[^"\\\n]|\\.)*(?:"|\Z)|\S)*)(\s*)')
+_WORD = re.compile(r'\w+')
+
+# Matches whole strings and other characters from an outside-string position;
+# stops at the opening quote of a string cut off by the end position
+_OUTSIDE_STRINGS = re.compile(r'(?:[^"]|"(?:[^"\\\n]|\\.)*")*')
+
+# Check the deadline every this many segments or matches
+_CHECK_INTERVAL = 4096
+
+
+def _deadline_check(deadline, description, budget):
+    if time.perf_counter() > deadline:
+        raise TimeoutError(f"rule '{description}' exceeded its time budget of {budget:g} s")
+
+
+def normalize(content, deadline=None, description="", budget=None):
+    """
+    The whitespace-free view of a text.
+
+    Returns:
+        dict: 'text' (the text without whitespace outside JSON strings),
+        'starts' (offset of each significant segment in 'text') and
+        'offsets' (its offset in the original text).
+
+    Raises:
+        TimeoutError: The deadline passed.
+    """
+    pieces, starts, offsets = [], [], []
+    length = 0
+    for index, match in enumerate(_SEGMENT.finditer(content)):
+        kept = match.group(1)
+        if kept:
+            pieces.append(kept)
+            starts.append(length)
+            offsets.append(match.start())
+            length += len(kept)
+        if deadline is not None and index % _CHECK_INTERVAL == 0:
+            _deadline_check(deadline, description, budget)
+    return {'text': "".join(pieces), 'starts': starts, 'offsets': offsets}
+
+
+def _pattern_variants(from_pattern):
+    """
+    The normalized pattern for match sites outside and inside a JSON string.
+
+    Returns:
+        list: (normalized text, inside a string, keeps leading whitespace,
+        keeps trailing whitespace) for each distinct variant.
+    """
+    outside = normalize(from_pattern)['text']
+    # A quote in front puts the start of the pattern inside a string
+    inside = normalize('"' + from_pattern)['text'][1:]
+    variants = []
+    for text, in_string in ((outside, False), (inside, True)):
+        if text and all(text != other for other, _, _, _ in variants):
+            variants.append((text, in_string, text[:1].isspace(), text[-1:].isspace()))
+    return variants
+
+
+def _content_view(content, cache, deadline, description, budget):
+    if cache is not None and cache.get('content') is content:
+        return cache['view']
+    view = normalize(content, deadline, description, budget)
+    if cache is not None:
+        cache['content'], cache['view'] = content, view
+    return view
+
+
+def _segment(view, index):
+    return bisect.bisect_right(view['starts'], index) - 1
+
+
+def _original_offset(view, index):
+    segment = _segment(view, index)
+    return view['offsets'][segment] + index - view['starts'][segment]
+
+
+def _in_string(text, state, index):
+    """Whether text[index] is inside a JSON string; `state` keeps the scan position between calls"""
+    end = _OUTSIDE_STRINGS.match(text, state['position'], index).end()
+    # Scanning again from the opening quote of a cut string stays correct
+    state['position'] = end
+    return end < index
+
+
+def flexible_replace(content, from_pattern, to_pattern, description="", budget=None, cache=None):
+    """
+    Replace every occurrence of a pattern, ignoring whitespace outside JSON strings.
+
+    Whitespace at the start or end of the pattern also takes the whitespace
+    before or after a match, as the regex matcher this replaces did.
+
+    Args:
+        content (str): Text to modify.
+        from_pattern (str): Text to find.
+        to_pattern (str): Replacement, inserted as it is.
+        description (str): Rule description for the timeout message.
+        budget (float, optional): Seconds the rule may take (default: RULE_TIME_BUDGET).
+        cache (dict, optional): Owned by the caller; keeps the normalized view
+            of the content for the next rule tried on the same content.
+
+    Returns:
+        tuple: (new content, number of replacements).
+
+    Raises:
+        TimeoutError: The rule ran out of its time budget.
+    """
+    budget = RULE_TIME_BUDGET if budget is None else budget
+    deadline = time.perf_counter() + budget
+    variants = _pattern_variants(from_pattern)
+    if not variants:
+        return content, 0
+    # The words of the pattern occur verbatim in any match, so a missing word
+    # rules out a match without building the normalized view
+    word = max(_WORD.findall(from_pattern), key=len, default="")
+    if word not in content:
+        return content, 0
+
+    view = _content_view(content, cache, deadline, description, budget)
+    text, starts, offsets = view['text'], view['starts'], view['offsets']
+    check_state = len(variants) > 1
+    state = {'position': 0}
+    found = [text.find(variant[0]) for variant in variants]
+    parts, position, count, tried = [], 0, 0, 0
+    while any(index != -1 for index in found):
+        choice = min((index, number) for number, index in enumerate(found) if index != -1)[1]
+        index = found[choice]
+        pattern, in_string, keeps_leading, keeps_trailing = variants[choice]
+        tried += 1
+        if tried % _CHECK_INTERVAL == 0:
+            _deadline_check(deadline, description, budget)
+        if check_state and _in_string(text, state, index) != in_string:
+            found[choice] = text.find(pattern, index + 1)
+            continue
+
+        end = index + len(pattern)
+        start_offset = _original_offset(view, index)
+        end_offset = _original_offset(view, end - 1) + 1
+        if from_pattern[:1].isspace() and not keeps_leading:
+            segment = _segment(view, index)
+            if starts[segment] == index:
+                # The whitespace before a segment follows the previous one
+                start_offset = (offsets[segment - 1] + starts[segment] - starts[segment - 1]) if segment else 0
+        if from_pattern[-1:].isspace() and not keeps_trailing:
+            segment = _segment(view, end - 1) + 1
+            if segment == len(starts):
+                end_offset = len(content)
+            elif starts[segment] == end:
+                end_offset = offsets[segment]
+        start_offset = max(start_offset, position)
+        parts += [content[position:start_offset], to_pattern]
+        position = end_offset
+        count += 1
+        found = [text.find(variant[0], end) if 0 <= found_index < end else found_index
+                 for variant, found_index in zip(variants, found)]
+    if not count:
+        return content, 0
+    parts.append(content[position:])
+    return "".join(parts), count
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Synthetic Test Data Generator
+Generates realistic issp_dataset.json and esme_manifest_issp_roudi.json files
+of configurable size for benchmarks and tests, without needing a real project.
+"""
+
+import json
+import os
+import random
+import sys
+
+from ascii_codec import string_to_ascii_array
+
+ESME_MANIFEST_NAME = "esme_manifest_issp_roudi.json"
+DATASET_NAME = "issp_dataset.json"
+
+ASCII_PATH_LENGTH = 256
+
+# Values the shipped configurations look for, so generated files exercise
+# the real replacement rules
+STEERING_CAMERA = "MIRRORSE_CHN1CAMDEFAULT"
+STEERING_VALUES = [0.605078125, 0.5236895161, 0.392578125, 0.3860887097]
+MODEL_PATHS = [
+    "/home/iss/issp_oms_models/seatbelt_model.onnx",
+    "/home/iss/issp_oms_models/seatbelt_misuse_model.onnx",
+    "/home/iss/issp_oms_models/bodypose2d_model.onnx",
+    "/home/iss/issp_oms_models/bodypose3d_model.onnx",
+    "/home/iss/issp_oms_models/crs2d_model.onnx",
+    "/home/iss/issp_oms_models/ocla_model.onnx",
+    "/home/iss/issp_vitals_models/face_detection_yunet.onnx",
+]
+ESME_ENV_ENTRIES = [
+    "ISSP_AOS_PARAM_GW_VARIANT_TYPE=9",
+    "ISSP_AOS_PARAM_GW_CAM=0",
+    "MGC_BODYPOSE2D_MODEL_PATH=/home/iss/issp_oms_models/bodypose2d_model.onnx",
+    "MGC_BODYPOSE3D_MODEL_PATH=/home/iss/issp_oms_models/bodypose3d_model.onnx",
+    "MGC_SEATBELT_MODEL_PATH=/home/iss/issp_oms_models/seatbelt_model.onnx",
+    "MGC_SEATBELT_MISUSE_MODEL_PATH=/home/iss/issp_oms_models/seatbelt_misuse_model.onnx",
+    "MGC_CHILDSEATDET2D_MODEL_PATH=/home/iss/issp_oms_models/crs2d_model.onnx",
+    "MGC_OCCUPANT_CLASSIFICATION_MODEL_PATH=/home/iss/issp_oms_models/ocla_model.onnx",
+    "ACTIVITY_INSTANCE_NAME=issp_aos_act_bp2hp_instance",
+]
+
+DEFAULT_SIZES = {
+    'cameras': 8,
+    'path_fields': 4,
+    'depth': 3,
+    'processes': 10,
+    'env_entries': 40,
+}
+
+
+def path_to_ascii_array(path, length=ASCII_PATH_LENGTH):
+    """Zero-padded ASCII code array, the way the dataset stores *_path fields"""
+    return string_to_ascii_array(path, length)
+
+
+def _camera_parameters(rng, index, path_fields, depth):
+    camera = {
+        "use_can": 0,
+        "input_source": 0,
+        "fg_aec_tar_bright": rng.choice([60, 18]),
+        "frame_rate": rng.choice([15, 30, 60]),
+        "exposure_limits": [round(rng.uniform(0.0, 1.0), 6) for _ in range(4)],
+        "reference_table_model_logit_with_seatbelt_status": [4, 4, 4, 4, 4, 4, 3, 0, 0, 0, 0, 0],
+        "steering_wheel": [round(rng.uniform(0.2, 0.7), 10) for _ in range(4)],
+    }
+    for field in range(path_fields):
+        path = MODEL_PATHS[(index + field) % len(MODEL_PATHS)]
+        camera[f"model_{field}_path"] = path_to_ascii_array(path)
+
+    # Nested processing stages, each with its own parameters and one path
+    stage = camera
+    for level in range(1, depth):
+        nested = {
+            "enabled": rng.random() < 0.8,
+            "threshold": round(rng.uniform(-1.0, 1.0), 6),
+            "weights": [round(rng.uniform(-1.0, 1.0), 6) for _ in range(8)],
+            "config_path": path_to_ascii_array(f"/home/iss/issp_configs/stage_{level}.json"),
+        }
+        stage[f"stage_{level}"] = nested
+        stage = nested
+    return camera
+
+
+def generate_dataset(cameras=DEFAULT_SIZES['cameras'], path_fields=DEFAULT_SIZES['path_fields'],
+                     depth=DEFAULT_SIZES['depth'], seed=0):
+    """
+    Build a synthetic ISSP dataset.
+
+    Args:
+        cameras (int): Number of camera configurations (the first one is the
+            steering wheel camera targeted by the shipped configurations).
+        path_fields (int): ASCII-encoded *_path fields per camera.
+        depth (int): Nesting depth of each camera configuration (>= 1).
+        seed (int): Random seed; the same arguments give the same dataset.
+
+    Returns:
+        dict: The dataset.
+    """
+    rng = random.Random(seed)
+    camera_configs = {}
+    for index in range(cameras):
+        name = STEERING_CAMERA if index == 0 else f"CHN{index % 4 + 1}CAM{index:04d}"
+        camera = _camera_parameters(rng, index, path_fields, max(depth, 1))
+        if index == 0:
+            camera["steering_wheel"] = list(STEERING_VALUES)
+        camera_configs[name] = camera
+    return {
+        "version": "2.0",
+        "dataset_name": f"synthetic_{cameras}x{path_fields}x{depth}",
+        "cameras": camera_configs,
+    }
+
+
+def generate_esme_manifest(processes=DEFAULT_SIZES['processes'], env_entries=DEFAULT_SIZES['env_entries'], seed=0):
+    """
+    Build a synthetic ESME manifest.
+
+    Args:
+        processes (int): Number of process entries.
+        env_entries (int): Environment entries per process; the entries the
+            shipped configurations replace come first.
+        seed (int): Random seed.
+
+    Returns:
+        dict: The manifest.
+    """
+    rng = random.Random(seed)
+    manifest = {"name": "issp_roudi", "processes": []}
+    for index in range(processes):
+        environment = ESME_ENV_ENTRIES[:env_entries]
+        for extra in range(len(environment), env_entries):
+            environment.append(f"ISSP_OMS_PARAM_{index:03d}_{extra:04d}={round(rng.uniform(-1.0, 1.0), 4)}")
+        manifest["processes"].append({
+            "name": f"issp_aos_process_{index:03d}",
+            "executable": f"/opt/issp/bin/issp_aos_process_{index:03d}",
+            "arguments": ["--config", f"/opt/issp/etc/process_{index:03d}.json"],
+            "environment": environment,
+        })
+    return manifest
+
+
+def write_project(output_dir, seed=0, **sizes):
+    """
+    Write a synthetic project (dataset and ESME manifest) to output_dir.
+
+    Returns:
+        dict: {'esme': path, 'dataset': path}
+    """
+    sizes = dict(DEFAULT_SIZES, **sizes)
+    os.makedirs(output_dir, exist_ok=True)
+    dataset_path = os.path.join(output_dir, DATASET_NAME)
+    esme_path = os.path.join(output_dir, ESME_MANIFEST_NAME)
+    with open(dataset_path, 'w') as f:
+        json.dump(generate_dataset(sizes['cameras'], sizes['path_fields'], sizes['depth'], seed), f, indent=2)
+    with open(esme_path, 'w') as f:
+        json.dump(generate_esme_manifest(sizes['processes'], sizes['env_entries'], seed), f, indent=2)
+    return {'esme': esme_path, 'dataset': dataset_path}
+
+
+def _get_int_option(argv, flag, default):
+    if flag not in argv:
+        return default
+    try:
+        return int(argv[argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        print(f"❌ Error: {flag} requires a number")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print("Usage: python generate_test_data.py <output_dir> [options]")
+        print("Options:")
+        print(f"  --cameras N      Camera configurations (default {DEFAULT_SIZES['cameras']})")
+        print(f"  --path-fields N  ASCII *_path fields per camera (default {DEFAULT_SIZES['path_fields']})")
+        print(f"  --depth N        Nesting depth per camera (default {DEFAULT_SIZES['depth']})")
+        print(f"  --processes N    ESME manifest processes (default {DEFAULT_SIZES['processes']})")
+        print(f"  --env-entries N  Environment entries per process (default {DEFAULT_SIZES['env_entries']})")
+        print("  --seed N         Random seed (default 0)")
+        sys.exit(1)
+
+    sizes = {key: _get_int_option(sys.argv, "--" + key.replace('_', '-'), value) for key, value in DEFAULT_SIZES.items()}
+    files = write_project(sys.argv[1], seed=_get_int_option(sys.argv, "--seed", 0), **sizes)
+    for key in ('dataset', 'esme'):
+        print(f"✅ Wrote {files[key]} ({os.path.getsize(files[key]):,} bytes)")
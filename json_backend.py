@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - JSON Backend
+Parsing and serialization for the dataset and validation paths. When orjson
+is installed it does the work; its result is only used where it is provably
+identical to the stdlib json module's, otherwise the stdlib is used for that
+call. The backend can be forced with JSON_TOOLS_BACKEND=stdlib|orjson|auto.
+"""
+
+import json
+import os
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "stdlib")
+
+# Byte classes for fast pre-checks with bytes.translate(): every digit
+# becomes '0', 'e' stays, everything else becomes ' '
+_DIGIT_CLASSES = bytes(ord('0') if chr(code) in "0123456789" else code if chr(code) == "e" else ord(' ')
+                       for code in range(256))
+
+# orjson silently parses integers beyond 64 bits as floats; documents with a
+# run of 19+ digits (strings included) are parsed by the stdlib instead
+_LONG_DIGITS = b"0" * 19
+
+# Numbers the two backends format differently: orjson writes 1e16, 1e-7 and
+# 0.00001 where repr() writes 1e+16, 1e-07 and 1e-05. The first two have a
+# digit followed by 'e', the last one contains '0.0000'. Strings can match
+# too; that only costs a fallback.
+_EXPONENT_MARKER = b"0e"
+_SMALL_NUMBER_MARKER = b"0.0000"
+
+
+def _select_backend():
+    requested = os.environ.get("JSON_TOOLS_BACKEND", "auto").lower()
+    if requested not in BACKENDS:
+        print(f"⚠️  Unknown JSON_TOOLS_BACKEND '{requested}' (choose from {', '.join(BACKENDS)}); using auto",
+              file=sys.stderr)
+        requested = "auto"
+    if requested == "stdlib" or orjson is None:
+        if requested == "orjson":
+            print("⚠️  JSON_TOOLS_BACKEND=orjson but orjson is not installed; using the stdlib json module",
+                  file=sys.stderr)
+        return "stdlib"
+    return "orjson"
+
+
+BACKEND = _select_backend()
+
+
+def loads(content):
+    """
+    json.loads() with the fast backend.
+
+    Invalid documents are always re-parsed by the stdlib, so errors are the
+    stdlib's json.JSONDecodeError with its line and column.
+    """
+    if BACKEND == "orjson":
+        try:
+            data = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+        except UnicodeEncodeError:
+            # Lone surrogates: only the stdlib accepts them
+            data = None
+        if data is not None and _LONG_DIGITS not in data.translate(_DIGIT_CLASSES):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity, lone surrogate escapes and real errors: the stdlib decides
+                pass
+    return json.loads(content)
+
+
+def dumps(data, indent=None):
+    """
+    json.dumps(data, indent=indent) with the fast backend for indent=2.
+
+    The fast output is used only when it cannot differ from the stdlib's: no
+    characters the stdlib would escape (it escapes DEL and all non-ASCII), no
+    exponent-formatted numbers, and no NaN/Infinity (orjson writes null).
+    """
+    if BACKEND == "orjson" and indent == 2:
+        try:
+            output = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # Integers beyond 64 bits, non-string keys, unsupported types
+            output = None
+        if (output is not None and output.isascii() and b"\x7f" not in output
+                and _SMALL_NUMBER_MARKER not in output
+                and _EXPONENT_MARKER not in output.translate(_DIGIT_CLASSES)
+                and (b"null" not in output or orjson.loads(output) == data)):
+            return output.decode('ascii')
+    return json.dumps(data, indent=indent)
+
+
+if __name__ == "__main__":
+    print(f"JSON backend: {BACKEND}" + (f" (orjson {orjson.__version__})" if BACKEND == "orjson" else ""))
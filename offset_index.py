@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Byte-Offset Index
+Random access into large dataset files. A sidecar index maps the JSON pointer
+of every object member ('/cameras/CHN1CAM0001/steering_wheel') to the byte
+range of its value. It is built once by a bracket scan and reused while the
+file's size and mtime (or, after a touch, its hash) are unchanged. Reads and
+edits then go through mmap and parse only the value concerned.
+
+Array elements are not indexed: a pointer below an array is resolved by
+parsing the nearest indexed value above it.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+
+import json_backend
+from ascii_codec import ascii_array_to_string, is_ascii_array, json_pointer_token, string_to_ascii_array
+from project_discovery import get_cache_dir
+from undo_journal import content_hash, new_run_id, record_change
+
+INDEX_VERSION = 1
+
+# A string (a key if followed by ':') or a bracket; numbers, literals, commas
+# and whitespace are skipped by the regex engine
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"(\s*:)?|[\[\]{}]')
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"')
+_SCALAR_END = re.compile(rb'[^,}\]\s]*')
+_WHITESPACE = re.compile(rb'\s*')
+
+_OPEN = frozenset(b"{[")
+_CLOSE = frozenset(b"}]")
+
+
+def _index_path(file_path):
+    digest = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(get_cache_dir(), "offset_index", digest + ".json")
+
+
+def split_pointer(pointer):
+    """JSON pointer (RFC 6901) -> list of unescaped tokens"""
+    if not pointer:
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer '{pointer}' (must start with '/')")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def scan_offsets(data, root="", base=0, max_depth=None):
+    """
+    Byte ranges of all object members of a JSON document.
+
+    Args:
+        data (bytes or mmap): A JSON document (or one value of one).
+        root (str): JSON pointer of `data` itself.
+        base (int): Offset added to every range.
+        max_depth (int, optional): Only index members this deep (1: the
+            members of the root object).
+
+    Returns:
+        dict: {JSON pointer: (start, end)}; the root container is included.
+    """
+    first = _WHITESPACE.match(data).end()
+    if data[first] not in _OPEN:
+        # A scalar value
+        return {root: (base + first, base + len(data[:].rstrip()))}
+    entries = {}
+    stack = []  # (pointer or None below arrays, start) of the open containers
+    pending = root
+    for match in _TOKEN.finditer(data):
+        start = match.start()
+        first = data[start]
+        if first in _OPEN:
+            stack.append((pending, start))
+            pending = None
+        elif first in _CLOSE:
+            pointer, open_start = stack.pop()
+            if pointer is not None:
+                entries[pointer] = (base + open_start, base + match.end())
+        elif match.group(1) is not None:
+            parent = stack[-1][0] if stack else None
+            if parent is None or (max_depth is not None and len(stack) > max_depth):
+                continue
+            raw = data[start:match.start(1)]
+            key = json.loads(raw) if b"\\" in raw else raw[1:-1].decode('utf-8')
+            pointer = f"{parent}/{json_pointer_token(key)}"
+            value_start = _WHITESPACE.match(data, match.end()).end()
+            if data[value_start] in _OPEN:
+                pending = pointer
+            elif data[value_start] == ord('"'):
+                entries[pointer] = (base + value_start, base + _STRING.match(data, value_start).end())
+            else:
+                entries[pointer] = (base + value_start, base + _SCALAR_END.match(data, value_start).end())
+    return entries
+
+
+def _file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_index(file_path):
+    """Scan a file and save its index; returns the index dict"""
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    entries = scan_offsets(data)
+    index = {
+        'version': INDEX_VERSION,
+        'file': file_path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': _file_hash(data),
+        'indented': data.lstrip()[:2] in (b"{\n", b"[\n"),
+        'entries': entries,
+    }
+    _save_index(index)
+    return index
+
+
+def _save_index(index):
+    index_path = _index_path(index['file'])
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(temp_path, index_path)
+    except OSError:
+        pass
+
+
+def _read_index(file_path):
+    try:
+        with open(_index_path(file_path), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    index['entries'] = {pointer: tuple(span) for pointer, span in index['entries'].items()}
+    return index
+
+
+def load_index(file_path):
+    """
+    The file's index, rebuilt if the file changed.
+
+    A matching size and mtime is trusted; if only the mtime differs the file
+    is hashed and the index is kept when the content is the same.
+    """
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    index = _read_index(file_path)
+    if index is None or index['size'] != stat.st_size:
+        return build_index(file_path)
+    if index['mtime_ns'] != stat.st_mtime_ns:
+        with open(file_path, 'rb') as f:
+            if _file_hash(f.read()) != index['hash']:
+                return build_index(file_path)
+        index['mtime_ns'] = stat.st_mtime_ns
+        _save_index(index)
+    return index
+
+
+def _resolve(index, pointer):
+    """(nearest indexed pointer at or above `pointer`, remaining tokens)"""
+    tokens = split_pointer(pointer)
+    for length in range(len(tokens), -1, -1):
+        candidate = "".join("/" + json_pointer_token(token) for token in tokens[:length])
+        if candidate in index['entries']:
+            return candidate, tokens[length:]
+    raise KeyError(f"'{pointer}' is not in {index['file']}")
+
+
+def _walk(value, tokens, pointer):
+    for token in tokens:
+        try:
+            value = value[int(token)] if isinstance(value, list) else value[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise KeyError(f"'{pointer}' does not exist") from None
+    return value
+
+
+def _read_span(file_path, start, end):
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped[start:end]
+
+
+def read_raw(file_path, pointer, index=None):
+    """Raw bytes of an indexed value"""
+    index = index or load_index(file_path)
+    if pointer not in index['entries']:
+        raise KeyError(f"'{pointer}' is not indexed (array elements are not; read the array)")
+    return _read_span(index['file'], *index['entries'][pointer])
+
+
+def read_value(file_path, pointer, index=None):
+    """
+    Parse one value without parsing the rest of the file.
+
+    Raises:
+        KeyError: The pointer does not exist.
+        ValueError: Malformed pointer.
+    """
+    index = index or load_index(file_path)
+    indexed, rest = _resolve(index, pointer)
+    value = json_backend.loads(_read_span(index['file'], *index['entries'][indexed]))
+    return _walk(value, rest, pointer)
+
+
+def find_camera(index, camera):
+    """JSON pointer of a camera configuration by name ('/cameras/<name>' or the first object of that name)"""
+    token = "/" + json_pointer_token(camera)
+    if "/cameras" + token in index['entries']:
+        return "/cameras" + token
+    for pointer in index['entries']:
+        if pointer.endswith(token):
+            return pointer
+    raise KeyError(f"No camera '{camera}' in {index['file']}")
+
+
+def list_pointers(index, prefix=""):
+    """Indexed pointers at or below `prefix`, in file order"""
+    return sorted((pointer for pointer in index['entries']
+                   if pointer == prefix or pointer.startswith(prefix.rstrip("/") + "/")),
+                  key=lambda pointer: index['entries'][pointer][0])
+
+
+def _line_indent(data, position):
+    line_start = data.rfind(b"\n", 0, position) + 1
+    line = data[line_start:position]
+    return len(line) - len(line.lstrip(b" "))
+
+
+def _serialize(value, indented, indent):
+    if not indented:
+        return json_backend.dumps(value).encode('utf-8')
+    return json_backend.dumps(value, indent=2).replace("\n", "\n" + " " * indent).encode('utf-8')
+
+
+def set_value(file_path, pointer, value, journal=True, run_id=None):
+    """
+    Replace one value in place, formatted as json.dumps(indent=2) would.
+
+    The nearest indexed value is re-serialized (the value itself for object
+    members); the index is updated by shifting the ranges after it. A
+    replacement of the same length is written through mmap.
+
+    Returns:
+        dict: {'pointer', 'changed', 'start', 'old_size', 'new_size'}
+    """
+    index = load_index(file_path)
+    file_path = index['file']
+    indexed, rest = _resolve(index, pointer)
+    start, end = index['entries'][indexed]
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if rest:
+        container = json_backend.loads(data[start:end])
+        parent = _walk(container, rest[:-1], pointer)
+        key = rest[-1]
+        if isinstance(parent, list):
+            try:
+                parent[int(key)] = value
+            except (ValueError, IndexError):
+                raise KeyError(f"'{pointer}' does not exist") from None
+        elif isinstance(parent, dict):
+            parent[key] = value
+        else:
+            raise KeyError(f"'{pointer}' does not exist")
+        value = container
+    replacement = _serialize(value, index['indented'], _line_indent(data, start))
+    result = {'pointer': pointer, 'changed': replacement != data[start:end], 'start': start,
+              'old_size': end - start, 'new_size': len(replacement)}
+    if not result['changed']:
+        return result
+
+    new_data = data[:start] + replacement + data[end:]
+    if len(replacement) == end - start:
+        with open(file_path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mapped:
+            mapped[start:end] = replacement
+            mapped.flush()
+    else:
+        with open(file_path, 'wb') as f:
+            f.write(new_data)
+    if journal:
+        record_change(file_path, data, new_data, run_id or new_run_id(), "edit",
+                      reverse_patch=[(start, start + len(replacement), data[start:end])])
+
+    delta = len(replacement) - (end - start)
+    entries = {}
+    for other, (other_start, other_end) in index['entries'].items():
+        if other == indexed or other.startswith(indexed + "/"):
+            continue
+        if other_start >= end:
+            entries[other] = (other_start + delta, other_end + delta)
+        elif other_end >= end:
+            entries[other] = (other_start, other_end + delta)
+        else:
+            entries[other] = (other_start, other_end)
+    entries.update(scan_offsets(replacement, indexed, start))
+    stat = os.stat(file_path)
+    index.update(entries=entries, size=stat.st_size, mtime_ns=stat.st_mtime_ns, hash=content_hash(new_data))
+    _save_index(index)
+    return result
+
+
+def set_path_string(file_path, pointer, text, journal=True, run_id=None):
+    """Set a *_path ASCII array to a string, keeping the array length"""
+    current = read_value(file_path, pointer)
+    if not is_ascii_array(current):
+        raise ValueError(f"'{pointer}' is not an ASCII array")
+    return set_value(file_path, pointer, string_to_ascii_array(text, len(current)), journal, run_id)
+
+
+def _print_value(pointer, value):
+    if pointer.endswith("_path") and is_ascii_array(value):
+        print(f"{pointer}: '{ascii_array_to_string(value)}'")
+    else:
+        print(json.dumps(value, indent=2))
+
+
+if __name__ == "__main__":
+    commands = ("build", "get", "camera", "list", "set", "set-path")
+    if len(sys.argv) < 3 or sys.argv[1] not in commands:
+        print("Usage: python offset_index.py build <dataset.json>")
+        print("       python offset_index.py get <dataset.json> <json_pointer> [--raw]")
+        print("       python offset_index.py camera <dataset.json> <camera_name> [field]")
+        print("       python offset_index.py list <dataset.json> [json_pointer]")
+        print("       python offset_index.py set <dataset.json> <json_pointer> <json_value>")
+        print("       python offset_index.py set-path <dataset.json> <json_pointer> <path_string>")
+        print("Example: python offset_index.py get prj/issp_dataset.json /cameras/CHN1CAM0001/model_0_path")
+        sys.exit(1)
+
+    command, file_path = sys.argv[1], sys.argv[2]
+    args = [arg for arg in sys.argv[3:] if arg != "--raw"]
+    try:
+        if command == "build":
+            index = build_index(file_path)
+            print(f"✅ Indexed {len(index['entries'])} values of {index['file']} ({index['size']} bytes)")
+        elif command == "list":
+            index = load_index(file_path)
+            for pointer in list_pointers(index, args[0] if args else ""):
+                start, end = index['entries'][pointer]
+                print(f"{start:>10} {end - start:>9}  {pointer}")
+        elif not args:
+            print(f"❌ Error: {command} requires more arguments")
+            sys.exit(1)
+        elif command == "get":
+            if "--raw" in sys.argv:
+                sys.stdout.write(read_raw(file_path, args[0]).decode('utf-8') + "\n")
+            else:
+                _print_value(args[0], read_value(file_path, args[0]))
+        elif command == "camera":
+            index = load_index(file_path)
+            pointer = find_camera(index, args[0])
+            if len(args) > 1:
+                pointer += "/" + json_pointer_token(args[1])
+            _print_value(pointer, read_value(file_path, pointer, index))
+        elif len(args) < 2:
+            print(f"❌ Error: {command} requires a pointer and a value")
+            sys.exit(1)
+        else:
+            if command == "set":
+                result = set_value(file_path, args[0], json.loads(args[1]))
+            else:
+                result = set_path_string(file_path, args[0], args[1])
+            if result['changed']:
+                print(f"✅ Updated {result['pointer']} ({result['old_size']} -> {result['new_size']} bytes)")
+            else:
+                print(f"ℹ️  {result['pointer']} already has this value")
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Binary Patch Plans
+Records the result of applying a configuration to a base file as a byte-offset
+patch keyed by the base file's hash, so byte-identical copies can be patched
+with a hash check and a splice instead of parsing and searching them again.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from config_layers import layer_chain
+from undo_journal import (apply_patch, compute_patch, content_hash, decode_patch, encode_patch,
+                          get_object, get_store_dir, put_object)
+
+PLAN_INDEX_FILE = "patch_plans.json"
+
+# Bump when a change to the replacement code can change its output, so plans
+# recorded by an older version are not replayed.
+PLAN_FORMAT_VERSION = 1
+
+# Run options that can change a mode's result; plans recorded with other
+# values are not replayed
+RESULT_OPTIONS = ('rule_budget',)
+
+
+def config_fingerprint(config_dir, file_names, options=None):
+    """
+    SHA-256 over the names and contents of the rule files present in
+    config_dir and its base layers, and the RESULT_OPTIONS of the run
+    """
+    digest = hashlib.sha256(f"plan-v{PLAN_FORMAT_VERSION}".encode('ascii'))
+    options = options or {}
+    digest.update(json.dumps({name: options.get(name) for name in RESULT_OPTIONS}, sort_keys=True).encode('utf-8') + b"\0")
+    for layer_dir in layer_chain(config_dir):
+        for file_name in sorted(file_names):
+            file_path = os.path.join(layer_dir, file_name)
+            if os.path.isfile(file_path):
+                with open(file_path, 'rb') as f:
+                    digest.update(file_name.encode('utf-8') + b"\0" + f.read() + b"\0")
+    return digest.hexdigest()
+
+
+def plan_key(base_hash, config_hash, mode):
+    return f"{mode}:{config_hash}:{base_hash}"
+
+
+def _index_path(store_dir):
+    return os.path.join(store_dir, PLAN_INDEX_FILE)
+
+
+def load_plans(store_dir=None):
+    try:
+        with open(_index_path(store_dir or get_store_dir()), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def find_plan(base_hash, config_hash, mode, store_dir=None):
+    """Return the recorded plan for this base file, config and mode, or None"""
+    return load_plans(store_dir).get(plan_key(base_hash, config_hash, mode))
+
+
+def save_plan(base_data, result_data, config_hash, mode, store_dir=None):
+    """
+    Record the patch that turns base_data into result_data.
+
+    The forward patch is used for replaying, the reverse patch lets the undo
+    journal record the replay without diffing.
+
+    Returns:
+        dict: The plan entry.
+    """
+    store_dir = store_dir or get_store_dir()
+    base_hash = content_hash(base_data)
+    forward = compute_patch(base_data, result_data)
+    plan = {
+        'mode': mode,
+        'base_hash': base_hash,
+        'result_hash': content_hash(result_data),
+        'patch': put_object(encode_patch(forward), store_dir),
+        'reverse_patch': put_object(encode_patch(compute_patch(result_data, base_data)), store_dir),
+        'splices': len(forward),
+    }
+    plans = load_plans(store_dir)
+    plans[plan_key(base_hash, config_hash, mode)] = plan
+    os.makedirs(store_dir, exist_ok=True)
+    temp_path = f"{_index_path(store_dir)}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(plans, f, indent=2)
+    os.replace(temp_path, _index_path(store_dir))
+    return plan
+
+
+def replay_plan(plan, base_data, store_dir=None):
+    """
+    Apply a recorded plan to a file whose content hashes to the plan's base.
+
+    Returns:
+        tuple: (result bytes, reverse patch), or (None, None) if the plan's
+        objects are missing or the result does not have the recorded hash.
+    """
+    store_dir = store_dir or get_store_dir()
+    if content_hash(base_data) != plan['base_hash']:
+        return None, None
+    forward = get_object(plan['patch'], store_dir)
+    reverse = get_object(plan['reverse_patch'], store_dir)
+    if forward is None or reverse is None:
+        return None, None
+    result = apply_patch(base_data, decode_patch(forward))
+    if content_hash(result) != plan['result_hash']:
+        return None, None
+    return result, decode_patch(reverse)
+
+
+if __name__ == "__main__":
+    if "--list" not in sys.argv:
+        print("Usage: python patch_plans.py --list")
+        print("Plans are recorded and replayed by: python set_settings.py <project_path> --plans ...")
+        sys.exit(1)
+    plans = load_plans()
+    if not plans:
+        print("ℹ️  No patch plans recorded")
+    for key, plan in plans.items():
+        print(f"   {plan['mode']:<9} base {plan['base_hash'][:12]}  config {key.split(':')[1][:12]}  "
+              f"{plan['splices']} splice(s)")
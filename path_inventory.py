@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Path Inventory
+Fleet-wide index of the decoded *_path fields of dataset files. A scan reads
+every dataset of the given projects once and stores each field's JSON pointer
+and decoded string in a local SQLite database, keyed by the file's content
+hash: unchanged files (same size and mtime) are not read again, and files
+with already indexed content are not parsed again. Rule authors can then test
+an old_path, or a whole config folder, against every indexed project.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import json_backend
+from ascii_codec import decode_document
+from config_layers import load_rule_file
+from project_discovery import discover_project_files
+from undo_journal import content_hash, get_store_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    scanned REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contents (
+    hash TEXT PRIMARY KEY,
+    fields INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS paths (
+    hash TEXT NOT NULL,
+    pointer TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_hash ON files (hash);
+CREATE INDEX IF NOT EXISTS paths_by_hash ON paths (hash);
+CREATE INDEX IF NOT EXISTS paths_by_value ON paths (value);
+"""
+
+# Results printed per query before the rest is summarized
+DEFAULT_LIMIT = 50
+
+
+def get_inventory_db_path():
+    """SQLite file for the path inventory (JSON_TOOLS_INVENTORY_DB or <data dir>/path_inventory.sqlite3)"""
+    return os.environ.get("JSON_TOOLS_INVENTORY_DB") or os.path.join(get_store_dir(), "path_inventory.sqlite3")
+
+
+def open_inventory_db(db_path=None):
+    db_path = db_path or get_inventory_db_path()
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# === Scanning ===
+
+def extract_path_fields(data):
+    """
+    Decode every *_path field of one dataset file's content.
+
+    Returns:
+        tuple: (list of (JSON pointer, decoded string), error message or None)
+    """
+    try:
+        return decode_document(json_backend.loads(data), pointers=True), None
+    except (ValueError, UnicodeDecodeError) as e:
+        return [], str(e)
+
+
+def _extract_file(file_path):
+    # Worker side of a parallel scan: (hash, fields, error) of one file
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    fields, error = extract_path_fields(data)
+    return content_hash(data), fields, error
+
+
+def collect_dataset_files(targets, use_cache=True):
+    """
+    Dataset files of the given projects or files.
+
+    Returns:
+        list: (project, file) pairs; a file given directly belongs to its
+        directory, a project contributes issp_dataset.json and its siblings.
+    """
+    found = []
+    for target in targets:
+        target = os.path.abspath(target)
+        if os.path.isfile(target):
+            found.append((os.path.dirname(target), target))
+            continue
+        files = discover_project_files(target, use_cache=use_cache)
+        if not files['dataset']:
+            print(f"⚠️  No dataset file found in {target}")
+            continue
+        for file_path in [files['dataset']] + files['dataset_siblings']:
+            found.append((target, file_path))
+    return found
+
+
+def _store_content(connection, digest, fields, error):
+    connection.execute("INSERT OR REPLACE INTO contents VALUES (?, ?, ?)", (digest, len(fields), error))
+    connection.execute("DELETE FROM paths WHERE hash = ?", (digest,))
+    connection.executemany("INSERT INTO paths VALUES (?, ?, ?)",
+                           [(digest, pointer, value) for pointer, value in fields])
+
+
+def scan(targets, db_path=None, workers=1, use_cache=True):
+    """
+    Index the *_path fields of the dataset files of projects (or single files).
+
+    A file is read only if its size or mtime changed since the last scan and
+    parsed only if no file with the same content hash is indexed yet. With
+    workers > 1 the files to parse are read and decoded in worker processes.
+
+    Returns:
+        dict: Counts of 'files', 'unchanged', 'reused' (content already
+        indexed), 'parsed', 'errors' and 'fields' (newly indexed).
+    """
+    stats = {'files': 0, 'unchanged': 0, 'reused': 0, 'parsed': 0, 'errors': 0, 'fields': 0}
+    connection = open_inventory_db(db_path)
+    try:
+        known_contents = {row[0] for row in connection.execute("SELECT hash FROM contents")}
+        known_files = {row[0]: row[1:] for row in connection.execute("SELECT file, size, mtime_ns FROM files")}
+
+        pending = []
+        for project, file_path in collect_dataset_files(targets, use_cache):
+            stats['files'] += 1
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                print(f"❌ Cannot read {file_path}: {e}")
+                stats['errors'] += 1
+                continue
+            if known_files.get(file_path) == (stat.st_size, stat.st_mtime_ns):
+                stats['unchanged'] += 1
+                continue
+            pending.append((project, file_path, stat))
+
+        def store(project, file_path, stat, digest, fields, error):
+            if fields is not None:
+                _store_content(connection, digest, fields, error)
+                known_contents.add(digest)
+                stats['parsed'] += 1
+                stats['fields'] += len(fields)
+                if error:
+                    print(f"⚠️  {file_path}: not valid JSON ({error})")
+                    stats['errors'] += 1
+            else:
+                stats['reused'] += 1
+            connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                               (file_path, project, digest, stat.st_size, stat.st_mtime_ns, time.time()))
+
+        to_parse = []
+        with connection:
+            for project, file_path, stat in pending:
+                if workers > 1:
+                    to_parse.append((project, file_path, stat))
+                    continue
+                try:
+                    with open(file_path, 'rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    print(f"❌ Cannot read {file_path}: {e}")
+                    stats['errors'] += 1
+                    continue
+                digest = content_hash(data)
+                if digest in known_contents:
+                    store(project, file_path, stat, digest, None, None)
+                else:
+                    store(project, file_path, stat, digest, *extract_path_fields(data))
+
+        if to_parse:
+            # Identical files in different projects are parsed more than once
+            # here; the content rows are simply replaced with the same fields
+            with ProcessPoolExecutor(max_workers=workers) as executor, connection:
+                futures = [executor.submit(_extract_file, file_path) for _, file_path, _ in to_parse]
+                for (project, file_path, stat), future in zip(to_parse, futures):
+                    try:
+                        digest, fields, error = future.result()
+                    except OSError as e:
+                        print(f"❌ Cannot read {file_path}: {e}")
+                        stats['errors'] += 1
+                        continue
+                    if digest in known_contents:
+                        store(project, file_path, stat, digest, None, None)
+                    else:
+                        store(project, file_path, stat, digest, fields, error)
+
+        with connection:
+            # Contents no indexed file has any more
+            connection.execute("DELETE FROM paths WHERE hash NOT IN (SELECT hash FROM files)")
+            connection.execute("DELETE FROM contents WHERE hash NOT IN (SELECT hash FROM files)")
+    finally:
+        connection.close()
+    return stats
+
+
+def prune(db_path=None):
+    """Drop files that no longer exist from the index; returns the number dropped"""
+    connection = open_inventory_db(db_path)
+    try:
+        missing = [(file_path,) for (file_path,) in connection.execute("SELECT file FROM files")
+                   if not os.path.isfile(file_path)]
+        with connection:
+            connection.executemany("DELETE FROM files WHERE file = ?", missing)
+            connection.execute("DELETE FROM paths WHERE hash NOT IN (SELECT hash FROM files)")
+            connection.execute("DELETE FROM contents WHERE hash NOT IN (SELECT hash FROM files)")
+    finally:
+        connection.close()
+    return len(missing)
+
+
+# === Queries ===
+
+def find_paths(connection, text, exact=False):
+    """
+    Indexed fields whose decoded string equals (exact) or contains `text`.
+
+    Returns:
+        list: (project, file, pointer, value) rows ordered by project and file.
+    """
+    condition = "paths.value = ?" if exact else "instr(paths.value, ?) > 0"
+    return connection.execute(
+        "SELECT files.project, files.file, paths.pointer, paths.value FROM paths "
+        f"JOIN files ON files.hash = paths.hash WHERE {condition} "
+        "ORDER BY files.project, files.file, paths.pointer", (text,)).fetchall()
+
+
+def test_ascii_rule(connection, old_path, new_path=None):
+    """
+    Fields an ascii_path_replacements rule would change, with the matching of
+    set_settings.py: the decoded string equals or contains old_path, and is
+    not already new_path.
+
+    Returns:
+        list: (project, file, pointer, value) rows.
+    """
+    return [row for row in find_paths(connection, old_path) if row[3] != new_path]
+
+
+def load_ascii_rules(config_path):
+    """The ascii_path_replacements rules of a config folder (or a dataset replacements file)"""
+    if os.path.isdir(config_path):
+        config = load_rule_file(config_path, "issp_dataset_replacements.json")
+        if config is None:
+            raise OSError(f"No issp_dataset_replacements.json in {config_path} or its base layers")
+    else:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    return config.get('ascii_path_replacements', {}).get('automatic_replacements', [])
+
+
+def print_rows(rows, limit=DEFAULT_LIMIT):
+    for project, file_path, pointer, value in rows[:limit]:
+        print(f"   {project}  {os.path.relpath(file_path, project)}  {pointer}: '{value}'")
+    if len(rows) > limit:
+        print(f"   ... and {len(rows) - limit} more")
+
+
+def test_rules(config_path, db_path=None, limit=DEFAULT_LIMIT):
+    """
+    Test every ASCII path rule of a config against the whole index.
+
+    Returns:
+        list: Descriptions of the rules that match no indexed field.
+    """
+    rules = load_ascii_rules(config_path)
+    connection = open_inventory_db(db_path)
+    unmatched = []
+    try:
+        projects_total = connection.execute("SELECT COUNT(DISTINCT project) FROM files").fetchone()[0]
+        print(f"🔍 Testing {len(rules)} ASCII path rule(s) against {projects_total} indexed project(s)")
+        for rule in rules:
+            old_path = rule.get('old_path')
+            if not old_path:
+                continue
+            description = rule.get('description', old_path)
+            rows = test_ascii_rule(connection, old_path, rule.get('new_path'))
+            projects = len({row[0] for row in rows})
+            if rows:
+                print(f"\n✅ {description}: {len(rows)} field(s) in {projects} project(s)")
+                print_rows(rows, limit)
+            else:
+                print(f"\n⚠️  {description}: no indexed field contains '{old_path}'")
+                unmatched.append(description)
+    finally:
+        connection.close()
+    return unmatched
+
+
+def print_stats(db_path=None):
+    connection = open_inventory_db(db_path)
+    try:
+        projects, files, last_scan = connection.execute(
+            "SELECT COUNT(DISTINCT project), COUNT(*), MAX(scanned) FROM files").fetchone()
+        contents, errors = connection.execute(
+            "SELECT COUNT(*), SUM(error IS NOT NULL) FROM contents").fetchone()
+        fields, values = connection.execute("SELECT COUNT(*), COUNT(DISTINCT value) FROM paths").fetchone()
+        print(f"📊 Path inventory: {get_inventory_db_path() if db_path is None else db_path}")
+        print(f"   Projects: {projects}")
+        print(f"   Files: {files} ({contents} distinct contents, {errors or 0} not valid JSON)")
+        print(f"   Path fields: {fields} ({values} distinct values)")
+        if last_scan:
+            print(f"   Last scan: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_scan))}")
+    finally:
+        connection.close()
+
+
+def _get_option_value(argv, flag, cast=str, default=None):
+    if flag not in argv:
+        return default
+    try:
+        return cast(argv[argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        print(f"❌ Error: {flag} requires a value")
+        sys.exit(1)
+
+
+def _positional_args(argv, valued_flags=("--workers", "--limit")):
+    args = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in valued_flags:
+            skip = True
+        elif not arg.startswith("--"):
+            args.append(arg)
+    return args
+
+
+if __name__ == "__main__":
+    commands = ("scan", "find", "test-rule", "test-rules", "stats", "prune")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: python path_inventory.py scan <project_or_dataset> [...] [--workers N] [--no-cache]")
+        print("       python path_inventory.py find <text> [--exact] [--limit N]")
+        print("       python path_inventory.py test-rule <old_path> [new_path] [--limit N]")
+        print("       python path_inventory.py test-rules <config_folder> [--limit N]")
+        print("       python path_inventory.py stats")
+        print("       python path_inventory.py prune")
+        print(f"Database: {get_inventory_db_path()} (override with JSON_TOOLS_INVENTORY_DB)")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    args = _positional_args(sys.argv[2:])
+    limit = _get_option_value(sys.argv, "--limit", int, DEFAULT_LIMIT)
+    if command == "stats":
+        print_stats()
+    elif command == "prune":
+        print(f"🧹 Dropped {prune()} missing file(s) from the index")
+    elif not args:
+        print(f"❌ Error: {command} requires an argument")
+        sys.exit(1)
+    elif command == "scan":
+        start_time = time.perf_counter()
+        stats = scan(args, workers=_get_option_value(sys.argv, "--workers", int, 1),
+                     use_cache="--no-cache" not in sys.argv)
+        print(f"✅ Indexed {stats['files']} file(s) in {time.perf_counter() - start_time:.2f}s: "
+              f"{stats['parsed']} parsed, {stats['reused']} with known content, {stats['unchanged']} unchanged"
+              f" ({stats['fields']} new path field(s))")
+        sys.exit(1 if stats['errors'] else 0)
+    elif command == "find":
+        connection = open_inventory_db()
+        rows = find_paths(connection, args[0], exact="--exact" in sys.argv)
+        connection.close()
+        print(f"🔍 {len(rows)} field(s) in {len({row[0] for row in rows})} project(s)")
+        print_rows(rows, limit)
+    elif command == "test-rule":
+        connection = open_inventory_db()
+        rows = test_ascii_rule(connection, args[0], args[1] if len(args) > 1 else None)
+        connection.close()
+        print(f"🔍 '{args[0]}' would change {len(rows)} field(s) in {len({row[0] for row in rows})} project(s)")
+        print_rows(rows, limit)
+        sys.exit(0 if rows else 1)
+    else:
+        try:
+            unmatched = test_rules(args[0], limit=limit)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read config {args[0]}: {e}")
+            sys.exit(1)
+        sys.exit(1 if unmatched else 0)
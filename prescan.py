@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Zero-Copy Pre-Scan
+Cheaply decides whether any rule can apply to a file by searching a
+memory-mapped byte view for each rule's literal anchor, before the file is
+decoded, backed up or parsed.
+"""
+
+import mmap
+import re
+
+_WORD_RE = re.compile(r'[A-Za-z0-9_]+')
+
+
+def _literal(text):
+    return ('literal', text.encode('utf-8'))
+
+
+def _text_rule_anchor(from_text):
+    """
+    Necessary substring for a dataset text rule.
+
+    Plain patterns only ever match exactly. Patterns with brackets may also be
+    matched with flexible whitespace (see flexible_string_replace), so only
+    their longest identifier-like word is guaranteed to appear verbatim.
+    """
+    if '[' in from_text and ']' in from_text:
+        words = _WORD_RE.findall(from_text)
+        return _literal(max(words, key=len)) if words else None
+    return _literal(from_text)
+
+
+def ascii_path_anchor(path):
+    """
+    Regex matching a path's ASCII codes as they appear in a JSON number array,
+    e.g. '/ho' -> 47, 104, 111 with any whitespace between the numbers.
+    """
+    codes = [str(ord(char)) for char in path]
+    pattern = r'(?<![0-9])' + r'\s*,\s*'.join(codes) + r'(?![0-9])'
+    return ('regex', re.compile(pattern.encode('ascii')))
+
+
+def esme_anchors(replacements):
+    """Anchors for ESME rules; no-op rules (from == to) cannot change anything"""
+    return [_literal(rule['from']) for rule in replacements
+            if rule.get('from') and rule.get('to') and isinstance(rule['from'], str)
+            and rule['from'] != rule['to']]
+
+
+def environment_anchors(updates):
+    """Anchors for ESME environment rules: a removal needs its variable, an upsert any environment list"""
+    anchors = []
+    for rule in updates:
+        if not rule.get('key'):
+            continue
+        anchors.append(_literal(f'"{rule["key"]}' if rule.get('remove') else '"environment"'))
+    return anchors
+
+
+def dataset_anchors(config_data):
+    """Anchors for dataset text rules and ASCII path rules"""
+    anchors = []
+    for rule in config_data.get('replacements', []):
+        from_patterns = rule.get('from')
+        to_text = rule.get('to')
+        if not from_patterns or not to_text:
+            continue
+        if not isinstance(from_patterns, list):
+            from_patterns = [from_patterns]
+        for from_text in from_patterns:
+            if from_text != to_text:
+                anchor = _text_rule_anchor(from_text)
+                if anchor:
+                    anchors.append(anchor)
+    for rule in config_data.get('ascii_path_replacements', {}).get('automatic_replacements', []):
+        old_path = rule.get('old_path')
+        if old_path and rule.get('new_path') and old_path != rule.get('new_path'):
+            anchors.append(ascii_path_anchor(old_path))
+    return anchors
+
+
+def steering_anchors(steering_rules):
+    """Anchors for steering wheel rules: the target camera keys"""
+    return [_literal('"' + rule['target_camera'] + '"') for rule in steering_rules
+            if rule.get('target_camera') and rule.get('new_values')]
+
+
+def file_may_match(file_path, anchors):
+    """
+    Return True if at least one anchor occurs in the file.
+
+    The file is searched through a read-only memory map, so nothing is copied
+    or decoded. A False result proves that no rule can apply.
+    """
+    if not anchors:
+        return False
+    with open(file_path, 'rb') as f:
+        try:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: nothing to map, nothing to match
+            return False
+        with view:
+            for kind, anchor in anchors:
+                if kind == 'literal':
+                    if view.find(anchor) != -1:
+                        return True
+                elif anchor.search(view):
+                    return True
+    return False
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Run Profiler
+Per-phase and per-rule wall-clock/CPU timing and byte counters for --profile,
+with a sorted table, a JSON report and an optional cProfile dump. With
+--mem-report, each phase also records its tracemalloc peak, retained memory
+and sampled peak RSS.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+RSS_SAMPLE_INTERVAL = 0.005
+
+MB = 1024 * 1024
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Peak resident set size of this process so far, in bytes"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _sample_rss(sampler):
+    while not sampler['stop'].wait(RSS_SAMPLE_INTERVAL):
+        rss = current_rss()
+        if rss is not None and rss > sampler['peak']:
+            sampler['peak'] = rss
+
+
+def new_profile(tool, memory=False):
+    """
+    Start a profile for one tool run.
+
+    Args:
+        tool (str): Tool name for the report.
+        memory (bool): Also trace allocations (tracemalloc) and sample RSS per
+            phase. Tracing slows Python code down, so timings are inflated.
+    """
+    profile = {
+        'tool': tool,
+        'started': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'memory': memory,
+        'phases': {},
+        'rules': {},
+        'bytes_read': 0,
+        'bytes_written': 0,
+        '_wall_start': time.perf_counter(),
+        '_cpu_start': time.process_time(),
+    }
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        sampler = {'peak': current_rss() or 0, 'stop': threading.Event()}
+        threading.Thread(target=_sample_rss, args=(sampler,), daemon=True).start()
+        profile['_rss'] = sampler
+        profile['_memory_stack'] = []
+    return profile
+
+
+def _enter_memory_phase(profile):
+    """Open a memory frame; the enclosing frame keeps the peaks seen so far"""
+    stack = profile['_memory_stack']
+    sampler = profile['_rss']
+    if stack:
+        stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        stack[-1]['rss_peak'] = max(stack[-1]['rss_peak'], sampler['peak'])
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    sampler['peak'] = current_rss() or 0
+    stack.append({'start': start, 'peak': start, 'rss_peak': sampler['peak']})
+
+
+def _exit_memory_phase(profile, entry):
+    stack = profile['_memory_stack']
+    sampler = profile['_rss']
+    current, peak = tracemalloc.get_traced_memory()
+    frame = stack.pop()
+    peak = max(peak, frame['peak'])
+    rss = max(sampler['peak'], frame['rss_peak'], current_rss() or 0)
+    entry['peak_alloc_bytes'] = max(entry.get('peak_alloc_bytes', 0), peak - frame['start'])
+    entry['retained_bytes'] = entry.get('retained_bytes', 0) + current - frame['start']
+    entry['peak_rss_bytes'] = max(entry.get('peak_rss_bytes', 0), rss)
+    if stack:
+        # The enclosing phase saw this phase's peaks as well
+        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        stack[-1]['rss_peak'] = max(stack[-1]['rss_peak'], rss)
+
+
+@contextmanager
+def profile_phase(profile, name, section='phases'):
+    """
+    Time a block as phase (or rule) `name`; repeated blocks accumulate.
+
+    Does nothing when `profile` is None, so callers can always use it.
+    """
+    if profile is None:
+        yield
+        return
+    if profile['memory']:
+        _enter_memory_phase(profile)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        entry = profile[section].setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+        entry['calls'] += 1
+        entry['wall_s'] += wall
+        entry['cpu_s'] += cpu
+        if profile['memory']:
+            _exit_memory_phase(profile, entry)
+
+
+def profile_rule(profile, name):
+    """Time one replacement rule (see profile_phase)"""
+    return profile_phase(profile, name, section='rules')
+
+
+def count_bytes(profile, read=0, written=0):
+    if profile is not None:
+        profile['bytes_read'] += read
+        profile['bytes_written'] += written
+
+
+def finish_profile(profile):
+    """Stop the run clock; returns the profile with 'total_wall_s' and 'total_cpu_s'"""
+    profile['total_wall_s'] = time.perf_counter() - profile['_wall_start']
+    profile['total_cpu_s'] = time.process_time() - profile['_cpu_start']
+    if profile['memory']:
+        profile['_rss']['stop'].set()
+        profile['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        profile['peak_rss_bytes'] = peak_rss()
+        tracemalloc.stop()
+        largest = largest_allocation(profile)
+        profile['largest_allocation'] = largest[1] if largest else None
+    return profile
+
+
+def largest_allocation(profile):
+    """(section, name, entry) of the phase or rule with the largest peak allocation, or None"""
+    entries = [(section, name, entry) for section in ('phases', 'rules')
+               for name, entry in profile[section].items() if 'peak_alloc_bytes' in entry]
+    return max(entries, key=lambda item: item[2]['peak_alloc_bytes']) if entries else None
+
+
+def print_memory_report(profile):
+    """Print peak/retained memory per phase and rule, largest allocation first"""
+    largest = largest_allocation(profile)
+    if not largest:
+        return
+    entries = sorted(((name, entry) for section in ('phases', 'rules') for name, entry in profile[section].items()
+                      if 'peak_alloc_bytes' in entry),
+                     key=lambda item: item[1]['peak_alloc_bytes'], reverse=True)
+    print(f"\n🧠 MEMORY (tracemalloc; timings above include tracing overhead)")
+    if profile.get('peak_rss_bytes'):
+        print(f"   Process peak RSS: {profile['peak_rss_bytes'] / MB:.1f} MB   "
+              f"Traced peak: {profile.get('traced_peak_bytes', 0) / MB:.1f} MB")
+    print(f"\n   {'Phase / rule':<52} {'peak MB':>9} {'retained MB':>12} {'RSS MB':>8}")
+    for name, entry in entries:
+        label = name if len(name) <= 52 else name[:49] + "..."
+        flag = " 🔺" if name == largest[1] else ""
+        print(f"   {label:<52} {entry['peak_alloc_bytes'] / MB:>9.2f} {entry['retained_bytes'] / MB:>12.2f} "
+              f"{entry['peak_rss_bytes'] / MB:>8.1f}{flag}")
+    print(f"\n🔺 Largest allocation: {largest[1]} ({largest[2]['peak_alloc_bytes'] / MB:.2f} MB above its start)")
+
+
+def print_profile(profile):
+    """Print phases and rules sorted by wall-clock time"""
+    total = profile.get('total_wall_s') or 1e-12
+    print(f"\n⏱️  PROFILE ({profile['tool']}): {profile['total_wall_s'] * 1000:.1f} ms wall, "
+          f"{profile['total_cpu_s'] * 1000:.1f} ms CPU")
+    print(f"   Read: {profile['bytes_read']:,} bytes   Written: {profile['bytes_written']:,} bytes")
+    for section, title in (('phases', "Phase"), ('rules', "Rule")):
+        entries = sorted(profile[section].items(), key=lambda item: item[1]['wall_s'], reverse=True)
+        if not entries:
+            continue
+        print(f"\n   {title:<52} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'% wall':>7}")
+        for name, entry in entries:
+            label = name if len(name) <= 52 else name[:49] + "..."
+            print(f"   {label:<52} {entry['calls']:>6} {entry['wall_s'] * 1000:>10.2f} "
+                  f"{entry['cpu_s'] * 1000:>10.2f} {entry['wall_s'] / total:>7.1%}")
+
+
+def save_profile(profile, path):
+    with open(path, 'w') as f:
+        json.dump({key: value for key, value in profile.items() if not key.startswith('_')}, f, indent=2)
+
+
+def _get_path_option(argv, flag):
+    if flag not in argv:
+        return None
+    index = argv.index(flag)
+    if index + 1 >= len(argv) or argv[index + 1].startswith("--"):
+        print(f"❌ Error: {flag} requires a file path")
+        sys.exit(1)
+    return argv[index + 1]
+
+
+def start_profiling(argv, tool):
+    """
+    Create a profile if --profile or --mem-report is on the command line.
+
+    --profile-output FILE sets the JSON report path (default:
+    profile_<tool>_<timestamp>.json); --pstats FILE also records a cProfile
+    dump of the whole run; --mem-report adds per-phase memory.
+
+    Returns:
+        dict or None: The profile, or None when profiling is off.
+    """
+    if "--profile" not in argv and "--mem-report" not in argv:
+        return None
+    profile = new_profile(tool, memory="--mem-report" in argv)
+    profile['_output'] = (_get_path_option(argv, "--profile-output")
+                          or f"profile_{tool}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    profile['_pstats'] = _get_path_option(argv, "--pstats")
+    if profile['_pstats']:
+        profile['_cprofile'] = cProfile.Profile()
+        profile['_cprofile'].enable()
+    return profile
+
+
+def stop_profiling(profile):
+    """Finish a profile from start_profiling(): print the table and save the reports"""
+    if profile is None:
+        return
+    if profile.get('_cprofile'):
+        profile['_cprofile'].disable()
+        profile['_cprofile'].dump_stats(profile['_pstats'])
+    finish_profile(profile)
+    print_profile(profile)
+    if profile['memory']:
+        print_memory_report(profile)
+    save_profile(profile, profile['_output'])
+    print(f"\n💾 Profile saved to: {os.path.abspath(profile['_output'])}")
+    if profile.get('_pstats'):
+        print(f"💾 cProfile stats saved to: {os.path.abspath(profile['_pstats'])} "
+              f"(view with: python -m pstats {profile['_pstats']})")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Project Manifest Discovery
+Locates the ESME manifest and dataset files inside an ISSP project checkout
+and caches the locations so repeated runs don't rescan deep trees.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+
+ESME_MANIFEST_NAME = "esme_manifest_issp_roudi.json"
+DATASET_NAME = "issp_dataset.json"
+
+# Locations used by the project layouts we know about. They are checked with a
+# single stat each before any directory scan.
+KNOWN_ESME_LOCATIONS = [
+    (ESME_MANIFEST_NAME,),
+    ("aos", "yaaac_codegen", "deploy", "carma_0_22", "issp_roudi", "esme", ESME_MANIFEST_NAME),
+]
+KNOWN_DATASET_LOCATIONS = [
+    ("aos", "dataset", DATASET_NAME),
+    (DATASET_NAME,),
+]
+
+# Directories that never contain project manifests
+PRUNED_DIR_NAMES = {"__pycache__", "node_modules", "site-packages"}
+PRUNED_DIR_PREFIXES = (".", "bazel-")
+
+DEFAULT_MAX_DEPTH = 12
+
+
+def get_cache_dir():
+    """Directory for json_tools caches (JSON_TOOLS_CACHE_DIR or XDG cache)"""
+    cache_dir = os.environ.get("JSON_TOOLS_CACHE_DIR")
+    if not cache_dir:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(base, "json_tools")
+    return cache_dir
+
+
+def _default_cache_path():
+    return os.path.join(get_cache_dir(), "discovery_cache.json")
+
+
+def _is_pruned(name):
+    return name in PRUNED_DIR_NAMES or name.startswith(PRUNED_DIR_PREFIXES)
+
+
+def _sibling_datasets(dataset_path):
+    """Other dataset JSON files stored next to issp_dataset.json"""
+    siblings = []
+    directory = os.path.dirname(dataset_path)
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (entry.name != DATASET_NAME and entry.name.endswith(".json")
+                        and "dataset" in entry.name and entry.is_file()):
+                    siblings.append(entry.path)
+    except OSError:
+        pass
+    return sorted(siblings)
+
+
+def scan_project(project_path, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Breadth-first scan for the project manifests using os.scandir.
+
+    Hidden directories, build output links and package folders are pruned, and
+    the scan stops as soon as both files were found, so shallow files win over
+    deeper copies.
+
+    Returns:
+        dict: {'esme': path or None, 'dataset': path or None}
+    """
+    found = {"esme": None, "dataset": None}
+    queue = deque([(project_path, 0)])
+    while queue and not (found["esme"] and found["dataset"]):
+        directory, depth = queue.popleft()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < max_depth and not _is_pruned(entry.name):
+                                subdirs.append(entry.path)
+                        elif entry.name == ESME_MANIFEST_NAME and not found["esme"]:
+                            found["esme"] = entry.path
+                        elif entry.name == DATASET_NAME and not found["dataset"]:
+                            found["dataset"] = entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        queue.extend((subdir, depth + 1) for subdir in sorted(subdirs))
+    return found
+
+
+def _directory_chain(project_path, file_path):
+    """All directories from the project root down to the file's directory"""
+    chain = [project_path]
+    relative = os.path.relpath(os.path.dirname(file_path), project_path)
+    if relative != os.curdir:
+        current = project_path
+        for part in relative.split(os.sep):
+            current = os.path.join(current, part)
+            chain.append(current)
+    return chain
+
+
+def _directory_mtimes(directories):
+    mtimes = {}
+    for directory in directories:
+        try:
+            mtimes[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+    return mtimes
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path, cache):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+
+def _cache_entry_is_valid(entry):
+    if not all(os.path.isfile(entry[key]) for key in ("esme", "dataset")):
+        return False
+    return _directory_mtimes(entry["dir_mtimes"]) == entry["dir_mtimes"]
+
+
+def discover_project_files(project_path, use_cache=True, cache_path=None, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Find the ESME manifest, the dataset file and its sibling datasets.
+
+    Known locations are probed first; anything not found there is located with
+    a pruned breadth-first scan. Results are cached per project and reused as
+    long as the modification times of the directories leading to the found
+    files are unchanged (adding, removing or renaming a file changes the mtime
+    of its directory). Results with a missing file are not cached.
+
+    Args:
+        project_path (str): Project checkout root.
+        use_cache (bool): Read and update the discovery cache.
+        cache_path (str, optional): Cache file (default: <cache dir>/discovery_cache.json).
+        max_depth (int): Maximum directory depth for the scan.
+
+    Returns:
+        dict: {'esme', 'dataset', 'dataset_siblings', 'cached'}; missing files are None.
+    """
+    project_path = os.path.abspath(project_path)
+    cache_path = cache_path or _default_cache_path()
+    cache = _load_cache(cache_path) if use_cache else {}
+
+    entry = cache.get(project_path)
+    if entry and _cache_entry_is_valid(entry):
+        return {"esme": entry["esme"], "dataset": entry["dataset"],
+                "dataset_siblings": entry.get("dataset_siblings", []), "cached": True}
+
+    found = {"esme": None, "dataset": None}
+    for key, locations in (("esme", KNOWN_ESME_LOCATIONS), ("dataset", KNOWN_DATASET_LOCATIONS)):
+        for parts in locations:
+            candidate = os.path.join(project_path, *parts)
+            if os.path.isfile(candidate):
+                found[key] = candidate
+                break
+    if not (found["esme"] and found["dataset"]):
+        scanned = scan_project(project_path, max_depth)
+        found = {key: found[key] or scanned[key] for key in found}
+
+    result = dict(found, dataset_siblings=_sibling_datasets(found["dataset"]) if found["dataset"] else [],
+                  cached=False)
+
+    if use_cache and found["esme"] and found["dataset"]:
+        directories = set(_directory_chain(project_path, found["esme"]))
+        directories.update(_directory_chain(project_path, found["dataset"]))
+        dir_mtimes = _directory_mtimes(sorted(directories))
+        if dir_mtimes is not None:
+            cache[project_path] = {"esme": found["esme"], "dataset": found["dataset"],
+                                   "dataset_siblings": result["dataset_siblings"],
+                                   "dir_mtimes": dir_mtimes}
+            _save_cache(cache_path, cache)
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python project_discovery.py <project_path> [<project_path> ...] [--no-cache]")
+        sys.exit(1)
+    use_cache = "--no-cache" not in sys.argv
+    for project in [arg for arg in sys.argv[1:] if not arg.startswith("--")]:
+        files = discover_project_files(project, use_cache=use_cache)
+        print(f"📁 {project}{' (cached)' if files['cached'] else ''}")
+        print(f"   ESME manifest: {files['esme'] or '❌ not found'}")
+        print(f"   Dataset:       {files['dataset'] or '❌ not found'}")
+        for sibling in files["dataset_siblings"]:
+            print(f"   Sibling:       {sibling}")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Regex/Template Rules
+One rule with named groups replaces a family of literal rules:
+
+    "regex_replacements": [
+        {
+            "description": "Move the OMS models to the workspace",
+            "pattern": "/home/iss/issp_oms_models/(?P<model>\\\\w+)\\\\.onnx",
+            "template": "/home/issp/workspace/issp_oms_models/{model}.onnx"
+        }
+    ]
+
+The section works in esme_replacements.json and issp_dataset_replacements.json.
+In a dataset the rules also apply to the decoded *_path ASCII arrays, where
+the model paths live; a changed path is encoded again at its array's length.
+All regex rules of a file are compiled into one alternation, so the file is
+scanned once however many rules there are. At each position the first rule
+(in file order) that matches wins, and replacement text is not scanned again.
+'{name}' in a template is the text of the rule's group 'name'; other braces
+are copied as they are.
+"""
+
+import re
+
+from ascii_codec import ascii_array_to_string, is_ascii_array, string_to_ascii_array
+from reporter import DEBUG, INFO, WARNING, flush_reporter, new_reporter, report
+
+REGEX_SECTION = "regex_replacements"
+
+# One token of a pattern: an escape, a character class, a named group
+# definition, reference or conditional, or any other character
+_PATTERN_TOKEN = re.compile(r'(\\[1-9])|\\.|\[\^?\]?(?:\\.|[^\]\\])*\]|\(\?P<(\w+)>|\(\?P=(\w+)\)|\(\?\((\w+)\)|.',
+                            re.DOTALL)
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def rule_description(rule):
+    return rule.get('description', f"Regex {rule.get('pattern')}")
+
+
+def _rename_groups(pattern, prefix):
+    """
+    Prefix the group names of a pattern: definitions (?P<name>...), references
+    (?P=name) and conditionals (?(name)...). Escapes and character classes
+    are left alone.
+
+    Raises:
+        ValueError: The pattern refers to a group by number.
+    """
+    def rename(match):
+        numbered, definition, reference, condition = match.groups()
+        if numbered or (condition and condition.isdigit()):
+            raise ValueError("numbered back-references cannot be combined with other rules; use (?P=name)")
+        if definition:
+            return f"(?P<{prefix}{definition}>"
+        if reference:
+            return f"(?P={prefix}{reference})"
+        if condition:
+            return f"(?({prefix}{condition})"
+        return match.group(0)
+    return _PATTERN_TOKEN.sub(rename, pattern)
+
+
+def _compile_rule(rule, index):
+    """
+    The alternative of rule `index` in the combined scanner.
+
+    Returns:
+        tuple: (alternative pattern, {group name: renamed group}).
+
+    Raises:
+        ValueError: The rule cannot be used; the message says why.
+    """
+    pattern, template = rule.get('pattern'), rule.get('template')
+    if not isinstance(pattern, str) or not pattern or not isinstance(template, str):
+        raise ValueError("needs a 'pattern' and a 'template'")
+    try:
+        compiled = re.compile(pattern.encode('utf-8'))
+    except re.error as e:
+        raise ValueError(f"invalid pattern ({e})") from None
+    if compiled.fullmatch(b""):
+        raise ValueError("pattern matches the empty string")
+    prefix = f"_r{index}_"
+    alternative = f"(?P<_r{index}>{_rename_groups(pattern, prefix)})"
+    try:
+        # Global flags such as (?i) only work at the start of a whole pattern
+        renamed = re.compile(alternative.encode('utf-8'))
+    except re.error as e:
+        raise ValueError(f"cannot be combined with other rules ({e})") from None
+    groups = {name: prefix + name for name in compiled.groupindex}
+    if any(group not in renamed.groupindex for group in groups.values()):
+        raise ValueError("cannot be combined with other rules (group names could not be renamed)")
+    return alternative, groups
+
+
+def _template_parts(template, groups):
+    """[(literal bytes, group name or None)] for a template"""
+    parts, position = [], 0
+    for match in _PLACEHOLDER.finditer(template):
+        if match.group(1) in groups:
+            parts.append((template[position:match.start()].encode('utf-8'), groups[match.group(1)]))
+            position = match.end()
+    parts.append((template[position:].encode('utf-8'), None))
+    return parts
+
+
+def compile_regex_rules(rules, reporter=None):
+    """
+    Compile the regex rules of one configuration into a single scanner.
+
+    The groups of every rule are renamed ('model' of rule 3 becomes
+    '_r3_model'), so rules may use the same group names.
+
+    Args:
+        rules (list): The 'regex_replacements' rules.
+        reporter (dict, optional): Reporter for invalid rules (default: console).
+
+    Returns:
+        dict: {'pattern' (compiled bytes regex or None without valid rules),
+        'templates' ({alternative group: (rule index, template parts)}),
+        'count' (number of rules)}.
+    """
+    reporter = reporter or new_reporter()
+    alternatives = []
+    templates = {}
+    for index, rule in enumerate(rules):
+        try:
+            alternative, groups = _compile_rule(rule, index)
+        except ValueError as e:
+            report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid regex rule: {description} ({error})",
+                   description=rule_description(rule), error=str(e))
+            continue
+        alternatives.append(alternative)
+        templates[f"_r{index}"] = (index, _template_parts(rule['template'], groups))
+    flush_reporter(reporter)
+    compiled = re.compile("|".join(alternatives).encode('utf-8')) if alternatives else None
+    return {'pattern': compiled, 'templates': templates, 'count': len(rules)}
+
+
+def regex_anchors(compiled):
+    """Pre-scan anchor for compiled regex rules: the combined scanner itself"""
+    return [('regex', compiled['pattern'])] if compiled['pattern'] is not None else []
+
+
+def regex_path_anchors(compiled):
+    """Dataset pre-scan anchors: the scanner for the text, any *_path key for the ASCII paths"""
+    if compiled['pattern'] is None:
+        return []
+    return regex_anchors(compiled) + [('literal', b'_path"')]
+
+
+def apply_regex_rules(data, compiled):
+    """
+    Apply compiled regex rules in one scan.
+
+    Args:
+        data (bytes): Content to modify.
+        compiled (dict): From compile_regex_rules().
+
+    Returns:
+        tuple: (new data, splices as (start, end, new bytes) in order, hits
+        per rule; None for invalid rules).
+    """
+    hits = [0 if f"_r{index}" in compiled['templates'] else None for index in range(compiled['count'])]
+    splices = []
+    if compiled['pattern'] is None:
+        return data, splices, hits
+    parts, position = [], 0
+    for match in compiled['pattern'].finditer(data):
+        index, template = compiled['templates'][match.lastgroup]
+        new_text = b"".join(literal + ((match.group(group) or b"") if group else b"") for literal, group in template)
+        hits[index] += 1
+        if new_text != match.group(0):
+            splices.append((match.start(), match.end(), new_text))
+            parts += [data[position:match.start()], new_text]
+            position = match.end()
+    parts.append(data[position:])
+    return b"".join(parts), splices, hits
+
+
+def _replace_paths(data, compiled, hits, counts, reporter):
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            if key.endswith('_path') and is_ascii_array(value):
+                current_path = ascii_array_to_string(value)
+                new_data, _, path_hits = apply_regex_rules(current_path.encode('utf-8'), compiled)
+                for index, count in enumerate(path_hits):
+                    if count:
+                        hits[index] += count
+                new_path = new_data.decode('utf-8')
+                if new_path != current_path:
+                    result[key] = string_to_ascii_array(new_path, len(value))
+                    counts['replacements'] += 1
+                    report(reporter, DEBUG, "regex_path_replaced", "   {key}: {old} → {new}",
+                           key=key, old=current_path, new=new_path)
+                else:
+                    result[key] = value
+            else:
+                result[key] = _replace_paths(value, compiled, hits, counts, reporter)
+        return result
+    if isinstance(data, list):
+        return [_replace_paths(item, compiled, hits, counts, reporter) for item in data]
+    return data
+
+
+def apply_regex_rules_to_paths(data, compiled, hits, stats=None, reporter=None):
+    """
+    Apply compiled regex rules to the decoded *_path ASCII arrays of a parsed dataset.
+
+    Args:
+        data: Parsed dataset or subtree.
+        compiled (dict): From compile_regex_rules().
+        hits (list): Hits per rule as returned by apply_regex_rules(); the
+            path matches are added to it.
+        stats (dict, optional): Receives 'replacements', the number of changed paths.
+        reporter (dict, optional): Reporter for per-path events (default: console).
+
+    Returns:
+        The new data; unchanged parts are shared with the input.
+    """
+    counts = {'replacements': 0}
+    result = data
+    if compiled['pattern'] is not None:
+        reporter = reporter or new_reporter()
+        result = _replace_paths(data, compiled, hits, counts, reporter)
+        flush_reporter(reporter)
+    if stats is not None:
+        stats['replacements'] = counts['replacements']
+    return result
+
+
+def report_regex_rules(rules, hits, mode, reporter=None):
+    """
+    Report per-rule hit counts.
+
+    Returns:
+        int: Number of rules that matched at least once.
+    """
+    reporter = reporter or new_reporter()
+    applied = 0
+    for rule, count in zip(rules, hits):
+        if count is None:
+            continue
+        description = rule_description(rule)
+        if count:
+            applied += 1
+            report(reporter, INFO, "rule_applied", "✅ Applied: {description} ({count} match(es))",
+                   mode=mode, description=description, pattern=rule.get('pattern'), count=count)
+        else:
+            report(reporter, INFO, "rule_not_found", "ℹ️  Not found: {description} (pattern: {pattern:.50})",
+                   mode=mode, description=description, pattern=rule.get('pattern'))
+    flush_reporter(reporter)
+    return applied
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Buffered Event Reporter
+Replaces per-rule print calls in the replacement loops. Events carry a level,
+an event name and fields; console lines are formatted only when their level is
+shown and are written in batches. --quiet shows warnings and errors only, and
+an optional JSON-lines sink records every event's fields for machines.
+"""
+
+import json
+import string
+import sys
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+# Above every level: nothing reaches the console (library use)
+SILENT = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+# Console lines / JSON records collected before they are written
+BUFFER_SIZE = 256
+
+
+class _Formatter(string.Formatter):
+    """str.format with one extra spec: '{field:60...}' shortens to 60 characters plus '...'"""
+
+    def format_field(self, value, format_spec):
+        if format_spec.endswith("...") and format_spec[:-3].isdigit():
+            limit = int(format_spec[:-3])
+            text = str(value)
+            return text[:limit] + ("..." if len(text) > limit else "")
+        return super().format_field(value, format_spec)
+
+
+_formatter = _Formatter()
+
+
+def new_reporter(level=INFO, jsonl_path=None, stream=None, capture=False):
+    """
+    Create a reporter.
+
+    Args:
+        level (int): Lowest level written to the console (WARNING for --quiet).
+        jsonl_path (str, optional): Append every event as one JSON object per line.
+        stream (file, optional): Console stream (default: sys.stdout at write time).
+        capture (bool): Keep events from `level` up in reporter['events']
+            instead of writing them (worker processes; see replay_events()).
+
+    Returns:
+        dict: The reporter state.
+    """
+    return {
+        'level': level,
+        'stream': stream,
+        'lines': [],
+        'records': [],
+        'sink': open(jsonl_path, 'a') if jsonl_path else None,
+        'events': [] if capture else None,
+    }
+
+
+def report(reporter, level, event, message, **fields):
+    """
+    Record one event.
+
+    `message` is a str.format template over `fields`; it is only formatted if
+    the console shows `level`. With neither the console nor a sink interested,
+    this is a single comparison.
+    """
+    show = level >= reporter['level']
+    if reporter['events'] is not None:
+        if show:
+            reporter['events'].append((level, event, message, fields))
+        return
+    if not show and reporter['sink'] is None:
+        return
+    if show:
+        reporter['lines'].append(_formatter.vformat(message, (), fields))
+    if reporter['sink'] is not None:
+        reporter['records'].append((time.time(), level, event, fields))
+    if level >= WARNING or len(reporter['lines']) + len(reporter['records']) >= BUFFER_SIZE:
+        flush_reporter(reporter)
+
+
+def flush_reporter(reporter):
+    """Write buffered console lines and JSON records; call before printing directly"""
+    if reporter['lines']:
+        stream = reporter['stream'] or sys.stdout
+        stream.write("\n".join(reporter['lines']) + "\n")
+        reporter['lines'] = []
+    if reporter['records']:
+        reporter['sink'].write("".join(
+            json.dumps(dict(time=round(timestamp, 6), level=LEVEL_NAMES[level], event=event, **fields), default=str) + "\n"
+            for timestamp, level, event, fields in reporter['records']))
+        reporter['records'] = []
+
+
+def capture_level(reporter):
+    """Lowest level a capturing reporter must keep for this reporter to see every event it shows or logs"""
+    return DEBUG if reporter['sink'] is not None else reporter['level']
+
+
+def replay_events(reporter, events):
+    """Report events captured by a capturing reporter, in order"""
+    for level, event, message, fields in events:
+        report(reporter, level, event, message, **fields)
+
+
+def close_reporter(reporter):
+    flush_reporter(reporter)
+    if reporter['sink'] is not None:
+        reporter['sink'].close()
+        reporter['sink'] = None
+
+
+def reporter_from_argv(argv):
+    """Reporter for --quiet (warnings and errors only) and --log-json FILE"""
+    jsonl_path = None
+    if "--log-json" in argv:
+        index = argv.index("--log-json")
+        if index + 1 >= len(argv) or argv[index + 1].startswith("--"):
+            print("❌ Error: --log-json requires a file path")
+            sys.exit(1)
+        jsonl_path = argv[index + 1]
+    return new_reporter(WARNING if "--quiet" in argv else INFO, jsonl_path)
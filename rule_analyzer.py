@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Static Rule-Set Analyzer
+Detects overlapping, cascading, conflicting and no-op replacement rules and
+decides whether a rule set can safely be applied in one non-cascading pass.
+"""
+
+import os
+import sys
+
+RULE_FILES = ["esme_replacements.json", "issp_dataset_replacements.json", "steering_wheel_replacements.json"]
+
+# Finding types that make the result depend on the order of sequential
+# replacements. A rule set without them gives the same output whether rules
+# run one after another or all at once in a single scan.
+ORDER_DEPENDENT_TYPES = {"CASCADE", "OVERLAP", "CONFLICT"}
+
+
+def _finding(finding_type, severity, rules, message):
+    return {
+        'type': finding_type,
+        'severity': severity,
+        'rules': rules,
+        'message': message,
+        'blocks_single_pass': finding_type in ORDER_DEPENDENT_TYPES,
+    }
+
+
+def _is_string_token_run(pattern):
+    """True if the pattern is one or more complete JSON string tokens ("..." ...)"""
+    if len(pattern) < 2 or pattern[0] != '"' or pattern[-1] != '"':
+        return False
+    quotes = 0
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            quotes += 1
+    return quotes % 2 == 0
+
+
+def _boundary_overlap(left, right, json_tokens=True):
+    """
+    Longest non-trivial overlap where a suffix of `left` is a prefix of `right`.
+
+    With `json_tokens`, a shared lone quote between two complete string-token
+    patterns is ignored: in JSON text a closing quote is never also the
+    opening quote of the next string, so such patterns cannot match
+    overlapping text. For a rule's output this only holds if the text it
+    replaced was complete string tokens too.
+    """
+    for size in range(min(len(left), len(right)) - 1, 0, -1):
+        if left.endswith(right[:size]):
+            overlap = right[:size]
+            if json_tokens and overlap == '"' and _is_string_token_run(left) and _is_string_token_run(right):
+                return ""
+            return overlap
+    return ""
+
+
+def _clip(text, length=50):
+    text = text.replace("\n", "\\n")
+    return text if len(text) <= length else text[:length - 3] + "..."
+
+
+def _injected_lines(from_text, to_text):
+    """Lines a rule adds to the text (present in `to` but not in `from`)"""
+    existing = {line.strip().rstrip(',') for line in from_text.split('\n')}
+    return [line.strip().rstrip(',') for line in to_text.split('\n')
+            if line.strip() and line.strip().rstrip(',') not in existing]
+
+
+def normalize_text_rules(replacements):
+    """
+    Flatten text replacement rules into (index, description, from, to) tuples.
+
+    Rules whose 'from' is a list contribute one entry per pattern; invalid
+    rules (missing 'from' or 'to') are returned separately.
+    """
+    rules = []
+    invalid = []
+    for index, replacement in enumerate(replacements, 1):
+        description = replacement.get('description', 'No description')
+        from_patterns = replacement.get('from')
+        to_text = replacement.get('to')
+        if not from_patterns or not to_text:
+            invalid.append((index, description))
+            continue
+        if not isinstance(from_patterns, list):
+            from_patterns = [from_patterns]
+        for from_text in from_patterns:
+            rules.append((index, description, from_text, to_text))
+    return rules, invalid
+
+
+def analyze_text_rules(replacements):
+    """
+    Analyze 'from'/'to' text replacement rules (ESME and dataset 'replacements').
+
+    Rules are applied in file order with str.replace, so:
+      - CASCADE: a later rule's 'from' appears in an earlier rule's 'to', or can
+        be formed from an earlier rule's output and the text around it (the
+        output occurs in the pattern or overlaps it at an edge).
+      - OVERLAP: two 'from' patterns contain each other or can match
+        overlapping text, so whichever runs first wins.
+      - CONFLICT: the same 'from' is mapped to different 'to' values.
+      - NO_OP: 'from' equals 'to'.
+      - DUPLICATE: the same rule is listed twice.
+      - NOT_IDEMPOTENT: a rule's 'from' reappears in the output of a rule, so
+        running the tool again applies it again (e.g. appends another entry).
+      - SHARED_INJECTION: several rules add the same line.
+      - INVALID: rule is missing 'from' or 'to' and is skipped.
+
+    Returns:
+        list: Finding dicts with 'type', 'severity', 'rules', 'message', 'blocks_single_pass'.
+    """
+    rules, invalid = normalize_text_rules(replacements)
+    findings = [_finding("INVALID", "WARNING", [index], f"Rule {index} ({description}) has no 'from' or 'to' and is skipped")
+                for index, description in invalid]
+
+    seen = {}
+    for index, description, from_text, to_text in rules:
+        if from_text == to_text:
+            findings.append(_finding("NO_OP", "WARNING", [index],
+                                     f"Rule {index} ({description}) replaces '{_clip(from_text)}' with itself"))
+        if from_text in seen:
+            other_index, other_to = seen[from_text]
+            if other_to == to_text:
+                if other_index != index:
+                    findings.append(_finding("DUPLICATE", "WARNING", [other_index, index],
+                                             f"Rules {other_index} and {index} are identical: '{_clip(from_text)}'"))
+            else:
+                findings.append(_finding("CONFLICT", "ERROR", [other_index, index],
+                                         f"Rules {other_index} and {index} map '{_clip(from_text)}' to different values"))
+        else:
+            seen[from_text] = (index, to_text)
+
+    for position, (index_a, _, from_a, to_a) in enumerate(rules):
+        for index_b, _, from_b, to_b in rules[position + 1:]:
+            if index_a == index_b:
+                continue
+            # Equal patterns are a CONFLICT or DUPLICATE; a duplicate can still cascade into itself
+            if from_a != from_b and (from_b in from_a or from_a in from_b):
+                inner, outer = (index_b, index_a) if from_b in from_a else (index_a, index_b)
+                findings.append(_finding("OVERLAP", "ERROR", [index_a, index_b],
+                                         f"Pattern of rule {inner} is contained in pattern of rule {outer}"))
+            elif from_a != from_b:
+                overlap = _boundary_overlap(from_a, from_b) or _boundary_overlap(from_b, from_a)
+                if overlap:
+                    findings.append(_finding("OVERLAP", "ERROR", [index_a, index_b],
+                                             f"Patterns of rules {index_a} and {index_b} can match overlapping text ('{_clip(overlap)}')"))
+            if from_b in to_a:
+                findings.append(_finding("CASCADE", "ERROR", [index_a, index_b],
+                                         f"Output of rule {index_a} contains the pattern of later rule {index_b}"))
+            elif to_a in from_b:
+                findings.append(_finding("CASCADE", "ERROR", [index_a, index_b],
+                                         f"Output of rule {index_a} can form the pattern of later rule {index_b} with the text around it"))
+            else:
+                json_tokens = _is_string_token_run(from_a)
+                overlap = _boundary_overlap(to_a, from_b, json_tokens) or _boundary_overlap(from_b, to_a, json_tokens)
+                if overlap:
+                    findings.append(_finding("CASCADE", "ERROR", [index_a, index_b],
+                                             f"Output of rule {index_a} can form the pattern of later rule {index_b} with adjacent text ('{_clip(overlap)}')"))
+
+    for index_a, description_a, from_a, to_a in rules:
+        for index_b, _, _, to_b in rules:
+            if index_b >= index_a and from_a != to_a and from_a in to_b:
+                if index_b == index_a:
+                    message = f"Rule {index_a} ({description_a}) keeps its own pattern in its output; every run applies it again"
+                else:
+                    message = f"Output of rule {index_b} contains the pattern of rule {index_a}; a second run applies rule {index_a} again"
+                findings.append(_finding("NOT_IDEMPOTENT", "WARNING", sorted({index_a, index_b}), message))
+
+    injected = {}
+    for index, _, from_text, to_text in rules:
+        for line in _injected_lines(from_text, to_text):
+            injected.setdefault(line, [])
+            if index not in injected[line]:
+                injected[line].append(index)
+    for line, indices in injected.items():
+        if len(indices) > 1:
+            findings.append(_finding("SHARED_INJECTION", "INFO", indices,
+                                     f"{len(indices)} rules add {_clip(line, 70)}"))
+    return findings
+
+
+def analyze_ascii_path_rules(path_rules):
+    """
+    Analyze ASCII path rules ('old_path'/'new_path'), applied in order as
+    substring replacements on every decoded *_path field.
+
+    Returns:
+        list: Finding dicts (see analyze_text_rules).
+    """
+    rules = [{'from': rule.get('old_path'), 'to': rule.get('new_path'),
+              'description': rule.get('description', 'No description')} for rule in path_rules]
+    findings = []
+    for finding in analyze_text_rules(rules):
+        if finding['type'] != "SHARED_INJECTION":
+            finding['message'] = "ASCII path: " + finding['message']
+            findings.append(finding)
+    return findings
+
+
+def analyze_steering_rules(steering_rules):
+    """
+    Analyze steering wheel rules: conflicting targets and no-op value changes.
+
+    Returns:
+        list: Finding dicts (see analyze_text_rules).
+    """
+    findings = []
+    targets = {}
+    for index, rule in enumerate(steering_rules, 1):
+        key = (rule.get('target_camera'), rule.get('field_name', 'steering_wheel'))
+        if not key[0] or not rule.get('new_values'):
+            findings.append(_finding("INVALID", "WARNING", [index], f"Steering rule {index} has no target_camera or new_values"))
+            continue
+        if rule.get('old_values') == rule.get('new_values'):
+            findings.append(_finding("NO_OP", "WARNING", [index], f"Steering rule {index} sets {key[1]} of {key[0]} to its old values"))
+        if key in targets and steering_rules[targets[key] - 1].get('new_values') != rule.get('new_values'):
+            findings.append(_finding("CONFLICT", "ERROR", [targets[key], index],
+                                     f"Steering rules {targets[key]} and {index} set {key[1]} of {key[0]} to different values"))
+        targets.setdefault(key, index)
+    return findings
+
+
+def analyze_config_data(config_data, file_name=None):
+    """Analyze every rule section of one loaded configuration file"""
+    if file_name == "steering_wheel_replacements.json":
+        # Legacy steering file: 'replacements' holds steering rules
+        return analyze_steering_rules(config_data.get('replacements', []))
+    findings = analyze_text_rules(config_data.get('replacements', []))
+    findings += analyze_ascii_path_rules(config_data.get('ascii_path_replacements', {}).get('automatic_replacements', []))
+    findings += analyze_steering_rules(config_data.get('steering_wheel_replacements', {}).get('replacements', []))
+    return findings
+
+
+def is_single_pass_safe(findings):
+    """True if no finding makes the result depend on rule order"""
+    return not any(finding['blocks_single_pass'] for finding in findings)
+
+
+def print_rule_findings(findings, show_info=False):
+    """Print analyzer findings, most severe first"""
+    icons = {"ERROR": "❌", "WARNING": "⚠️ ", "INFO": "ℹ️ "}
+    order = {"ERROR": 0, "WARNING": 1, "INFO": 2}
+    info_count = 0
+    for finding in sorted(findings, key=lambda f: (order[f['severity']], f['rules'])):
+        if finding['severity'] == "INFO" and not show_info:
+            info_count += 1
+            continue
+        print(f"   {icons[finding['severity']]} {finding['type']}: {finding['message']}")
+    if info_count:
+        print(f"   ℹ️  {info_count} informational finding(s) (run rule_analyzer.py for details)")
+
+
+def analyze_config_folder(folder, show_info=True):
+    """
+    Analyze all rule files in a configuration folder and print a report.
+
+    Returns:
+        bool: True if no ERROR findings were found.
+    """
+    # Imported here: config_layers takes RULE_FILES from this module
+    from config_layers import LAYERS_FILE, describe_layers, resolve_config
+
+    ok = True
+    print(f"\n📁 {folder}")
+    try:
+        resolved = resolve_config(folder)
+    except (OSError, ValueError) as e:
+        print(f"❌ {LAYERS_FILE}: cannot resolve layers ({e})")
+        return False
+    if describe_layers(folder):
+        print(f"📚 Layers: {describe_layers(folder)} (rules analyzed after merging)")
+    for file_name in RULE_FILES:
+        config_data = resolved['files'].get(file_name)
+        if config_data is None:
+            continue
+        findings = analyze_config_data(config_data, file_name)
+        single_pass = "✅ single-pass safe" if is_single_pass_safe(findings) else "❌ order-dependent"
+        print(f"📋 {file_name}: {len(findings)} finding(s), {single_pass}")
+        print_rule_findings(findings, show_info=show_info)
+        ok = ok and not any(finding['severity'] == "ERROR" for finding in findings)
+    return ok
+
+
+def find_config_folders(root):
+    """Sub-folders of `root` that contain at least one rule file or a layer declaration"""
+    from config_layers import LAYERS_FILE
+
+    folders = []
+    for entry in sorted(os.scandir(root), key=lambda e: e.name):
+        if entry.is_dir() and any(os.path.exists(os.path.join(entry.path, name)) for name in RULE_FILES + [LAYERS_FILE]):
+            folders.append(entry.path)
+    return folders
+
+
+if __name__ == "__main__":
+    if "--help" in sys.argv:
+        print("Usage: python rule_analyzer.py [config_folder ...]")
+        print("Without arguments every configuration folder next to this script is analyzed.")
+        sys.exit(0)
+    folders = sys.argv[1:] or find_config_folders(os.path.dirname(os.path.abspath(__file__)))
+    results = [analyze_config_folder(folder) for folder in folders]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Run Metrics Store
+Appends structured metrics of every run (timings, bytes, per-rule hits, files
+skipped or changed) to a local SQLite database, with report, dead-rule and
+query commands and an export in Prometheus textfile format.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+from undo_journal import get_store_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    started REAL NOT NULL,
+    project TEXT,
+    config TEXT,
+    modes TEXT,
+    wall_s REAL,
+    cpu_s REAL,
+    bytes_read INTEGER,
+    bytes_written INTEGER,
+    files_changed INTEGER,
+    files_skipped INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    file TEXT NOT NULL,
+    status TEXT NOT NULL,
+    bytes_before INTEGER,
+    bytes_after INTEGER
+);
+CREATE TABLE IF NOT EXISTS rules (
+    run_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    config TEXT,
+    rule TEXT NOT NULL,
+    hits INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phases (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    calls INTEGER,
+    wall_s REAL,
+    cpu_s REAL
+);
+CREATE INDEX IF NOT EXISTS rules_by_rule ON rules (config, mode, rule);
+CREATE INDEX IF NOT EXISTS runs_by_started ON runs (started);
+"""
+
+# File statuses that count as changed in the run summary
+CHANGED_STATUSES = ("changed", "replayed")
+
+DEFAULT_DEAD_RULE_MIN_RUNS = 5
+
+
+def get_metrics_db_path():
+    """SQLite file for run metrics (JSON_TOOLS_METRICS_DB or <data dir>/metrics.sqlite3)"""
+    return os.environ.get("JSON_TOOLS_METRICS_DB") or os.path.join(get_store_dir(), "metrics.sqlite3")
+
+
+def open_metrics_db(db_path=None):
+    db_path = db_path or get_metrics_db_path()
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# === Collecting ===
+
+def new_run_metrics(run_id, tool, project=None, config=None):
+    """Start collecting metrics for one run"""
+    return {
+        'run_id': run_id,
+        'tool': tool,
+        'started': time.time(),
+        'project': os.path.abspath(project) if project else None,
+        'config': os.path.basename(os.path.normpath(config)) if config else None,
+        'modes': [],
+        'files': [],
+        'rules': [],
+        'bytes_read': 0,
+        'bytes_written': 0,
+        '_wall_start': time.perf_counter(),
+        '_cpu_start': time.process_time(),
+    }
+
+
+def record_rule(metrics, mode, rule, hits):
+    """Record how often a rule hit in this run; does nothing when metrics is None"""
+    if metrics is not None:
+        metrics['rules'].append((mode, rule, int(hits)))
+
+
+def record_file(metrics, mode, file_path, status, bytes_before=None, bytes_after=None):
+    """
+    Record what a mode did to a file: 'changed', 'unchanged', 'skipped',
+    'replayed' (patch plan) or 'error'. Does nothing when metrics is None.
+    """
+    if metrics is None:
+        return
+    if mode not in metrics['modes']:
+        metrics['modes'].append(mode)
+    metrics['files'].append((mode, os.path.abspath(file_path), status, bytes_before, bytes_after))
+    metrics['bytes_read'] += bytes_before or 0
+    if status in CHANGED_STATUSES:
+        metrics['bytes_written'] += bytes_after or 0
+
+
+def save_run_metrics(metrics, profile=None, db_path=None):
+    """
+    Append a run to the metrics store.
+
+    Timings come from `profile` when the run was profiled (per phase as
+    well), otherwise the run's total wall-clock and CPU time are stored.
+    Runs that touched no file are not stored; store errors are reported,
+    not raised.
+    """
+    if metrics is None or not metrics['files']:
+        return
+    wall_s = time.perf_counter() - metrics['_wall_start']
+    cpu_s = time.process_time() - metrics['_cpu_start']
+    bytes_read, bytes_written = metrics['bytes_read'], metrics['bytes_written']
+    if profile is not None and 'total_wall_s' in profile:
+        wall_s, cpu_s = profile['total_wall_s'], profile['total_cpu_s']
+        bytes_read, bytes_written = profile['bytes_read'], profile['bytes_written']
+    files_changed = sum(1 for entry in metrics['files'] if entry[2] in CHANGED_STATUSES)
+    files_skipped = sum(1 for entry in metrics['files'] if entry[2] == "skipped")
+
+    try:
+        connection = open_metrics_db(db_path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Could not record run metrics: {e}")
+        return
+    try:
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (metrics['run_id'], metrics['tool'], metrics['started'], metrics['project'],
+                                metrics['config'], ",".join(metrics['modes']), wall_s, cpu_s,
+                                bytes_read, bytes_written, files_changed, files_skipped))
+            connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(metrics['run_id'],) + entry for entry in metrics['files']])
+            connection.executemany("INSERT INTO rules VALUES (?, ?, ?, ?, ?)",
+                                   [(metrics['run_id'], mode, metrics['config'], rule, hits)
+                                    for mode, rule, hits in metrics['rules']])
+            if profile is not None:
+                connection.executemany("INSERT INTO phases VALUES (?, ?, ?, ?, ?)",
+                                       [(metrics['run_id'], name, entry['calls'], entry['wall_s'], entry['cpu_s'])
+                                        for name, entry in profile.get('phases', {}).items()])
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not record run metrics: {e}")
+    finally:
+        connection.close()
+
+
+# === Reporting ===
+
+def dead_rules(connection, min_runs=DEFAULT_DEAD_RULE_MIN_RUNS):
+    """Rules evaluated in at least `min_runs` runs without ever hitting: [(config, mode, rule, runs)]"""
+    return connection.execute(
+        "SELECT config, mode, rule, COUNT(DISTINCT run_id) AS runs FROM rules "
+        "GROUP BY config, mode, rule HAVING SUM(hits) = 0 AND runs >= ? ORDER BY config, mode, rule",
+        (min_runs,)).fetchall()
+
+
+def print_report(db_path=None, days=30, min_runs=DEFAULT_DEAD_RULE_MIN_RUNS):
+    """Print run counts, throughput per day, rule hit rates and dead rules"""
+    connection = open_metrics_db(db_path)
+    since = time.time() - days * 86400
+    try:
+        total = connection.execute("SELECT COUNT(*) FROM runs WHERE started >= ?", (since,)).fetchone()[0]
+        print(f"📊 RUN METRICS (last {days} days): {total} run(s)")
+        if not total:
+            return
+
+        print(f"\n   {'Day':<12} {'runs':>5} {'avg s':>8} {'MB read':>9} {'MB/s':>7} {'changed':>8} {'skipped':>8}")
+        for day, runs, avg_wall, total_wall, read, changed, skipped in connection.execute(
+                "SELECT date(started, 'unixepoch', 'localtime') AS day, COUNT(*), AVG(wall_s), SUM(wall_s), "
+                "SUM(bytes_read), SUM(files_changed), SUM(files_skipped) FROM runs WHERE started >= ? "
+                "GROUP BY day ORDER BY day", (since,)):
+            throughput = (read or 0) / 1e6 / total_wall if total_wall else 0.0
+            print(f"   {day:<12} {runs:>5} {avg_wall:>8.3f} {(read or 0) / 1e6:>9.2f} {throughput:>7.2f} "
+                  f"{changed or 0:>8} {skipped or 0:>8}")
+
+        print(f"\n   {'Config':<10} {'Mode':<9} {'Rule':<50} {'runs':>5} {'hit runs':>9} {'hits':>7}")
+        for config, mode, rule, runs, hit_runs, hits in connection.execute(
+                "SELECT rules.config, rules.mode, rules.rule, COUNT(DISTINCT rules.run_id), "
+                "COUNT(DISTINCT CASE WHEN hits > 0 THEN rules.run_id END), SUM(hits) "
+                "FROM rules JOIN runs ON runs.run_id = rules.run_id WHERE runs.started >= ? "
+                "GROUP BY rules.config, rules.mode, rules.rule ORDER BY rules.config, rules.mode, SUM(hits) DESC",
+                (since,)):
+            label = rule if len(rule) <= 50 else rule[:47] + "..."
+            print(f"   {config or '-':<10} {mode:<9} {label:<50} {runs:>5} {hit_runs:>9} {hits:>7}")
+
+        dead = dead_rules(connection, min_runs)
+        if dead:
+            print(f"\n💀 Dead rules (no hit in {min_runs}+ runs):")
+            for config, mode, rule, runs in dead:
+                print(f"   {config or '-'} / {mode}: {rule} ({runs} runs)")
+        else:
+            print(f"\n✅ No dead rules (rules evaluated in {min_runs}+ runs all hit at least once)")
+    finally:
+        connection.close()
+
+
+def run_query(sql, db_path=None):
+    """Run a read-only SQL query against the metrics store and print the rows"""
+    connection = open_metrics_db(db_path)
+    try:
+        connection.execute("PRAGMA query_only = ON")
+        cursor = connection.execute(sql)
+        columns = [column[0] for column in cursor.description or []]
+        if columns:
+            print("\t".join(columns))
+        for row in cursor:
+            print("\t".join("" if value is None else str(value) for value in row))
+    finally:
+        connection.close()
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def export_prometheus(output_path, db_path=None):
+    """
+    Write the metrics in Prometheus textfile format (for node_exporter's
+    textfile collector). The file is replaced atomically.
+    """
+    connection = open_metrics_db(db_path)
+    lines = []
+    try:
+        def metric(name, metric_type, help_text, rows):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in rows:
+                lines.append(f"{name}{_labels(**labels)} {value}")
+
+        run_rows = connection.execute(
+            "SELECT tool, COALESCE(config, ''), COUNT(*), SUM(wall_s), SUM(bytes_read), SUM(bytes_written), "
+            "SUM(files_changed), SUM(files_skipped), MAX(started) FROM runs GROUP BY tool, config").fetchall()
+        metric("json_tools_runs_total", "counter", "Recorded runs.",
+               [({'tool': tool, 'config': config}, runs) for tool, config, runs, *_ in run_rows])
+        metric("json_tools_run_duration_seconds_total", "counter", "Total wall-clock time of recorded runs.",
+               [({'tool': row[0], 'config': row[1]}, row[3] or 0) for row in run_rows])
+        metric("json_tools_bytes_read_total", "counter", "Bytes read by recorded runs.",
+               [({'tool': row[0], 'config': row[1]}, row[4] or 0) for row in run_rows])
+        metric("json_tools_bytes_written_total", "counter", "Bytes written by recorded runs.",
+               [({'tool': row[0], 'config': row[1]}, row[5] or 0) for row in run_rows])
+        metric("json_tools_files_changed_total", "counter", "Files changed by recorded runs.",
+               [({'tool': row[0], 'config': row[1]}, row[6] or 0) for row in run_rows])
+        metric("json_tools_files_skipped_total", "counter", "Files skipped by the pre-scan.",
+               [({'tool': row[0], 'config': row[1]}, row[7] or 0) for row in run_rows])
+        metric("json_tools_last_run_timestamp_seconds", "gauge", "Start time of the latest run.",
+               [({'tool': row[0], 'config': row[1]}, row[8]) for row in run_rows])
+
+        last_rows = connection.execute(
+            "SELECT tool, COALESCE(config, ''), wall_s FROM runs AS r WHERE started = "
+            "(SELECT MAX(started) FROM runs WHERE tool = r.tool AND COALESCE(config, '') = COALESCE(r.config, ''))"
+        ).fetchall()
+        metric("json_tools_last_run_duration_seconds", "gauge", "Wall-clock time of the latest run.",
+               [({'tool': tool, 'config': config}, wall_s or 0) for tool, config, wall_s in last_rows])
+
+        metric("json_tools_rule_hits_total", "counter", "Replacements made per rule.",
+               [({'config': config, 'mode': mode, 'rule': rule}, hits) for config, mode, rule, hits in
+                connection.execute("SELECT COALESCE(config, ''), mode, rule, SUM(hits) FROM rules "
+                                   "GROUP BY config, mode, rule")])
+        metric("json_tools_rule_evaluations_total", "counter", "Runs in which a rule was evaluated.",
+               [({'config': config, 'mode': mode, 'rule': rule}, runs) for config, mode, rule, runs in
+                connection.execute("SELECT COALESCE(config, ''), mode, rule, COUNT(DISTINCT run_id) FROM rules "
+                                   "GROUP BY config, mode, rule")])
+        metric("json_tools_phase_seconds_total", "counter", "Wall-clock time per profiled phase.",
+               [({'phase': name}, wall_s) for name, wall_s in
+                connection.execute("SELECT name, SUM(wall_s) FROM phases GROUP BY name")])
+    finally:
+        connection.close()
+
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, output_path)
+    return len(lines)
+
+
+def _get_option_value(argv, flag, cast=str, default=None):
+    if flag not in argv:
+        return default
+    try:
+        return cast(argv[argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        print(f"❌ Error: {flag} requires a value")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    commands = ("report", "dead-rules", "query", "export")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: python run_metrics.py report [--days N] [--min-runs N]")
+        print("       python run_metrics.py dead-rules [--min-runs N]")
+        print("       python run_metrics.py query \"SELECT ... FROM runs|files|rules|phases\"")
+        print("       python run_metrics.py export <file.prom>")
+        print(f"Database: {get_metrics_db_path()} (override with JSON_TOOLS_METRICS_DB)")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    min_runs = _get_option_value(sys.argv, "--min-runs", int, DEFAULT_DEAD_RULE_MIN_RUNS)
+    if command == "report":
+        print_report(days=_get_option_value(sys.argv, "--days", int, 30), min_runs=min_runs)
+    elif command == "dead-rules":
+        connection = open_metrics_db()
+        dead = dead_rules(connection, min_runs)
+        connection.close()
+        for config, mode, rule, runs in dead:
+            print(f"{config or '-'}\t{mode}\t{rule}\t{runs}")
+        sys.exit(1 if dead else 0)
+    elif len(sys.argv) < 3:
+        print(f"❌ Error: {command} requires an argument")
+        sys.exit(1)
+    elif command == "query":
+        try:
+            run_query(sys.argv[2])
+        except sqlite3.Error as e:
+            print(f"❌ Query failed: {e}")
+            sys.exit(1)
+    else:
+        count = export_prometheus(sys.argv[2])
+        print(f"✅ Wrote {count} lines to {sys.argv[2]}")
@@ -1,154 +1,368 @@
 # === ASCII path replacement helpers from set_settings_v1.py ===
-def string_to_ascii_array(text, target_length=256):
-    ascii_codes = [ord(char) for char in text]
-    ascii_codes.extend([0] * (target_length - len(ascii_codes)))
-    return ascii_codes[:target_length]
-
-def ascii_array_to_string(ascii_array):
-    end_index = ascii_array.index(0) if 0 in ascii_array else len(ascii_array)
-    return ''.join(chr(code) for code in ascii_array[:end_index])
-
-def replace_path_in_ascii_arrays(data, old_path, new_path):
-    replacements_made = 0
-    def _replace_recursive(data):
-        nonlocal replacements_made
-        if isinstance(data, dict):
-            result = {}
-            for key, value in data.items():
-                if key.endswith('_path') and isinstance(value, list):
-                    current_path = ascii_array_to_string(value)
-                    if current_path == new_path:
-                        result[key] = value
-                    elif current_path == old_path:
-                        result[key] = string_to_ascii_array(new_path, len(value))
-                        replacements_made += 1
-                    elif old_path in current_path:
-                        new_full_path = current_path.replace(old_path, new_path)
-                        result[key] = string_to_ascii_array(new_full_path, len(value))
-                        replacements_made += 1
-                    else:
-                        result[key] = value
+def _replace_ascii_paths(data, old_path, new_path, counts, reporter):
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            if key.endswith('_path') and isinstance(value, list):
+                current_path = ascii_array_to_string(value)
+                if current_path == new_path:
+                    result[key] = value
+                elif current_path == old_path:
+                    result[key] = string_to_ascii_array(new_path, len(value))
+                    counts['replacements'] += 1
+                    report(reporter, DEBUG, "ascii_path_replaced", "   {key}: {old} → {new}",
+                           key=key, old=current_path, new=new_path)
+                elif old_path in current_path:
+                    new_full_path = current_path.replace(old_path, new_path)
+                    result[key] = string_to_ascii_array(new_full_path, len(value))
+                    counts['replacements'] += 1
+                    report(reporter, DEBUG, "ascii_path_replaced", "   {key}: {old} → {new}",
+                           key=key, old=current_path, new=new_full_path)
                 else:
-                    result[key] = _replace_recursive(value)
-            return result
-        elif isinstance(data, list):
-            return [_replace_recursive(item) for item in data]
-        else:
-            return data
-    result = _replace_recursive(data)
-    if replacements_made > 0:
-        print(f"✅ Successfully updated {replacements_made} ASCII path(s) from '{old_path}' to '{new_path}'")
+                    result[key] = value
+            else:
+                result[key] = _replace_ascii_paths(value, old_path, new_path, counts, reporter)
+        return result
+    elif isinstance(data, list):
+        return [_replace_ascii_paths(item, old_path, new_path, counts, reporter) for item in data]
     else:
-        print(f"ℹ️  No instances of '{old_path}' found to replace as ASCII path")
+        return data
+
+def replace_path_in_ascii_arrays(data, old_path, new_path, stats=None, reporter=None):
+    reporter = reporter or new_reporter()
+    counts = {'replacements': 0}
+    result = _replace_ascii_paths(data, old_path, new_path, counts, reporter)
+    _report_ascii_rule(reporter, counts['replacements'], old_path, new_path)
+    if stats is not None:
+        stats['replacements'] = counts['replacements']
     return result
-def apply_dataset_replacements(dataset_path, config_path=None):
+
+def _report_ascii_rule(reporter, replacements_made, old_path, new_path):
+    if replacements_made > 0:
+        report(reporter, INFO, "ascii_path_rule_applied",
+               "✅ Successfully updated {count} ASCII path(s) from '{old_path}' to '{new_path}'",
+               count=replacements_made, old_path=old_path, new_path=new_path)
+    else:
+        report(reporter, INFO, "ascii_path_rule_not_found", "ℹ️  No instances of '{old_path}' found to replace as ASCII path",
+               old_path=old_path)
+    flush_reporter(reporter)
+
+def _ascii_paths_subtree(data, path, rules, level):
+    """
+    --parallel worker: all ASCII path rules, then the regex rules, on one
+    subtree; (hits, captured events) per ASCII rule, and the regex rules'
+    hits, changed paths and events.
+    """
+    ascii_rules, regex_rules = rules
+    results = []
+    for old_path, new_path in ascii_rules:
+        rule_reporter = new_reporter(level, capture=True)
+        counts = {'replacements': 0}
+        data = _replace_ascii_paths(data, old_path, new_path, counts, rule_reporter)
+        results.append((counts['replacements'], rule_reporter['events']))
+    regex_reporter = new_reporter(level, capture=True)
+    regex_hits = [0] * regex_rules['count']
+    stats = {}
+    data = apply_regex_rules_to_paths(data, regex_rules, regex_hits, stats, regex_reporter)
+    return data, {'ascii': results, 'regex_hits': regex_hits, 'regex_paths': stats['replacements'],
+                  'regex_events': regex_reporter['events']}
+
+def _apply_ascii_rules_parallel(dataset_content, ascii_paths, options, reporter, regex_rules, regex_hits):
+    """
+    --parallel: apply the ASCII path rules and the regex rules' path pass to
+    the dataset's subtrees in worker processes. Events and hit counts are
+    reported per rule, as in the sequential loop; regex hits are added to
+    `regex_hits`. Returns (new content, hits per ASCII rule, changed regex
+    paths), or None if the dataset is too small or cannot be split.
+    """
+    rules = [(rule.get('old_path'), rule.get('new_path')) for rule in ascii_paths
+             if rule.get('old_path') and rule.get('new_path')]
+    parallel_result = transform_subtrees(dataset_content, _ascii_paths_subtree, (rules, regex_rules),
+                                         capture_level(reporter), options.get('workers'))
+    if parallel_result is None:
+        return None
+    dataset_content, subtree_results = parallel_result
+    if ascii_paths:
+        report(reporter, INFO, "stage", "\n🔄 Applying {count} ASCII path replacements (robust)...",
+               count=len(ascii_paths))
+    report(reporter, INFO, "stage", "⚡ Transformed {count} dataset subtrees in parallel", count=len(subtree_results))
+    rule_index = 0
+    ascii_hits = []
+    for path_rule in ascii_paths:
+        old_path = path_rule.get('old_path')
+        new_path = path_rule.get('new_path')
+        description = path_rule.get('description', 'No description')
+        if not old_path or not new_path:
+            report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid ASCII path rule: {description}",
+                   description=description)
+            continue
+        replacements_made = 0
+        for results in subtree_results:
+            hits, events = results['ascii'][rule_index]
+            replacements_made += hits
+            replay_events(reporter, events)
+        _report_ascii_rule(reporter, replacements_made, old_path, new_path)
+        ascii_hits.append(rule_hits(f"ascii path: {description}", replacements_made))
+        rule_index += 1
+    regex_paths = 0
+    for results in subtree_results:
+        for index, count in enumerate(results['regex_hits']):
+            if count:
+                regex_hits[index] += count
+        regex_paths += results['regex_paths']
+        replay_events(reporter, results['regex_events'])
+    flush_reporter(reporter)
+    return dataset_content, ascii_hits, regex_paths
+
+def _transform_ascii_paths(dataset_content, dataset_rules, regex_hits, options, reporter):
+    """
+    The ASCII path rules, then the regex rules, on the decoded *_path arrays
+    of the dataset; regex hits are added to `regex_hits`.
+
+    Returns:
+        tuple: (new content, hits per ASCII path rule)
+    """
+    profile = options.get('profile')
+    ascii_paths = dataset_rules['ascii_rules']
+    regex_rules = dataset_rules['compiled_regex']
+    regex_on_paths = regex_rules['pattern'] is not None
+    parallel_result = None
+    if options.get('parallel'):
+        with profile_phase(profile, "dataset: parallel subtrees"):
+            parallel_result = _apply_ascii_rules_parallel(dataset_content, ascii_paths, options, reporter,
+                                                          regex_rules, regex_hits)
+    if parallel_result is not None:
+        dataset_content, ascii_hits, regex_paths = parallel_result
+    else:
+        with profile_phase(profile, "dataset: json.loads"):
+            dataset_json = json_backend.loads(dataset_content)
+        if ascii_paths:
+            report(reporter, INFO, "stage", "\n🔄 Applying {count} ASCII path replacements (robust)...",
+                   count=len(ascii_paths))
+        ascii_hits = []
+        for path_rule in ascii_paths:
+            old_path = path_rule.get('old_path')
+            new_path = path_rule.get('new_path')
+            description = path_rule.get('description', 'No description')
+            if not old_path or not new_path:
+                report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid ASCII path rule: {description}",
+                       description=description)
+                continue
+            stats = {}
+            with profile_rule(profile, f"ascii path: {description}"):
+                dataset_json = replace_path_in_ascii_arrays(dataset_json, old_path, new_path, stats, reporter)
+            ascii_hits.append(rule_hits(f"ascii path: {description}", stats['replacements']))
+        regex_stats = {'replacements': 0}
+        if regex_on_paths:
+            with profile_phase(profile, "dataset: regex rules on paths"):
+                dataset_json = apply_regex_rules_to_paths(dataset_json, regex_rules, regex_hits, regex_stats, reporter)
+        regex_paths = regex_stats['replacements']
+        # Without ASCII path rules the text is only rewritten if a path changed
+        if ascii_paths or regex_paths:
+            with profile_phase(profile, "dataset: json.dumps"):
+                dataset_content = json_backend.dumps(dataset_json, indent=2)
+    if regex_on_paths:
+        report(reporter, INFO, "stage", "🔄 Regex rules changed {count} ASCII path(s)", count=regex_paths)
+    flush_reporter(reporter)
+    return dataset_content, ascii_hits
+
+def compile_dataset_rules(config_data, reporter=None):
+    """
+    Compile the rules of an issp_dataset_replacements.json.
+
+    Returns:
+        dict: 'text_rules', 'regex_rules' and 'ascii_rules' (the rule
+        sections) and 'compiled_regex' (compile_regex_rules()).
+    """
+    regex_replacements = config_data.get(REGEX_SECTION, [])
+    return {
+        'text_rules': config_data.get('replacements', []),
+        'regex_rules': regex_replacements,
+        'compiled_regex': compile_regex_rules(regex_replacements, reporter),
+        'ascii_rules': config_data.get('ascii_path_replacements', {}).get('automatic_replacements', []),
+    }
+
+def transform_dataset_content(dataset_content, dataset_rules, options=None, reporter=None, stats=None):
+    """
+    Apply compiled dataset rules to dataset text: the generic replacements,
+    the regex rules, then the ASCII path rules and the regex rules on the
+    decoded *_path arrays.
+
+    A rule that runs out of its time budget and a failed ASCII path step are
+    reported and skipped; the run is marked incomplete (see apply_with_plan).
+
+    Args:
+        dataset_content (str): Dataset text.
+        dataset_rules (dict): From compile_dataset_rules().
+        options (dict, optional): Run options ('rule_budget', 'parallel', 'workers', 'profile').
+        reporter (dict, optional): Reporter for per-rule events (default: console).
+        stats (dict, optional): Receives 'timed_out' (aborted rules) and
+            'updates' (generic patterns and regex rules that hit).
+
+    Returns:
+        tuple: (new content, [{'description', 'hits'}] in rule order, error messages)
+    """
+    options = options or {}
+    profile = options.get('profile')
+    reporter = reporter or new_reporter()
+    rules, errors = [], []
+    timed_out = 0
+
+    # Apply string/regex replacements
+    replacements = dataset_rules['text_rules']
+    if replacements:
+        report(reporter, INFO, "stage", "\n🔄 Applying {count} generic replacements...", count=len(replacements))
+        # Whitespace-free view of the dataset, shared by the flexible rules
+        # while none of them changes the text
+        flexible_cache = {}
+        for replacement in replacements:
+            from_patterns = replacement.get('from')
+            to_pattern = replacement.get('to')
+            description = replacement.get('description', 'No description')
+            if not from_patterns or not to_pattern:
+                report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid replacement rule: {description}",
+                       description=description)
+                continue
+            if isinstance(from_patterns, list):
+                applied_message = "✅ Applied: {description} (pattern: {pattern:.50}...)"
+                not_found_message = "ℹ️  Not found: {description} (pattern: {pattern:.50}...)"
+            else:
+                from_patterns = [from_patterns]
+                applied_message = "✅ Applied: {description}"
+                not_found_message = "ℹ️  Not found: {description}"
+            for from_pattern in from_patterns:
+                try:
+                    with profile_rule(profile, f"dataset: {description}"):
+                        new_content, success = flexible_string_replace(dataset_content, from_pattern, to_pattern,
+                                                                       description, options.get('rule_budget'),
+                                                                       flexible_cache)
+                except TimeoutError as e:
+                    _report_rule_timeout(reporter, description, e)
+                    _mark_incomplete(options, "rule timeout")
+                    rules.append(rule_hits(description, 0))
+                    errors.append(str(e))
+                    timed_out += 1
+                    continue
+                rules.append(rule_hits(description, replacement_count(dataset_content, from_pattern) if success else 0))
+                if success:
+                    dataset_content = new_content
+                    report(reporter, INFO, "rule_applied", applied_message,
+                           mode="dataset", description=description, pattern=from_pattern)
+                else:
+                    report(reporter, INFO, "rule_not_found", not_found_message,
+                           mode="dataset", description=description, pattern=from_pattern)
+        flexible_cache.clear()
+        flush_reporter(reporter)
+    updates = sum(1 for rule in rules if rule['hits'])
+
+    # Apply regex/template replacements, all rules in one scan of the text;
+    # the decoded *_path arrays follow with the ASCII path rules
+    regex_replacements = dataset_rules['regex_rules']
+    regex_hits = [None] * len(regex_replacements)
+    if regex_replacements:
+        report(reporter, INFO, "stage", "\n🔄 Applying {count} regex replacements in one pass...",
+               count=len(regex_replacements))
+        with profile_phase(profile, "dataset: regex rules"):
+            new_data, _, regex_hits = apply_regex_rules(dataset_content.encode('utf-8'), dataset_rules['compiled_regex'])
+        dataset_content = new_data.decode('utf-8')
+
+    # Apply ASCII path replacements (robust, using parsed JSON)
+    if dataset_rules['ascii_rules'] or dataset_rules['compiled_regex']['pattern'] is not None:
+        try:
+            dataset_content, ascii_hits = _transform_ascii_paths(dataset_content, dataset_rules, regex_hits, options,
+                                                                 reporter)
+            rules += ascii_hits
+        except Exception as e:
+            report(reporter, ERROR, "ascii_path_error", "❌ Error during robust ASCII path replacement: {error}",
+                   mode="dataset", error=str(e))
+            flush_reporter(reporter)
+            _mark_incomplete(options, "ASCII path error")
+            errors.append(f"ASCII path replacement failed: {e}")
+
+    if regex_replacements:
+        updates += report_regex_rules(regex_replacements, regex_hits, "dataset", reporter)
+        rules += regex_rule_hits(regex_replacements, regex_hits)
+    if stats is not None:
+        stats.update(timed_out=timed_out, updates=updates)
+    return dataset_content, rules, errors
+
+def apply_dataset_replacements(dataset_path, config_path=None, options=None):
     """
     Apply generic replacements (from 'replacements' and 'ascii_path_replacements') to the dataset file based on configuration.
     Args:
         dataset_path (str): Path to the dataset JSON file to modify.
         config_path (str, optional): Path to directory containing configuration files.
+        options (dict, optional): Run options from parse_run_options().
     """
+    options = options or {}
+    profile = options.get('profile')
+    metrics = options.get('metrics')
+    reporter = options.get('reporter') or new_reporter()
     try:
-        # Load dataset replacement configuration
-        if config_path:
-            dataset_config_path = os.path.join(config_path, "issp_dataset_replacements.json")
-        else:
-            dataset_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "issp_dataset_replacements.json")
+        # Load dataset replacement configuration (merged over its base layers)
+        config_dir = config_path or os.path.dirname(os.path.abspath(__file__))
+        config_data = load_rule_file(config_dir, "issp_dataset_replacements.json")
 
-        if not os.path.exists(dataset_config_path):
+        if config_data is None:
             print(f"ℹ️  No dataset replacements configuration found")
-            if config_path:
-                print(f"📁 Expected: {os.path.join(config_path, 'issp_dataset_replacements.json')}")
-            else:
-                print(f"📁 Expected: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issp_dataset_replacements.json')}")
+            print(f"📁 Expected: {os.path.join(config_dir, 'issp_dataset_replacements.json')}")
             return True
 
-        with open(dataset_config_path, 'r') as f:
-            config_data = json.load(f)
+        print(f"📋 Loaded configuration from: issp_dataset_replacements.json{layers_note(config_dir)}")
+        dataset_rules = compile_dataset_rules(config_data, reporter)
 
-        print(f"📋 Loaded configuration from: {os.path.basename(dataset_config_path)}")
+        if options.get('prescan', True):
+            with profile_phase(profile, "dataset: pre-scan"):
+                may_match = file_may_match(dataset_path, dataset_anchors(config_data)
+                                           + regex_path_anchors(dataset_rules['compiled_regex']))
+            if not may_match:
+                print(f"⏭️  No rule can apply to {os.path.basename(dataset_path)} (pre-scan): skipped")
+                record_file(metrics, "dataset", dataset_path, "skipped")
+                return True
 
         # Load dataset JSON
-        with open(dataset_path, 'r') as f:
-            dataset_content = f.read()
-
-        # Create backup if not exists
-        backup_path = dataset_path + '.dataset.bak'
-        if not os.path.exists(backup_path):
-            with open(backup_path, 'w') as f:
-                f.write(dataset_content)
-            print(f"📁 Created backup: {os.path.basename(backup_path)}")
-        else:
-            print(f"📁 Backup already exists: {os.path.basename(backup_path)}")
+        with profile_phase(profile, "dataset: read"):
+            with open(dataset_path, 'r') as f:
+                dataset_content = f.read()
+        count_bytes(profile, read=len(dataset_content))
 
         original_content = dataset_content
-        total_changes = 0
-
-        # Apply string/regex replacements
-        replacements = config_data.get('replacements', [])
-        if replacements:
-            print(f"\n🔄 Applying {len(replacements)} generic replacements...")
-            for replacement in replacements:
-                from_patterns = replacement.get('from')
-                to_pattern = replacement.get('to')
-                description = replacement.get('description', 'No description')
-                if not from_patterns or not to_pattern:
-                    print(f"⚠️  Skipping invalid replacement rule: {description}")
-                    continue
-                if isinstance(from_patterns, list):
-                    for from_pattern in from_patterns:
-                        new_content, success = flexible_string_replace(dataset_content, from_pattern, to_pattern, description)
-                        if success:
-                            dataset_content = new_content
-                            total_changes += 1
-                            print(f"✅ Applied: {description} (pattern: {from_pattern[:50]}...)")
-                        else:
-                            print(f"ℹ️  Not found: {description} (pattern: {from_pattern[:50]}...)")
-                else:
-                    new_content, success = flexible_string_replace(dataset_content, from_patterns, to_pattern, description)
-                    if success:
-                        dataset_content = new_content
-                        total_changes += 1
-                        print(f"✅ Applied: {description}")
-                    else:
-                        print(f"ℹ️  Not found: {description}")
 
+        with profile_phase(profile, "dataset: rule analysis"):
+            findings = analyze_text_rules(dataset_rules['text_rules'])
+            findings += analyze_ascii_path_rules(dataset_rules['ascii_rules'])
+        if findings:
+            print(f"🔎 Rule analysis: {len(findings)} finding(s)")
+            print_rule_findings(findings)
 
-        # Apply ASCII path replacements (robust, using parsed JSON)
-        ascii_paths = config_data.get('ascii_path_replacements', {}).get('automatic_replacements', [])
-        if ascii_paths:
-            try:
-                dataset_json = json.loads(dataset_content)
-                print(f"\n🔄 Applying {len(ascii_paths)} ASCII path replacements (robust)...")
-                for path_rule in ascii_paths:
-                    old_path = path_rule.get('old_path')
-                    new_path = path_rule.get('new_path')
-                    description = path_rule.get('description', 'No description')
-                    if not old_path or not new_path:
-                        print(f"⚠️  Skipping invalid ASCII path rule: {description}")
-                        continue
-                    dataset_json = replace_path_in_ascii_arrays(dataset_json, old_path, new_path)
-                dataset_content = json.dumps(dataset_json, indent=2)
-            except Exception as e:
-                print(f"❌ Error during robust ASCII path replacement: {e}")
+        stats = {}
+        dataset_content, rules, _ = transform_dataset_content(dataset_content, dataset_rules, options, reporter, stats)
+        record_rules(metrics, "dataset", rules)
+        total_changes = stats['updates']
 
         # Save modified dataset
         if dataset_content != original_content:
-            with open(dataset_path, 'w') as f:
-                f.write(dataset_content)
+            journaled_write(dataset_path, lambda: write_text_file(dataset_path, dataset_content), options, "dataset")
+            record_file(metrics, "dataset", dataset_path, "changed", len(original_content), len(dataset_content))
             print(f"\n✅ Successfully applied {total_changes} replacement(s)")
             print(f"💾 Modified dataset saved to: {dataset_path}")
         else:
+            record_file(metrics, "dataset", dataset_path, "unchanged", len(original_content), len(original_content))
             print(f"\nℹ️  No changes applied to dataset")
 
         # Report results
         print(f"\n📊 DATASET REPLACEMENT RESULTS:")
         print(f"   Total successful updates: {total_changes}")
-        print(f"   Generic replacements: {len(replacements)}")
-        print(f"   ASCII path replacements: {len(ascii_paths)}")
+        print(f"   Generic replacements: {len(dataset_rules['text_rules'])}")
+        if stats['timed_out']:
+            print(f"   Aborted (time budget): {stats['timed_out']}")
+        if dataset_rules['regex_rules']:
+            print(f"   Regex replacements: {len(dataset_rules['regex_rules'])}")
+        print(f"   ASCII path replacements: {len(dataset_rules['ascii_rules'])}")
         return True
     except Exception as e:
         print(f"❌ Error applying dataset replacements: {str(e)}")
+        record_file(metrics, "dataset", dataset_path, "error")
         import traceback
         traceback.print_exc()
         return False
@@ -157,15 +371,69 @@ def apply_dataset_replacements(dataset_path, config_path=None):
 ISSP JSON Tools - Configuration Settings Manager
 """
 
-import json
+import atexit
+import io
 import sys
 import os
 import re
 
-def flexible_string_replace(content, from_pattern, to_pattern, description=""):
+import json_backend
+from ascii_codec import ascii_array_to_string, string_to_ascii_array
+from chunked_search import find_pattern_matches, write_with_replacements
+from config_layers import describe_layers, load_rule_file
+from esme_environment import ENVIRONMENT_SECTION, apply_environment_updates, rule_description
+from flexible_match import RULE_TIME_BUDGET, flexible_replace
+from patch_plans import config_fingerprint, find_plan, replay_plan, save_plan
+from prescan import dataset_anchors, environment_anchors, esme_anchors, file_may_match, steering_anchors
+from regex_rules import (REGEX_SECTION, apply_regex_rules, apply_regex_rules_to_paths, compile_regex_rules, regex_anchors,
+                         regex_path_anchors, report_regex_rules, rule_description as regex_rule_description)
+from profiler import count_bytes, profile_phase, profile_rule, start_profiling, stop_profiling
+from reporter import (DEBUG, ERROR, INFO, WARNING, capture_level, close_reporter, flush_reporter, new_reporter, replay_events,
+                      report, reporter_from_argv)
+from run_metrics import new_run_metrics, record_file, record_rule, save_run_metrics
+from project_discovery import discover_project_files
+from subtree_parallel import transform_subtrees
+from rule_analyzer import (RULE_FILES, analyze_ascii_path_rules, analyze_steering_rules, analyze_text_rules,
+                           is_single_pass_safe, print_rule_findings)
+from undo_journal import content_hash, new_run_id, print_runs, record_change, restore_run
+
+# Camera whose steering_wheel values the steering rules update
+STEERING_CAMERA = "MIRRORSE_CHN1CAMDEFAULT"
+
+def _report_rule_timeout(reporter, description, error):
+    report(reporter, WARNING, "rule_timeout", "⏱️  Aborted: {error}; the rule was skipped",
+           mode="dataset", description=description, error=str(error))
+
+def rule_hits(description, hits):
+    """One entry of the per-rule hit lists returned by the transform_*_content functions"""
+    return {'description': description, 'hits': hits}
+
+def regex_rule_hits(rules, hits):
+    """rule_hits() entries for the valid regex rules"""
+    return [rule_hits(regex_rule_description(rule), count) for rule, count in zip(rules, hits) if count is not None]
+
+def record_rules(metrics, mode, rules):
+    """Record a transform's per-rule hits in the run metrics"""
+    for rule in rules:
+        record_rule(metrics, mode, rule['description'], rule['hits'])
+
+def _mark_incomplete(options, reason):
+    """Note that a mode skipped part of its rules, so apply_with_plan does not record the result"""
+    if options.get('incomplete') is not None:
+        options['incomplete'].append(reason)
+
+def flexible_string_replace(content, from_pattern, to_pattern, description="", budget=None, cache=None):
     """
     Perform string replacement that ignores whitespace variations.
     Handles both exact matches and flexible JSON array matching.
+
+    Args:
+        cache (dict, optional): Owned by the caller; reuses the whitespace-free
+            view of the content between rules (see flexible_match.flexible_replace).
+
+    Raises:
+        TimeoutError: The flexible match ran out of its time budget (seconds,
+        default: flexible_match.RULE_TIME_BUDGET).
     """
     # First try exact match
     if from_pattern in content:
@@ -184,301 +452,613 @@ def flexible_string_replace(content, from_pattern, to_pattern, description=""):
             new_content = re.sub(pattern, replacement_text, content, flags=re.DOTALL)
             return new_content, True
     
-    # Try general flexible whitespace matching for other patterns
+    # Try whitespace-flexible matching for JSON arrays (linear time, see flexible_match.py)
     if '[' in from_pattern and ']' in from_pattern:
-        # Escape special regex characters and make whitespace flexible
-        escaped_pattern = re.escape(from_pattern)
-        # Replace escaped whitespace with flexible whitespace patterns
-        flexible_pattern = escaped_pattern.replace(r'\ ', r'\s*').replace(r'\n', r'\s*').replace(r'\t', r'\s*')
-        
-        try:
-            matches = re.search(flexible_pattern, content, re.DOTALL)
-            if matches:
-                new_content = re.sub(flexible_pattern, to_pattern, content, flags=re.DOTALL)
-                return new_content, True
-        except re.error:
-            # If regex fails, fall back to exact match
-            pass
+        new_content, count = flexible_replace(content, from_pattern, to_pattern, description, budget, cache)
+        if count:
+            return new_content, True
     
     return content, False
 
-def replace_steering_wheel_values(data, replacements):
+def replacement_count(content, pattern):
+    """Occurrences a successful replacement changed (at least 1 for whitespace-flexible matches)"""
+    return content.count(pattern) or 1
+
+def single_pass_targets(replacements):
+    """Map each valid 'from' pattern to (rule index, 'to'); the first rule wins"""
+    targets = {}
+    for index, replacement in enumerate(replacements):
+        from_text = replacement.get('from')
+        to_text = replacement.get('to')
+        if from_text and to_text and isinstance(from_text, str):
+            targets.setdefault(from_text, (index, to_text))
+    return targets
+
+def compile_single_pass(replacements):
+    """
+    Compile literal rules into one alternation for apply_rules_single_pass().
+
+    Returns:
+        tuple: (compiled pattern or None if no rule is valid, single_pass_targets())
+    """
+    targets = single_pass_targets(replacements)
+    if not targets:
+        return None, targets
+    # Longest patterns first so a pattern never loses to one of its prefixes
+    return re.compile('|'.join(re.escape(from_text) for from_text in sorted(targets, key=len, reverse=True))), targets
+
+def apply_rules_single_pass(content, replacements, compiled=None):
+    """
+    Apply literal 'from'/'to' rules in one scan of the content.
+
+    All patterns are combined into one alternation, so each position of the
+    content is examined once and replacement output is never re-scanned. This
+    gives the same result as sequential str.replace calls only for rule sets
+    that rule_analyzer.is_single_pass_safe() accepts.
+
+    Args:
+        content (str): Text to modify.
+        replacements (list): Rules with 'from' and 'to' strings.
+        compiled (tuple, optional): compile_single_pass(replacements), to reuse.
+
+    Returns:
+        tuple: (new_content, hits) where hits[i] counts matches of rule i.
+    """
+    hits = [0] * len(replacements)
+    pattern, targets = compiled or compile_single_pass(replacements)
+    if pattern is None:
+        return content, hits
+
+    def substitute(match):
+        index, to_text = targets[match.group(0)]
+        hits[index] += 1
+        return to_text
+
+    return pattern.sub(substitute, content), hits
+
+def values_match(current, expected, tolerance=1e-4):
+    """Check if two lists of values match within tolerance"""
+    if len(current) != len(expected):
+        return False
+    return all(abs(c - e) < tolerance for c, e in zip(current, expected))
+
+def _replace_steering_values(obj, path, replacements, counts, reporter):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            current_path = f"{path}.{key}" if path else key
+
+            # Check each replacement rule
+            for replacement in replacements:
+                target_camera = replacement.get("target_camera")
+                field_name = replacement.get("field_name", "steering_wheel")
+                old_values = replacement.get("old_values")  # Use old_values for matching
+                new_values = replacement.get("new_values")
+
+                if not target_camera or not new_values:
+                    continue
+
+                # Check if we found the target camera
+                if key == target_camera and isinstance(value, dict):
+                    # Look for the field in this camera configuration
+                    if field_name in value and isinstance(value[field_name], list):
+                        current_values = value[field_name]
+
+                        # If old_values is specified, check for match (with tolerance for floating point)
+                        if old_values:
+                            if values_match(current_values, old_values):
+                                value[field_name] = new_values
+                                counts['success'] += 1
+                                report(reporter, INFO, "steering_updated", "✅ Updated {field} in '{path}': {old} → {new}",
+                                       field=field_name, path=current_path, old=old_values, new=new_values)
+                            elif values_match(current_values, new_values):
+                                report(reporter, INFO, "steering_already_set",
+                                       "ℹ️  {field} in '{path}' already has target values: {current}",
+                                       field=field_name, path=current_path, current=current_values)
+                            else:
+                                report(reporter, INFO, "steering_mismatch",
+                                       "ℹ️  {field} in '{path}' has different values: {current}\n"
+                                       "    Expected: {old}\n    Target: {new}",
+                                       field=field_name, path=current_path, current=current_values,
+                                       old=old_values, new=new_values)
+                                # Offer to update anyway if values are close to target
+                                if values_match(current_values, new_values, tolerance=1e-4):
+                                    value[field_name] = new_values
+                                    counts['success'] += 1
+                                    report(reporter, INFO, "steering_updated",
+                                           "✅ Updated {field} (values were close to target): {old} → {new}",
+                                           field=field_name, path=current_path, old=current_values, new=new_values)
+                        else:
+                            # If no old_values specified, replace regardless
+                            value[field_name] = new_values
+                            counts['success'] += 1
+                            report(reporter, INFO, "steering_updated", "✅ Updated {field} in '{path}': {old} → {new}",
+                                   field=field_name, path=current_path, old=current_values, new=new_values)
+                    else:
+                        report(reporter, INFO, "steering_field_missing", "ℹ️  No {field} found in '{path}'",
+                               field=field_name, path=current_path)
+
+            # Continue searching recursively
+            if isinstance(value, (dict, list)):
+                _replace_steering_values(value, current_path, replacements, counts, reporter)
+
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            if isinstance(item, (dict, list)):
+                _replace_steering_values(item, f"{path}[{i}]", replacements, counts, reporter)
+
+def replace_steering_wheel_values(data, replacements, reporter=None):
     """
     Replace steering_wheel values based on configuration rules.
     
     Args:
         data (dict): JSON data to modify
         replacements (list): List of replacement rules from configuration
+        reporter (dict, optional): Reporter for per-match events (default: console)
         
     Returns:
         tuple: (modified_data, success_count)
     """
-    success_count = 0
-    
-    def values_match(current, expected, tolerance=1e-4):
-        """Check if two lists of values match within tolerance"""
-        if len(current) != len(expected):
-            return False
-        return all(abs(c - e) < tolerance for c, e in zip(current, expected))
-    
-    def find_and_replace_steering_wheel(obj, path=""):
-        nonlocal success_count
-        
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                current_path = f"{path}.{key}" if path else key
-                
-                # Check each replacement rule
-                for replacement in replacements:
-                    target_camera = replacement.get("target_camera")
-                    field_name = replacement.get("field_name", "steering_wheel")
-                    old_values = replacement.get("old_values")  # Use old_values for matching
-                    new_values = replacement.get("new_values")
-                    
-                    if not target_camera or not new_values:
-                        continue
-                    
-                    # Check if we found the target camera
-                    if key == target_camera and isinstance(value, dict):
-                        # Look for the field in this camera configuration
-                        if field_name in value and isinstance(value[field_name], list):
-                            current_values = value[field_name]
-                            
-                            # If old_values is specified, check for match (with tolerance for floating point)
-                            if old_values:
-                                if values_match(current_values, old_values):
-                                    value[field_name] = new_values
-                                    success_count += 1
-                                    print(f"✅ Updated {field_name} in '{current_path}': {old_values} → {new_values}")
-                                elif values_match(current_values, new_values):
-                                    print(f"ℹ️  {field_name} in '{current_path}' already has target values: {current_values}")
-                                else:
-                                    print(f"ℹ️  {field_name} in '{current_path}' has different values: {current_values}")
-                                    print(f"    Expected: {old_values}")
-                                    print(f"    Target: {new_values}")
-                                    # Offer to update anyway if values are close to target
-                                    if values_match(current_values, new_values, tolerance=1e-4):
-                                        value[field_name] = new_values
-                                        success_count += 1
-                                        print(f"✅ Updated {field_name} (values were close to target): {current_values} → {new_values}")
-                            else:
-                                # If no old_values specified, replace regardless
-                                value[field_name] = new_values
-                                success_count += 1
-                                print(f"✅ Updated {field_name} in '{current_path}': {current_values} → {new_values}")
-                        else:
-                            print(f"ℹ️  No {field_name} found in '{current_path}'")
-                
-                # Continue searching recursively
-                if isinstance(value, (dict, list)):
-                    find_and_replace_steering_wheel(value, current_path)
-                    
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                if isinstance(item, (dict, list)):
-                    find_and_replace_steering_wheel(item, f"{path}[{i}]")
-    
-    find_and_replace_steering_wheel(data)
-    return data, success_count
+    reporter = reporter or new_reporter()
+    counts = {'success': 0}
+    _replace_steering_values(data, "", replacements, counts, reporter)
+    flush_reporter(reporter)
+    return data, counts['success']
 
-def find_steering_wheel_values(data, target_camera="MIRRORSE_CHN1CAMDEFAULT"):
+def _search_steering_wheel(obj, path, target_camera, found_values, reporter):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            current_path = f"{path}.{key}" if path else key
+
+            # Check if we found the target camera
+            if key == target_camera and isinstance(value, dict):
+                if "steering_wheel" in value and isinstance(value["steering_wheel"], list):
+                    found_values.append({
+                        "path": current_path,
+                        "values": value["steering_wheel"]
+                    })
+                    report(reporter, INFO, "steering_found", "🔍 Found steering_wheel in '{path}': {values}",
+                           path=current_path, values=value["steering_wheel"])
+
+            # Continue searching recursively
+            if isinstance(value, (dict, list)):
+                _search_steering_wheel(value, current_path, target_camera, found_values, reporter)
+
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            if isinstance(item, (dict, list)):
+                _search_steering_wheel(item, f"{path}[{i}]", target_camera, found_values, reporter)
+
+def find_steering_wheel_values(data, target_camera=STEERING_CAMERA, reporter=None):
     """
     Find and display steering wheel values for diagnostic purposes.
     
     Args:
         data (dict): JSON data to search
         target_camera (str): Target camera name to search for
+        reporter (dict, optional): Reporter for the findings (default: console)
     """
+    reporter = reporter or new_reporter()
     found_values = []
-    
-    def search_steering_wheel(obj, path=""):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                current_path = f"{path}.{key}" if path else key
-                
-                # Check if we found the target camera
-                if key == target_camera and isinstance(value, dict):
-                    if "steering_wheel" in value and isinstance(value["steering_wheel"], list):
-                        found_values.append({
-                            "path": current_path,
-                            "values": value["steering_wheel"]
-                        })
-                        print(f"🔍 Found steering_wheel in '{current_path}': {value['steering_wheel']}")
-                
-                # Continue searching recursively
-                if isinstance(value, (dict, list)):
-                    search_steering_wheel(value, current_path)
-                    
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                if isinstance(item, (dict, list)):
-                    search_steering_wheel(item, f"{path}[{i}]")
-    
-    search_steering_wheel(data)
+    _search_steering_wheel(data, "", target_camera, found_values, reporter)
+    flush_reporter(reporter)
     return found_values
 
-def apply_esme_replacements(esme_manifest_path, config_path=None):
+def compile_esme_rules(config_data, reporter=None):
+    """
+    Analyze and compile the rules of an esme_replacements.json.
+
+    Returns:
+        dict: 'rules', 'regex_rules' and 'environment_rules' (the rule
+        sections), 'findings' (rule analysis), 'single_pass',
+        'compiled' (compile_single_pass(), for single-pass rule sets) and
+        'compiled_regex' (compile_regex_rules()).
+    """
+    replacements = config_data.get('replacements', [])
+    regex_replacements = config_data.get(REGEX_SECTION, [])
+    findings = analyze_text_rules(replacements)
+    single_pass = is_single_pass_safe(findings)
+    return {
+        'rules': replacements,
+        'regex_rules': regex_replacements,
+        'environment_rules': config_data.get(ENVIRONMENT_SECTION, []),
+        'findings': findings,
+        'single_pass': single_pass,
+        'compiled': compile_single_pass(replacements) if single_pass else None,
+        'compiled_regex': compile_regex_rules(regex_replacements, reporter),
+    }
+
+def _report_esme_text_rules(replacements, hits, reporter):
+    """Report the literal ESME rules; returns rule_hits() entries for the valid ones"""
+    rules = []
+    for index, replacement in enumerate(replacements):
+        from_text = replacement.get('from')
+        to_text = replacement.get('to')
+        description = replacement.get('description', 'No description')
+        if not from_text or not to_text:
+            report(reporter, WARNING, "invalid_rule", "⚠️  Skipping invalid replacement rule: {description}",
+                   description=description)
+            continue
+        rules.append(rule_hits(description, hits[index]))
+        if hits[index]:
+            report(reporter, INFO, "rule_applied", "✅ Applied: {description}\n   From: {pattern:60...}\n   To:   {to:60...}",
+                   mode="esme", description=description, pattern=from_text, to=to_text)
+        else:
+            report(reporter, INFO, "rule_not_found", "ℹ️  Not found: {description}\n   Searched for: {pattern:60...}",
+                   mode="esme", description=description, pattern=from_text)
+    flush_reporter(reporter)
+    return rules
+
+def _apply_esme_rule_passes(data, esme_rules, profile, reporter):
+    """Regex rules, then environment rules, on ESME manifest bytes; returns (new data, rule_hits() entries)"""
+    rules = []
+    if esme_rules['regex_rules']:
+        with profile_phase(profile, "esme: regex rules"):
+            data, _, regex_hits = apply_regex_rules(data, esme_rules['compiled_regex'])
+        report_regex_rules(esme_rules['regex_rules'], regex_hits, "esme", reporter)
+        rules += regex_rule_hits(esme_rules['regex_rules'], regex_hits)
+    environment_updates = esme_rules['environment_rules']
+    if environment_updates:
+        with profile_phase(profile, "esme: environment updates"):
+            data, _, environment_hits = apply_environment_updates(data, environment_updates, reporter)
+        report_environment_rules(environment_updates, environment_hits, reporter=reporter)
+        rules += [rule_hits(rule_description(rule), count) for rule, count in zip(environment_updates, environment_hits)
+                  if count is not None]
+    return data, rules
+
+def transform_esme_content(esme_content, esme_rules, options=None, reporter=None):
+    """
+    Apply compiled ESME rules to manifest text: the literal rules (in one
+    pass when the analysis allows it), the regex rules, then the environment
+    updates.
+
+    Args:
+        esme_content (str): ESME manifest text.
+        esme_rules (dict): From compile_esme_rules().
+        options (dict, optional): Run options ('profile').
+        reporter (dict, optional): Reporter for per-rule events (default: console).
+
+    Returns:
+        tuple: (new content, [{'description', 'hits'}] in rule order, error messages)
+    """
+    options = options or {}
+    profile = options.get('profile')
+    reporter = reporter or new_reporter()
+    replacements = esme_rules['rules']
+    if esme_rules['single_pass']:
+        report(reporter, INFO, "stage", "⚡ Rules are order-independent: applying all of them in a single pass")
+        with profile_phase(profile, "esme: single-pass replace"):
+            esme_content, hits = apply_rules_single_pass(esme_content, replacements, esme_rules['compiled'])
+    else:
+        hits = [0] * len(replacements)
+        for index, replacement in enumerate(replacements):
+            from_text = replacement.get('from')
+            to_text = replacement.get('to')
+            if not from_text or not to_text:
+                continue
+            with profile_rule(profile, f"esme: {replacement.get('description', 'No description')}"):
+                hits[index] = esme_content.count(from_text)
+                if hits[index]:
+                    esme_content = esme_content.replace(from_text, to_text)
+    rules = _report_esme_text_rules(replacements, hits, reporter)
+
+    if esme_rules['regex_rules'] or esme_rules['environment_rules']:
+        # Regex and environment rules run on the result of the text rules
+        new_data, pass_rules = _apply_esme_rule_passes(esme_content.encode('utf-8'), esme_rules, profile, reporter)
+        esme_content = new_data.decode('utf-8')
+        rules += pass_rules
+    return esme_content, rules, []
+
+def apply_esme_replacements(esme_manifest_path, config_path=None, options=None):
     """
     Apply ESME replacements to the ESME manifest file based on configuration.
 
     Args:
         esme_manifest_path (str): Path to the ESME manifest JSON file to modify.
         config_path (str, optional): Path to directory containing configuration files.
+        options (dict, optional): Run options from parse_run_options().
     """
+    options = options or {}
+    profile = options.get('profile')
+    metrics = options.get('metrics')
+    reporter = options.get('reporter') or new_reporter()
     try:
-        # Load ESME replacement configuration
-        if config_path:
-            esme_config_path = os.path.join(config_path, "esme_replacements.json")
-        else:
-            esme_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "esme_replacements.json")
+        # Load ESME replacement configuration (merged over its base layers)
+        config_dir = config_path or os.path.dirname(os.path.abspath(__file__))
+        config_data = load_rule_file(config_dir, "esme_replacements.json")
         
-        if not os.path.exists(esme_config_path):
+        if config_data is None:
             print(f"ℹ️  No ESME replacements configuration found")
-            print(f"📁 Expected: {esme_config_path}")
+            print(f"📁 Expected: {os.path.join(config_dir, 'esme_replacements.json')}")
             return True
         
-        with open(esme_config_path, 'r') as f:
-            config_data = json.load(f)
-        
         replacements = config_data.get('replacements', [])
-        if not replacements:
+        regex_replacements = config_data.get(REGEX_SECTION, [])
+        environment_updates = config_data.get(ENVIRONMENT_SECTION, [])
+        if not replacements and not regex_replacements and not environment_updates:
             print("ℹ️  No ESME replacement rules found in configuration")
             return True
             
-        print(f"📋 Loaded {len(replacements)} ESME replacement rules")
-        
-        # Read the ESME manifest as text (since we're doing string replacements)
-        with open(esme_manifest_path, 'r') as f:
-            esme_content = f.read()
-        
-        # Create backup if not exists
-        backup_path = esme_manifest_path + '.esme.bak'
-        if not os.path.exists(backup_path):
-            with open(backup_path, 'w') as f:
-                f.write(esme_content)
-            print(f"\n📁 Created backup: {os.path.basename(backup_path)}")
-        else:
-            print(f"\n📁 Backup already exists: {os.path.basename(backup_path)}")
-        
+        print(f"📋 Loaded {len(replacements)} ESME replacement rules{layers_note(config_dir)}")
+        if regex_replacements:
+            print(f"📋 Loaded {len(regex_replacements)} ESME regex rules")
+        if environment_updates:
+            print(f"📋 Loaded {len(environment_updates)} ESME environment rules")
+
+        with profile_phase(profile, "esme: rule analysis"):
+            esme_rules = compile_esme_rules(config_data, reporter)
+        findings = esme_rules['findings']
+        single_pass = esme_rules['single_pass']
+        if findings:
+            print(f"🔎 Rule analysis: {len(findings)} finding(s)")
+            print_rule_findings(findings)
+
+        if options.get('prescan', True):
+            with profile_phase(profile, "esme: pre-scan"):
+                may_match = file_may_match(esme_manifest_path, esme_anchors(replacements)
+                                           + regex_anchors(esme_rules['compiled_regex'])
+                                           + environment_anchors(environment_updates))
+            if not may_match:
+                print(f"⏭️  No rule can apply to {os.path.basename(esme_manifest_path)} (pre-scan): skipped")
+                record_file(metrics, "esme", esme_manifest_path, "skipped")
+                return True
+        bytes_before = os.path.getsize(esme_manifest_path)
+
+        # Parallel mode merges match positions found independently per chunk,
+        # which is only equivalent to sequential replacement for
+        # order-independent rule sets.
+        parallel = bool(options.get('parallel')) and single_pass and bool(replacements)
+        if options.get('parallel') and not single_pass:
+            print("⚠️  --parallel needs an order-independent rule set; applying rules sequentially")
+
         # Apply ESME replacements
         print("\n🔄 Applying ESME replacements...")
-        success_count = 0
-        original_content = esme_content
-        
-        for replacement in replacements:
-            from_text = replacement.get('from')
-            to_text = replacement.get('to')
-            description = replacement.get('description', 'No description')
-            
-            if not from_text or not to_text:
-                print(f"⚠️  Skipping invalid replacement rule: {description}")
-                continue
-            
-            if from_text in esme_content:
-                esme_content = esme_content.replace(from_text, to_text)
-                success_count += 1
-                print(f"✅ Applied: {description}")
-                print(f"   From: {from_text[:60]}{'...' if len(from_text) > 60 else ''}")
-                print(f"   To:   {to_text[:60]}{'...' if len(to_text) > 60 else ''}")
-            else:
-                print(f"ℹ️  Not found: {description}")
-                print(f"   Searched for: {from_text[:60]}{'...' if len(from_text) > 60 else ''}")
-        
-        # Save modified ESME manifest only if changes were made
-        if esme_content != original_content:
-            with open(esme_manifest_path, 'w') as f:
-                f.write(esme_content)
+        if parallel:
+            # The manifest is searched through a memory map, never decoded as a whole
+            print("⚡ Rules are order-independent: searching all of them in parallel chunks")
+            targets = single_pass_targets(replacements)
+            patterns = list(targets)
+            with profile_phase(profile, "esme: parallel search"):
+                matches = find_pattern_matches(esme_manifest_path, [pattern.encode('utf-8') for pattern in patterns],
+                                               options.get('workers'))
+            count_bytes(profile, read=os.path.getsize(esme_manifest_path))
+            hits = [0] * len(replacements)
+            for _, _, pattern_index in matches:
+                hits[targets[patterns[pattern_index]][0]] += 1
+            rules = _report_esme_text_rules(replacements, hits, reporter)
+
+            changed = any(patterns[index] != targets[patterns[index]][1] for _, _, index in matches)
+            if changed:
+                encoded_patterns = [pattern.encode('utf-8') for pattern in patterns]
+                encoded_targets = [targets[pattern][1].encode('utf-8') for pattern in patterns]
+                # The undo patch follows directly from the match positions
+                reverse_patch = splice_reverse_patch([(start, end, encoded_targets[index]) for start, end, index in matches],
+                                                     [encoded_patterns[index] for _, _, index in matches])
+                journaled_write(esme_manifest_path,
+                                lambda: write_with_replacements(esme_manifest_path, matches, encoded_targets),
+                                options, "esme", reverse_patch)
+            if regex_replacements or environment_updates:
+                # The text rules were spliced into the file; the other
+                # passes run on top of them
+                with open(esme_manifest_path, 'rb') as f:
+                    old_data = f.read()
+                new_data, pass_rules = _apply_esme_rule_passes(old_data, esme_rules, profile, reporter)
+                rules += pass_rules
+                if new_data != old_data:
+                    journaled_write(esme_manifest_path, lambda: write_bytes_file(esme_manifest_path, new_data),
+                                    options, "esme")
+                    changed = True
+        else:
+            # Read the ESME manifest as text (since we're doing string replacements)
+            with profile_phase(profile, "esme: read"):
+                with open(esme_manifest_path, 'r') as f:
+                    original_content = f.read()
+            count_bytes(profile, read=len(original_content))
+            esme_content, rules, _ = transform_esme_content(original_content, esme_rules, options, reporter)
+            changed = esme_content != original_content
+            if changed:
+                journaled_write(esme_manifest_path, lambda: write_text_file(esme_manifest_path, esme_content),
+                                options, "esme")
+        record_rules(metrics, "esme", rules)
+        success_count = sum(1 for rule in rules if rule['hits'])
+        if changed:
+            record_file(metrics, "esme", esme_manifest_path, "changed", bytes_before, os.path.getsize(esme_manifest_path))
             print(f"\n✅ Successfully applied {success_count} ESME replacement(s)")
             print(f"💾 Modified ESME manifest saved to: {esme_manifest_path}")
         else:
+            record_file(metrics, "esme", esme_manifest_path, "unchanged", bytes_before, bytes_before)
             print(f"\nℹ️  No changes applied to ESME manifest")
         
         # Report results
         print(f"\n📊 ESME REPLACEMENT RESULTS:")
         print(f"   Successful updates: {success_count}")
-        print(f"   Configuration rules: {len(replacements)}")
+        print(f"   Configuration rules: {len(replacements) + len(regex_replacements) + len(environment_updates)}")
             
         return True
         
     except Exception as e:
         print(f"❌ Error applying ESME replacements: {str(e)}")
+        record_file(metrics, "esme", esme_manifest_path, "error")
         return False
 
-def apply_steering_wheel_replacements(dataset_path, config_path=None):
+def report_environment_rules(rules, hits, metrics=None, reporter=None):
+    """
+    Report the outcome of ESME environment rules.
+
+    Args:
+        rules (list): The 'environment_updates' rules.
+        hits (list): Processes changed per rule, from apply_environment_updates().
+        metrics (dict, optional): Run metrics to record the rules in.
+        reporter (dict, optional): Reporter (default: console).
+
+    Returns:
+        int: Number of rules that changed at least one process.
+    """
+    reporter = reporter or new_reporter()
+    applied = 0
+    for rule, count in zip(rules, hits):
+        if count is None:
+            continue
+        action = "Remove" if rule.get('remove') else "Set"
+        description = rule_description(rule)
+        record_rule(metrics, "esme", description, count)
+        if count:
+            applied += 1
+            report(reporter, INFO, "environment_rule_applied",
+                   "✅ Applied: {description}\n   {action} {key} in {count} process(es)",
+                   mode="esme", description=description, action=action, key=rule['key'], count=count)
+        else:
+            report(reporter, INFO, "environment_rule_unchanged",
+                   "ℹ️  Up to date: {description}\n   No process needed a change to {key}",
+                   mode="esme", description=description, key=rule['key'])
+    flush_reporter(reporter)
+    return applied
+
+def _steering_subtree(data, path, replacements, level):
+    """--parallel worker: steering search and replacement on one subtree, events captured per phase"""
+    find_reporter = new_reporter(level, capture=True)
+    found_values = []
+    _search_steering_wheel(data, path, STEERING_CAMERA, found_values, find_reporter)
+    replace_reporter = new_reporter(level, capture=True)
+    counts = {'success': 0}
+    _replace_steering_values(data, path, replacements, counts, replace_reporter)
+    return data, (found_values, find_reporter['events'], counts['success'], replace_reporter['events'])
+
+def transform_steering_content(dataset_content, steering_replacements, options=None, reporter=None):
+    """
+    Apply steering wheel rules to dataset text. The text is only
+    re-serialized when a rule changed a value.
+
+    Args:
+        dataset_content (str): Dataset text.
+        steering_replacements (list): The 'steering_wheel_replacements' rules.
+        options (dict, optional): Run options ('parallel', 'workers', 'profile').
+        reporter (dict, optional): Reporter for the findings and updates (default: console).
+
+    Returns:
+        tuple: (new content, [{'description', 'hits'}] (empty if the
+        steering camera was not found), error messages)
+    """
+    options = options or {}
+    profile = options.get('profile')
+    reporter = reporter or new_reporter()
+    parallel_result = None
+    if options.get('parallel'):
+        # Search and replacement run per subtree in worker processes;
+        # their events are replayed below in document order
+        with profile_phase(profile, "steering: parallel subtrees"):
+            parallel_result = transform_subtrees(dataset_content, _steering_subtree, steering_replacements,
+                                                 capture_level(reporter), options.get('workers'))
+    if parallel_result is not None:
+        parallel_content, subtree_results = parallel_result
+        report(reporter, INFO, "stage", "⚡ Transformed {count} dataset subtrees in parallel", count=len(subtree_results))
+        report(reporter, INFO, "stage", "\n� DIAGNOSTIC: Searching for current steering wheel values...")
+        found_values = []
+        for subtree_found, find_events, _, _ in subtree_results:
+            found_values.extend(subtree_found)
+            replay_events(reporter, find_events)
+        flush_reporter(reporter)
+    else:
+        with profile_phase(profile, "steering: json.loads"):
+            dataset_data = json_backend.loads(dataset_content)
+        report(reporter, INFO, "stage", "\n� DIAGNOSTIC: Searching for current steering wheel values...")
+        found_values = find_steering_wheel_values(dataset_data, STEERING_CAMERA, reporter)
+    if not found_values:
+        report(reporter, WARNING, "steering_camera_missing", "⚠️  No {camera} steering wheel configurations found",
+               camera=STEERING_CAMERA)
+        flush_reporter(reporter)
+        return dataset_content, [], []
+
+    report(reporter, INFO, "steering_configurations", "📋 Found {count} steering wheel configuration(s)",
+           count=len(found_values))
+    for number, found in enumerate(found_values, 1):
+        report(reporter, INFO, "steering_configuration", "   {number}. Path: {path}\n      Current values: {values}",
+               number=number, path=found['path'], values=found['values'])
+    if parallel_result is not None:
+        success_count = 0
+        for _, _, subtree_success_count, replace_events in subtree_results:
+            success_count += subtree_success_count
+            replay_events(reporter, replace_events)
+        flush_reporter(reporter)
+        if success_count:
+            dataset_content = parallel_content
+    else:
+        with profile_rule(profile, "steering: steering wheel rules"):
+            dataset_data, success_count = replace_steering_wheel_values(dataset_data, steering_replacements, reporter)
+        if success_count:
+            with profile_phase(profile, "steering: json.dumps"):
+                dataset_content = json_backend.dumps(dataset_data, indent=2)
+    return dataset_content, [rule_hits("steering wheel rules", success_count)], []
+
+def apply_steering_wheel_replacements(dataset_path, config_path=None, options=None):
     """
     Apply steering wheel replacements to the dataset file based on configuration.
 
     Args:
         dataset_path (str): Path to the dataset JSON file to modify.
         config_path (str, optional): Path to directory containing configuration files.
+        options (dict, optional): Run options from parse_run_options().
     """
+    options = options or {}
+    profile = options.get('profile')
+    metrics = options.get('metrics')
+    reporter = options.get('reporter') or new_reporter()
     try:
-        # Load dataset replacement configuration (comprehensive file)
-        if config_path:
-            dataset_config_path = os.path.join(config_path, "issp_dataset_replacements.json")
-            # Fallback to old steering wheel config if new one doesn't exist
-            if not os.path.exists(dataset_config_path):
-                dataset_config_path = os.path.join(config_path, "steering_wheel_replacements.json")
-        else:
-            dataset_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "issp_dataset_replacements.json")
-            # Fallback to old steering wheel config if new one doesn't exist
-            if not os.path.exists(dataset_config_path):
-                dataset_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "steering_wheel_replacements.json")
+        # Load dataset replacement configuration (comprehensive file, merged over its base layers)
+        config_dir = config_path or os.path.dirname(os.path.abspath(__file__))
+        config_name = "issp_dataset_replacements.json"
+        config_data = load_rule_file(config_dir, config_name)
+        # Fallback to old steering wheel config if new one doesn't exist
+        if config_data is None:
+            config_name = "steering_wheel_replacements.json"
+            config_data = load_rule_file(config_dir, config_name)
         
-        if not os.path.exists(dataset_config_path):
+        if config_data is None:
             print(f"ℹ️  No dataset replacements configuration found")
+            print(f"📁 Expected: {os.path.join(config_dir, 'issp_dataset_replacements.json')}")
             if config_path:
-                print(f"📁 Expected: {os.path.join(config_path, 'issp_dataset_replacements.json')}")
                 print(f"📁 Or: {os.path.join(config_path, 'steering_wheel_replacements.json')}")
-            else:
-                print(f"📁 Expected: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issp_dataset_replacements.json')}")
             return True
         
-        with open(dataset_config_path, 'r') as f:
-            config_data = json.load(f)
-        
-        print(f"📋 Loaded configuration from: {os.path.basename(dataset_config_path)}")
+        print(f"📋 Loaded configuration from: {config_name}{layers_note(config_dir)}")
+
+        steering_replacements = config_data.get('steering_wheel_replacements', {}).get('replacements', [])
+        if options.get('prescan', True):
+            with profile_phase(profile, "steering: pre-scan"):
+                may_match = file_may_match(dataset_path, steering_anchors(steering_replacements))
+            if not may_match:
+                print(f"⏭️  No rule can apply to {os.path.basename(dataset_path)} (pre-scan): skipped")
+                record_file(metrics, "steering", dataset_path, "skipped")
+                return True
         
         # Load dataset JSON
-        with open(dataset_path, 'r') as f:
-            dataset_content = f.read()
-        
-        # Create backup if not exists
-        backup_path = dataset_path + '.dataset.bak'
-        if not os.path.exists(backup_path):
-            with open(backup_path, 'w') as f:
-                f.write(dataset_content)
-            print(f"📁 Created backup: {os.path.basename(backup_path)}")
-        else:
-            print(f"📁 Backup already exists: {os.path.basename(backup_path)}")
+        with profile_phase(profile, "steering: read"):
+            with open(dataset_path, 'r') as f:
+                dataset_content = f.read()
+        count_bytes(profile, read=len(dataset_content))
+        bytes_before = len(dataset_content)
         
         total_changes = 0
         
         # Only apply steering wheel replacements in steering-only mode
-        steering_replacements = config_data.get('steering_wheel_replacements', {}).get('replacements', [])
         if steering_replacements:
+            findings = analyze_steering_rules(steering_replacements)
+            if findings:
+                print(f"🔎 Rule analysis: {len(findings)} finding(s)")
+                print_rule_findings(findings)
             print(f"\n🔄 Applying {len(steering_replacements)} steering wheel replacements...")
-            dataset_data = json.loads(dataset_content)
-            print("\n� DIAGNOSTIC: Searching for current steering wheel values...")
-            found_values = find_steering_wheel_values(dataset_data, "MIRRORSE_CHN1CAMDEFAULT")
-            if found_values:
-                print(f"📋 Found {len(found_values)} steering wheel configuration(s)")
-                for i, found in enumerate(found_values, 1):
-                    print(f"   {i}. Path: {found['path']}")
-                    print(f"      Current values: {found['values']}")
-                dataset_data, steering_success_count = replace_steering_wheel_values(dataset_data, steering_replacements)
-                dataset_content = json.dumps(dataset_data, indent=2)
-                total_changes += steering_success_count
-            else:
-                print("⚠️  No MIRRORSE_CHN1CAMDEFAULT steering wheel configurations found")
+            dataset_content, rules, _ = transform_steering_content(dataset_content, steering_replacements, options,
+                                                                   reporter)
+            record_rules(metrics, "steering", rules)
+            total_changes = sum(rule['hits'] for rule in rules)
         
         # Save modified dataset
         if total_changes > 0:
-            with open(dataset_path, 'w') as f:
-                f.write(dataset_content)
+            journaled_write(dataset_path, lambda: write_text_file(dataset_path, dataset_content), options, "steering")
+            record_file(metrics, "steering", dataset_path, "changed", bytes_before, len(dataset_content))
             print(f"\n✅ Successfully applied {total_changes} replacement(s)")
             print(f"💾 Modified dataset saved to: {dataset_path}")
         else:
+            record_file(metrics, "steering", dataset_path, "unchanged", bytes_before, bytes_before)
             print(f"\nℹ️  No changes applied to dataset")
         
         # Report results
@@ -490,20 +1070,240 @@ def apply_steering_wheel_replacements(dataset_path, config_path=None):
         
     except Exception as e:
         print(f"❌ Error applying dataset replacements: {str(e)}")
+        record_file(metrics, "steering", dataset_path, "error")
         import traceback
         traceback.print_exc()
         return False
 
+def layers_note(config_dir):
+    """' (layers: common → etron)' for a layered configuration folder, '' otherwise"""
+    layers = describe_layers(config_dir)
+    return f" (layers: {layers})" if layers else ""
+
+def splice_reverse_patch(splices, originals):
+    """
+    Undo patch (new -> old) for ordered, non-overlapping splices.
+
+    Args:
+        splices (list): (start, end, new bytes) in the old data.
+        originals (list): The old bytes of every splice.
+
+    Returns:
+        list: (start, end, old bytes) in the new data.
+    """
+    reverse_patch = []
+    shift = 0
+    for index, (start, end, new_text) in enumerate(splices):
+        new_start = start + shift
+        reverse_patch.append((new_start, new_start + len(new_text), originals[index]))
+        shift += len(new_text) - (end - start)
+    return reverse_patch
+
+def write_text_file(file_path, content):
+    with open(file_path, 'w') as f:
+        f.write(content)
+
+def decode_text(data):
+    """File bytes as open(path, 'r') reads them: default encoding, universal newlines"""
+    return io.TextIOWrapper(io.BytesIO(data)).read()
+
+def encode_text(content):
+    """The bytes write_text_file() writes for content"""
+    buffer = io.BytesIO()
+    with io.TextIOWrapper(buffer) as wrapper:
+        wrapper.write(content)
+        wrapper.flush()
+        return buffer.getvalue()
+
+def journaled_write(file_path, write_file, options, mode, reverse_patch=None):
+    """
+    Write a modified file and record the change in the undo journal.
+
+    Args:
+        file_path (str): File being modified.
+        write_file (callable): Writes the new content to file_path.
+        options (dict): Run options; 'journal' and 'run_id' are used.
+        mode (str): Replacement mode, stored with the journal entry.
+        reverse_patch (list, optional): Known new -> old patch (skips diffing).
+    """
+    profile = options.get('profile')
+    journal = options.get('journal', True)
+    if journal:
+        with profile_phase(profile, "journal"):
+            with open(file_path, 'rb') as f:
+                old_data = f.read()
+    with profile_phase(profile, f"{mode}: write"):
+        write_file()
+    count_bytes(profile, written=os.path.getsize(file_path))
+    if not journal:
+        return
+    run_id = options.setdefault('run_id', new_run_id())
+    try:
+        with profile_phase(profile, "journal"):
+            with open(file_path, 'rb') as f:
+                new_data = f.read()
+            record_change(file_path, old_data, new_data, run_id, mode, reverse_patch=reverse_patch)
+        print(f"🧾 Undo information recorded (restore with --restore {run_id})")
+    except OSError as e:
+        print(f"⚠️  Could not record undo information: {e}")
+
+def write_bytes_file(file_path, data):
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+def apply_with_plan(apply_function, mode, file_path, config_path, options):
+    """
+    Run one replacement mode, replaying a recorded patch plan when possible.
+
+    With the 'plans' option the file's hash, the rule files and the mode
+    select a plan recorded on a byte-identical file earlier; replaying it is
+    a hash check and a splice. Otherwise the mode runs normally and its
+    result is recorded as a new plan, unless part of the rules was skipped
+    (a rule out of its time budget, a failed ASCII path step).
+
+    Args:
+        apply_function (callable): apply_esme_replacements and friends.
+        mode (str): 'esme', 'dataset' or 'steering'.
+        file_path (str): File to modify.
+        config_path (str or None): Configuration directory.
+        options (dict): Run options from parse_run_options().
+
+    Returns:
+        bool: Result of the mode (True if a plan was replayed).
+    """
+    if not options.get('plans'):
+        return apply_function(file_path, config_path, options)
+
+    profile = options.get('profile')
+    config_dir = config_path or os.path.dirname(os.path.abspath(__file__))
+    with profile_phase(profile, "plans: lookup"):
+        try:
+            config_hash = config_fingerprint(config_dir, RULE_FILES, options)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Patch plans not used: {e}")
+            return apply_function(file_path, config_path, options)
+        with open(file_path, 'rb') as f:
+            base_data = f.read()
+        plan = find_plan(content_hash(base_data), config_hash, mode)
+    count_bytes(profile, read=len(base_data))
+    if plan:
+        with profile_phase(profile, "plans: replay"):
+            result_data, reverse_patch = replay_plan(plan, base_data)
+        if result_data is not None:
+            record_file(options.get('metrics'), mode, file_path, "unchanged" if result_data == base_data else "replayed",
+                        len(base_data), len(result_data))
+            if result_data == base_data:
+                print(f"⚡ Patch plan: {os.path.basename(file_path)} is already configured")
+            else:
+                journaled_write(file_path, lambda: write_bytes_file(file_path, result_data), options, mode, reverse_patch)
+                print(f"⚡ Replayed patch plan: {plan['splices']} splice(s)")
+                print(f"💾 Modified file saved to: {file_path}")
+            return True
+        print("⚠️  Recorded patch plan could not be replayed; applying rules")
+
+    options['incomplete'] = []
+    try:
+        success = apply_function(file_path, config_path, options)
+    finally:
+        incomplete = options.pop('incomplete')
+    if success and incomplete:
+        print(f"⚠️  Patch plan not recorded: the run was incomplete ({', '.join(sorted(set(incomplete)))})")
+    elif success:
+        with open(file_path, 'rb') as f:
+            result_data = f.read()
+        try:
+            with profile_phase(profile, "plans: record"):
+                plan = save_plan(base_data, result_data, config_hash, mode)
+            print(f"📝 Recorded patch plan ({plan['splices']} splice(s)) for files identical to this one")
+        except OSError as e:
+            print(f"⚠️  Could not record patch plan: {e}")
+    return success
+
+def parse_run_options(argv):
+    """
+    Parse the run options shared by all modes from the command line.
+
+    Returns:
+        dict: {'parallel': bool, 'workers': int or None, 'prescan': bool, 'journal': bool,
+               'run_id': str, 'plans': bool, 'profile': dict or None, 'metrics': dict or None,
+               'reporter': dict, 'rule_budget': float or None}
+    """
+    options = {'parallel': "--parallel" in argv, 'workers': None, 'prescan': "--no-prescan" not in argv,
+               'journal': "--no-journal" not in argv, 'run_id': new_run_id(), 'plans': "--plans" in argv,
+               'profile': start_profiling(argv, "set_settings"), 'metrics': None,
+               'reporter': reporter_from_argv(argv), 'rule_budget': None}
+    if "--workers" in argv:
+        index = argv.index("--workers")
+        try:
+            options['workers'] = int(argv[index + 1])
+        except (IndexError, ValueError):
+            print("❌ Error: --workers requires a number")
+            sys.exit(1)
+    if "--rule-budget" in argv:
+        index = argv.index("--rule-budget")
+        try:
+            options['rule_budget'] = float(argv[index + 1])
+        except (IndexError, ValueError):
+            print("❌ Error: --rule-budget requires a number of seconds")
+            sys.exit(1)
+    return options
+
+def find_project_files(project_path, use_cache=True):
+    """
+    Locate the ESME manifest and dataset file of a project.
+
+    Args:
+        project_path (str): Path to the ISSP project folder.
+        use_cache (bool): Reuse cached locations from earlier runs.
+
+    Returns:
+        dict: {'esme', 'dataset', 'dataset_siblings', 'cached'}; missing files are None.
+    """
+    files = discover_project_files(project_path, use_cache=use_cache)
+    if files['cached']:
+        print(f"📁 Using cached manifest locations for: {project_path}")
+    return files
+
+def print_options():
+    """Print the run options; shared by the usage text and the default help"""
+    print("  --all           Apply ESME, dataset, and steering wheel replacements in sequence")
+    print("  --esme-only      Only apply ESME replacements")
+    print("  --steering-only  Only apply steering wheel replacements")
+    print("  --dataset-only   Only apply dataset replacements")
+    print("  --config-path    Path to directory containing configuration JSON files")
+    print("  --no-discovery-cache  Rescan the project instead of using cached manifest locations")
+    print("  --watch          Re-apply the selected modes whenever a rule file or manifest changes")
+    print("  --parallel       Search large manifests in parallel memory-mapped chunks and")
+    print("                   transform large datasets' subtrees in worker processes")
+    print("  --workers N      Number of worker processes for --parallel")
+    print("  --no-prescan     Always read and process files, even if no rule can apply")
+    print("  --rule-budget S  Seconds a whitespace-flexible dataset rule may take before it is")
+    print(f"                   aborted and reported (default: {RULE_TIME_BUDGET:g})")
+    print("  --no-journal     Don't record undo information for this run")
+    print("  --plans          Replay/record byte patch plans for byte-identical files")
+    print("  --profile        Time phases and rules; --profile-output FILE, --pstats FILE")
+    print("  --mem-report     Report peak/retained memory per phase (tracemalloc + RSS)")
+    print("  --no-metrics     Don't record this run in the metrics store (see run_metrics.py)")
+    print("  --quiet          Only print warnings and errors from the replacement loops")
+    print("  --log-json FILE  Append every replacement event to FILE as JSON lines")
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python set_settings.py <project_path> [options]")
         print("Options:")
-        print("  --all           Apply ESME, dataset, and steering wheel replacements in sequence")
-        print("  --esme-only      Only apply ESME replacements")
-        print("  --steering-only  Only apply steering wheel replacements")
-        print("  --dataset-only   Only apply dataset replacements")
-        print("  --config-path    Path to directory containing configuration JSON files")
+        print_options()
+        print("Undo:")
+        print("  python set_settings.py --list-runs         List runs recorded in the undo journal")
+        print("  python set_settings.py --restore [run-id]  Restore files to their state before a run (default: latest)")
         sys.exit(1)
+
+    if sys.argv[1] == "--list-runs":
+        print_runs()
+        sys.exit(0)
+
+    if sys.argv[1] == "--restore":
+        run_id = sys.argv[2] if len(sys.argv) > 2 else None
+        sys.exit(0 if restore_run(run_id) else 1)
     
     project_path = sys.argv[1]
     
@@ -525,34 +1325,52 @@ if __name__ == "__main__":
         except ValueError:
             pass
     
+    options = parse_run_options(sys.argv)
+    if "--no-metrics" not in sys.argv:
+        options['metrics'] = new_run_metrics(options['run_id'], "set_settings", project_path, config_path)
+    # Every mode ends with sys.exit(); store metrics and report the profile on
+    # the way out (atexit runs in reverse order, so the profile is finished first)
+    atexit.register(lambda: save_run_metrics(options['metrics'], options['profile']))
+    atexit.register(stop_profiling, options['profile'])
+    atexit.register(close_reporter, options['reporter'])
+    with profile_phase(options['profile'], "discovery"):
+        project_files = find_project_files(project_path, use_cache="--no-discovery-cache" not in sys.argv)
+
+    if "--watch" in sys.argv:
+        # Imported here: the library API imports this module
+        from watch_mode import watch_project
+        if "--esme-only" in sys.argv:
+            watch_modes = ("esme",)
+        elif "--steering-only" in sys.argv:
+            watch_modes = ("steering",)
+        elif "--dataset-only" in sys.argv:
+            watch_modes = ("dataset",)
+        else:
+            watch_modes = ("esme", "steering")
+        options['metrics'] = None
+        watch_config_path = config_path or os.path.dirname(os.path.abspath(__file__))
+        sys.exit(0 if watch_project(project_files, watch_config_path, watch_modes, options) else 1)
+
     # Handle --all option first, so it takes precedence
     if "--all" in sys.argv:
         print("🔄 RUNNING ALL REPLACEMENTS (ESME, DATASET, STEERING WHEEL)")
         print("="*50)
 
         # ESME
-        esme_manifest_path = os.path.join(project_path, "esme_manifest_issp_roudi.json")
-        if not os.path.exists(esme_manifest_path):
-            esme_manifest_path = os.path.join(project_path, "aos", "yaaac_codegen", "deploy", "carma_0_22", "issp_roudi", "esme", "esme_manifest_issp_roudi.json")
-        if os.path.exists(esme_manifest_path):
+        esme_manifest_path = project_files['esme']
+        if esme_manifest_path:
             print(f"\n📁 Found ESME manifest file: {esme_manifest_path}")
-            apply_esme_replacements(esme_manifest_path, config_path)
+            apply_with_plan(apply_esme_replacements, "esme", esme_manifest_path, config_path, options)
         else:
-            print(f"❌ Error: ESME manifest file not found at:")
-            print(f"   {os.path.join(project_path, 'esme_manifest_issp_roudi.json')}")
-            print(f"   {os.path.join(project_path, 'aos', 'yaaac_codegen', 'deploy', 'carma_0_22', 'issp_roudi', 'esme', 'esme_manifest_issp_roudi.json')}")
+            print(f"❌ Error: ESME manifest file not found in project: {project_path}")
 
         # DATASET/STEERING
-        dataset_path = os.path.join(project_path, "aos", "dataset", "issp_dataset.json")
-        if not os.path.exists(dataset_path):
-            dataset_path = os.path.join(project_path, "issp_dataset.json")
-        if os.path.exists(dataset_path):
+        dataset_path = project_files['dataset']
+        if dataset_path:
             print(f"\n📁 Found dataset file: {dataset_path}")
-            apply_steering_wheel_replacements(dataset_path, config_path)
+            apply_with_plan(apply_steering_wheel_replacements, "steering", dataset_path, config_path, options)
         else:
-            print(f"❌ Error: Dataset file not found at:")
-            print(f"   {os.path.join(project_path, 'aos', 'dataset', 'issp_dataset.json')}")
-            print(f"   {os.path.join(project_path, 'issp_dataset.json')}")
+            print(f"❌ Error: Dataset file not found in project: {project_path}")
 
         sys.exit(0)
 
@@ -560,62 +1378,39 @@ if __name__ == "__main__":
     if "--esme-only" in sys.argv:
         print("🔄 ESME REPLACEMENTS ONLY")
         print("="*50)
-        # Find ESME manifest file - first check project root
-        esme_manifest_path = os.path.join(project_path, "esme_manifest_issp_roudi.json")
-        # If not found in root, try the original subdirectory structure
-        if not os.path.exists(esme_manifest_path):
-            esme_manifest_path = os.path.join(project_path, "aos", "yaaac_codegen", "deploy", "carma_0_22", "issp_roudi", "esme", "esme_manifest_issp_roudi.json")
-        if not os.path.exists(esme_manifest_path):
-            print(f"❌ Error: ESME manifest file not found at:")
-            print(f"   {os.path.join(project_path, 'esme_manifest_issp_roudi.json')}")
-            print(f"   {os.path.join(project_path, 'aos', 'yaaac_codegen', 'deploy', 'carma_0_22', 'issp_roudi', 'esme', 'esme_manifest_issp_roudi.json')}")
+        esme_manifest_path = project_files['esme']
+        if not esme_manifest_path:
+            print(f"❌ Error: ESME manifest file not found in project: {project_path}")
             sys.exit(1)
         print(f"📁 Found ESME manifest file: {esme_manifest_path}")
-        apply_esme_replacements(esme_manifest_path, config_path)
+        apply_with_plan(apply_esme_replacements, "esme", esme_manifest_path, config_path, options)
         sys.exit(0)
 
     # Handle steering wheel replacements
     if "--steering-only" in sys.argv:
         print("🔄 STEERING WHEEL REPLACEMENTS ONLY")
         print("="*50)
-        # Look for dataset file in the correct subdirectory
-        dataset_path = os.path.join(project_path, "aos", "dataset", "issp_dataset.json")
-        # Also check alternative locations
-        if not os.path.exists(dataset_path):
-            # Try the root directory as fallback
-            dataset_path = os.path.join(project_path, "issp_dataset.json")
-        if not os.path.exists(dataset_path):
-            print(f"❌ Error: Dataset file not found at:")
-            print(f"   {os.path.join(project_path, 'aos', 'dataset', 'issp_dataset.json')}")
-            print(f"   {os.path.join(project_path, 'issp_dataset.json')}")
+        dataset_path = project_files['dataset']
+        if not dataset_path:
+            print(f"❌ Error: Dataset file not found in project: {project_path}")
             sys.exit(1)
         print(f"📁 Found dataset file: {dataset_path}")
-        apply_steering_wheel_replacements(dataset_path, config_path)
+        apply_with_plan(apply_steering_wheel_replacements, "steering", dataset_path, config_path, options)
         sys.exit(0)
 
     # Handle dataset-only (generic replacements only)
     if "--dataset-only" in sys.argv:
         print("🔄 DATASET REPLACEMENTS ONLY (GENERIC)")
         print("="*50)
-        # Look for dataset file in the correct subdirectory
-        dataset_path = os.path.join(project_path, "aos", "dataset", "issp_dataset.json")
-        # Also check alternative locations
-        if not os.path.exists(dataset_path):
-            # Try the root directory as fallback
-            dataset_path = os.path.join(project_path, "issp_dataset.json")
-        if not os.path.exists(dataset_path):
-            print(f"❌ Error: Dataset file not found at:")
-            print(f"   {os.path.join(project_path, 'aos', 'dataset', 'issp_dataset.json')}")
-            print(f"   {os.path.join(project_path, 'issp_dataset.json')}")
+        dataset_path = project_files['dataset']
+        if not dataset_path:
+            print(f"❌ Error: Dataset file not found in project: {project_path}")
             sys.exit(1)
         print(f"📁 Found dataset file: {dataset_path}")
-        apply_dataset_replacements(dataset_path, config_path)
+        apply_with_plan(apply_dataset_replacements, "dataset", dataset_path, config_path, options)
         sys.exit(0)
 
     # Default behavior - show available options
     print("ℹ️  Available options:")
-    print("  --all           Apply ESME, dataset, and steering wheel replacements in sequence")
-    print("  --esme-only      Only apply ESME replacements")
-    print("  --steering-only  Only apply steering wheel replacements")
-    print("  --dataset-only   Only apply dataset replacements")
-    print("  --config-path    Path to directory containing configuration JSON files")
+    print_options()
+    print("  --list-runs / --restore [run-id]  Inspect or undo earlier runs")
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Library API
+Applies the set_settings.py replacement modes in-process: a session holds the
+loaded and compiled configuration of one config folder, and every call
+returns a result dict with per-rule hit counts and the byte changes instead of
+printing or exiting. Sessions are read-only after creation and calls share no
+state, so one session can serve many threads.
+
+    session = new_session("etron")
+    for result in apply_to_project(session, "./prj")['results']:
+        print(result['mode'], result['status'], result['applied'])
+"""
+
+import json
+import os
+
+from config_layers import LAYERS_FILE, load_rule_file
+from esme_environment import ENVIRONMENT_SECTION
+from prescan import dataset_anchors, environment_anchors, esme_anchors, file_may_match, steering_anchors
+from project_discovery import discover_project_files
+from regex_rules import REGEX_SECTION, regex_anchors, regex_path_anchors
+from reporter import SILENT, new_reporter
+from set_settings import (compile_dataset_rules, compile_esme_rules, decode_text, encode_text,
+                          transform_dataset_content, transform_esme_content, transform_steering_content)
+from undo_journal import compute_patch, new_run_id, record_change
+
+MODES = ("esme", "dataset", "steering")
+
+# The modes of set_settings.py --all
+DEFAULT_PROJECT_MODES = ("esme", "steering")
+
+ESME_CONFIG_FILE = "esme_replacements.json"
+DATASET_CONFIG_FILE = "issp_dataset_replacements.json"
+STEERING_FALLBACK_FILE = "steering_wheel_replacements.json"
+
+def _load_config(config_path, configs, file_name):
+    if file_name in configs:
+        return configs[file_name]
+    if not config_path:
+        return None
+    return load_rule_file(config_path, file_name)
+
+
+def _esme_entry(esme_config, previous=None):
+    esme_config = esme_config or {}
+    esme_rules = esme_config.get('replacements', [])
+    regex_rules = esme_config.get(REGEX_SECTION, [])
+    environment_rules = esme_config.get(ENVIRONMENT_SECTION, [])
+    if not esme_rules and not regex_rules and not environment_rules:
+        return None
+    key = json.dumps([esme_rules, regex_rules, environment_rules], sort_keys=True)
+    if previous is not None and previous['key'] == key:
+        # A save that leaves the merged rules unchanged keeps the compilation
+        return previous
+    entry = compile_esme_rules(esme_config, new_reporter(SILENT))
+    entry['key'] = key
+    entry['anchors'] = (esme_anchors(esme_rules) + regex_anchors(entry['compiled_regex'])
+                        + environment_anchors(environment_rules))
+    return entry
+
+
+def _dataset_entry(dataset_config):
+    if dataset_config is None:
+        return None
+    entry = compile_dataset_rules(dataset_config, new_reporter(SILENT))
+    entry['anchors'] = dataset_anchors(dataset_config) + regex_path_anchors(entry['compiled_regex'])
+    return entry
+
+
+def _steering_entry(config_path, configs, dataset_config):
+    # Like set_settings.py, the steering rules come from the dataset file and
+    # only fall back to the old steering file if there is no dataset file
+    steering_config = dataset_config
+    if steering_config is None:
+        steering_config = _load_config(config_path, configs, STEERING_FALLBACK_FILE)
+    steering_rules = (steering_config or {}).get('steering_wheel_replacements', {}).get('replacements', [])
+    if not steering_rules:
+        return None
+    return {'rules': steering_rules, 'anchors': steering_anchors(steering_rules)}
+
+
+def new_session(config_path=None, configs=None):
+    """
+    Load and compile the rule files of one configuration.
+
+    Args:
+        config_path (str, optional): Configuration folder (e.g. "etron"); its
+            base layers from config_layers.json are merged in.
+        configs (dict, optional): {file name: parsed config} used instead of
+            (or in addition to) the files in config_path.
+
+    Returns:
+        dict: The session; a mode without rules is None.
+
+    Raises:
+        OSError, ValueError: A rule file exists but cannot be read or parsed.
+    """
+    configs = configs or {}
+    config_path = os.path.abspath(config_path) if config_path else None
+    dataset_config = _load_config(config_path, configs, DATASET_CONFIG_FILE)
+    return {
+        'config_path': config_path,
+        'esme': _esme_entry(_load_config(config_path, configs, ESME_CONFIG_FILE)),
+        'dataset': _dataset_entry(dataset_config),
+        'steering': _steering_entry(config_path, configs, dataset_config),
+    }
+
+
+def reload_session_file(session, file_name):
+    """
+    Recompile only the modes that depend on one changed rule file (of any
+    layer of the configuration).
+
+    Returns:
+        tuple: (new session sharing the other modes' compiled rules, list of
+        the recompiled modes)
+
+    Raises:
+        OSError, ValueError: The rule file cannot be read or parsed.
+    """
+    config_path = session['config_path']
+    if file_name == LAYERS_FILE:
+        # Different base layers can change every rule file
+        return new_session(config_path), list(MODES)
+    updated = dict(session)
+    if file_name == ESME_CONFIG_FILE:
+        updated['esme'] = _esme_entry(_load_config(config_path, {}, ESME_CONFIG_FILE), session['esme'])
+        return updated, ['esme']
+    if file_name in (DATASET_CONFIG_FILE, STEERING_FALLBACK_FILE):
+        dataset_config = _load_config(config_path, {}, DATASET_CONFIG_FILE)
+        updated['steering'] = _steering_entry(config_path, {}, dataset_config)
+        if file_name == DATASET_CONFIG_FILE:
+            updated['dataset'] = _dataset_entry(dataset_config)
+            return updated, ['dataset', 'steering']
+        return updated, ['steering']
+    return updated, []
+
+
+def _transform_steering(content, config, options, reporter):
+    return transform_steering_content(content, config['rules'], options, reporter)
+
+
+# The rule loops of set_settings.py, so the output equals the command line's
+_TRANSFORMS = {'esme': transform_esme_content, 'dataset': transform_dataset_content, 'steering': _transform_steering}
+
+
+def _check_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}' (choose from {', '.join(MODES)})")
+
+
+def transform_content(session, mode, content, rule_budget=None):
+    """
+    Apply one mode's rules to text without touching any file.
+
+    Args:
+        rule_budget (float, optional): Seconds a whitespace-flexible dataset
+            rule may take (set_settings.py --rule-budget).
+
+    Returns:
+        tuple: (new content, list of {'description', 'hits'}, list of error messages)
+    """
+    _check_mode(mode)
+    if session[mode] is None:
+        return content, [], []
+    return _TRANSFORMS[mode](content, session[mode], {'rule_budget': rule_budget}, new_reporter(SILENT))
+
+
+def _new_result(mode, file_path):
+    return {
+        'mode': mode,
+        'file': file_path,
+        'status': 'unchanged',
+        'applied': 0,
+        'rules': [],
+        'changes': [],
+        'bytes_before': None,
+        'bytes_after': None,
+        'errors': [],
+    }
+
+
+def apply_file(session, mode, file_path, write=True, journal=True, run_id=None, prescan=True, rule_budget=None):
+    """
+    Apply one mode to one file.
+
+    Args:
+        session (dict): From new_session().
+        mode (str): 'esme', 'dataset' or 'steering'.
+        file_path (str): File to modify.
+        write (bool): Write the result; with False the new text is returned as
+            result['content'] and the file is left alone.
+        journal (bool): Record the change in the undo journal (when writing).
+        run_id (str, optional): Journal run id (default: a new one).
+        prescan (bool): Skip the file if no rule's anchor occurs in it.
+        rule_budget (float, optional): Seconds a whitespace-flexible dataset rule may take.
+
+    Raises:
+        ValueError: Unknown mode.
+
+    Returns:
+        dict: 'status' ('changed', 'unchanged', 'skipped', 'no-config' or
+        'error'), 'applied' (rules that hit), 'rules' (hits per rule in rule
+        order), 'changes' ((start, end, replacement bytes) edits of the
+        original file), 'bytes_before', 'bytes_after' and 'errors'.
+    """
+    _check_mode(mode)
+    result = _new_result(mode, file_path)
+    if session[mode] is None:
+        result['status'] = 'no-config'
+        return result
+    try:
+        if prescan and not file_may_match(file_path, session[mode]['anchors']):
+            result['status'] = 'skipped'
+            return result
+        with open(file_path, 'rb') as f:
+            old_data = f.read()
+        # Read and written like set_settings.py does (text mode), so the files are identical
+        old_content = decode_text(old_data)
+        new_content, result['rules'], result['errors'] = transform_content(session, mode, old_content, rule_budget)
+        new_data = encode_text(new_content) if new_content != old_content else old_data
+        result['applied'] = sum(1 for rule in result['rules'] if rule['hits'])
+        result['bytes_before'] = len(old_data)
+        result['bytes_after'] = len(new_data)
+        if new_data != old_data:
+            result['status'] = 'changed'
+            result['changes'] = compute_patch(old_data, new_data)
+            if write:
+                with open(file_path, 'wb') as f:
+                    f.write(new_data)
+                if journal:
+                    record_change(file_path, old_data, new_data, run_id or new_run_id(), mode)
+        if not write:
+            result['content'] = new_content
+    except Exception as e:
+        result['status'] = 'error'
+        result['errors'].append(str(e))
+    return result
+
+
+def apply_to_project(session, project_path, modes=DEFAULT_PROJECT_MODES, write=True, journal=True, run_id=None,
+                     prescan=True, use_cache=True, rule_budget=None):
+    """
+    Locate a project's manifests and apply the given modes in order.
+
+    The ESME mode works on the ESME manifest, the dataset and steering modes
+    on the dataset file; all changes of the call share one journal run id.
+
+    Returns:
+        dict: {'project', 'run_id', 'files' (discovery result), 'results'
+        (one apply_file() result per mode; status 'missing' if the file was
+        not found)}
+    """
+    files = discover_project_files(project_path, use_cache=use_cache)
+    run_id = run_id or new_run_id()
+    results = []
+    for mode in modes:
+        file_path = files['esme'] if mode == 'esme' else files['dataset']
+        if not file_path:
+            result = _new_result(mode, None)
+            result['status'] = 'missing'
+            results.append(result)
+            continue
+        results.append(apply_file(session, mode, file_path, write, journal, run_id, prescan, rule_budget))
+    return {'project': project_path, 'run_id': run_id, 'files': files, 'results': results}
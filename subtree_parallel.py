@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Parallel Subtree Transforms
+Runs a transform of the parsed dataset (ASCII paths, steering values) on its
+top-level members in worker processes. Members holding a large share of the
+file (the 'cameras' object) are split once more into their own members. A
+bracket scan locates the raw text of every subtree; each worker parses one
+slice, transforms it and returns the re-serialized text only if it differs.
+The parent joins the pieces into exactly what json.dumps(data, indent=2) of
+the whole transformed document would produce.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import json_backend
+from chunked_search import PARALLEL_MIN_BYTES
+from offset_index import scan_offsets, split_pointer
+
+# Text allowed between two members of one object: the comma, the next key
+# and its colon. Anything else (duplicate keys, comments) means the document
+# is not split.
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_FIRST_GAP = re.compile(rb'\{\s*' + _STRING.encode() + rb'\s*:\s*')
+_GAP = re.compile(rb'\s*,\s*' + _STRING.encode() + rb'\s*:\s*')
+_LAST_GAP = re.compile(rb'\s*\}\s*')
+
+
+def _members(entries, data, prefix, start, end):
+    """(key, start, end) of the members of the object at data[start:end], or None"""
+    depth = len(split_pointer(prefix)) + 1
+    members = sorted(((split_pointer(pointer)[-1], span[0], span[1]) for pointer, span in entries.items()
+                      if pointer.startswith(prefix + "/") and len(split_pointer(pointer)) == depth),
+                     key=lambda member: member[1])
+    if not members:
+        return None
+    position = start
+    for index, (_, member_start, member_end) in enumerate(members):
+        gap = _FIRST_GAP if index == 0 else _GAP
+        if not gap.fullmatch(data, position, member_start):
+            return None
+        position = member_end
+    if not _LAST_GAP.fullmatch(data, position, end):
+        return None
+    return members
+
+
+def plan_subtrees(data, workers):
+    """
+    Split a JSON object document into subtree jobs.
+
+    Returns:
+        tuple: (layout, jobs) or None if the document is not an object with
+        members. jobs are (key, parent path, start, end, depth); layout lists
+        (key, job index) for whole members and (key, [(key, job index)]) for
+        split ones.
+    """
+    stripped_start = len(data) - len(data.lstrip())
+    stripped_end = len(data.rstrip())
+    if data[stripped_start:stripped_start + 1] != b"{":
+        return None
+    entries = scan_offsets(data, max_depth=2)
+    top = _members(entries, data, "", stripped_start, stripped_end)
+    if top is None:
+        return None
+
+    split_size = len(data) // max(workers, 1)
+    layout, jobs = [], []
+    for key, start, end in top:
+        members = None
+        if end - start > split_size and data[start:start + 1] == b"{":
+            prefix = "/" + key.replace("~", "~0").replace("/", "~1")
+            members = _members(entries, data, prefix, start, end)
+        if members is None:
+            layout.append((key, len(jobs)))
+            jobs.append((key, "", start, end, 1))
+        else:
+            layout.append((key, [(member_key, len(jobs) + index) for index, (member_key, _, _) in enumerate(members)]))
+            jobs.extend((member_key, key, member_start, member_end, 2)
+                        for member_key, member_start, member_end in members)
+    return layout, jobs
+
+
+def _run_subtree(transform, key, path, text, depth, rules, level):
+    # Worker: parse one member, transform it as {key: value} so the transform
+    # sees the key exactly as in a walk of the whole document
+    data, result = transform({key: json_backend.loads(text)}, path, rules, level)
+    new_text = json_backend.dumps(data[key], indent=2).replace("\n", "\n" + "  " * depth)
+    return (None if new_text.encode('utf-8') == text else new_text), result
+
+
+def _run_batch(transform, batch, rules, level):
+    return [_run_subtree(transform, key, path, text, depth, rules, level) for key, path, text, depth in batch]
+
+
+def _batches(jobs, data, count):
+    """Jobs grouped into about `count` batches of similar byte size, in order"""
+    target = max(-(-len(data) // count), 1)
+    batches, current, size = [], [], 0
+    for key, path, start, end, depth in jobs:
+        current.append((key, path, data[start:end], depth))
+        size += end - start
+        if size >= target:
+            batches.append(current)
+            current, size = [], 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def transform_subtrees(content, transform, rules, level, workers=None, min_bytes=PARALLEL_MIN_BYTES):
+    """
+    Apply `transform` to every subtree of a JSON document in worker processes.
+
+    Args:
+        content (str): The document (a JSON object).
+        transform (callable): Module-level function
+            transform(data, path, rules, level) -> (data, result), called with
+            a one-member dict {key: value} and the dotted path of its parent.
+        rules: Passed to every transform call.
+        level (int): Reporter level for events the transform captures.
+        workers (int, optional): Worker processes (default: CPU count).
+        min_bytes (int): Smaller documents are not split.
+
+    Returns:
+        tuple: (new content, [result per subtree in document order]), or None
+        if the document cannot be split (not an object, too small, unusual
+        layout); the caller then transforms it as a whole.
+    """
+    workers = workers or os.cpu_count() or 1
+    data = content.encode('utf-8')
+    if len(data) < min_bytes:
+        return None
+    plan = plan_subtrees(data, workers)
+    if plan is None:
+        return None
+    layout, jobs = plan
+
+    # A few batches per worker keep the load even without pickling every
+    # small member separately
+    outputs = []
+    batches = _batches(jobs, data, workers * 4)
+    if workers == 1 or len(batches) == 1:
+        for batch in batches:
+            outputs.extend(_run_batch(transform, batch, rules, level))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_batch, transform, batch, rules, level) for batch in batches]
+            for future in futures:
+                outputs.extend(future.result())
+
+    def text_of(index):
+        new_text = outputs[index][0]
+        if new_text is None:
+            _, _, start, end, _ = jobs[index]
+            return data[start:end].decode('utf-8')
+        return new_text
+
+    parts = []
+    for key, placement in layout:
+        if isinstance(placement, int):
+            value_text = text_of(placement)
+        else:
+            value_text = "{\n" + ",\n".join(f"    {json.dumps(member_key)}: {text_of(index)}"
+                                            for member_key, index in placement) + "\n  }"
+        parts.append(f"  {json.dumps(key)}: {value_text}")
+    return "{\n" + ",\n".join(parts) + "\n}", [result for _, result in outputs]
@@ -0,0 +1,15 @@
+"""--compare takes its files from the arguments right after it, never from other flags' values."""
+
+import pytest
+
+from benchmark import _compare_files
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["--compare", "base.json", "--threshold", "0.2"], ["base.json"]),
+    (["--compare", "base.json", "current.json", "--threshold", "0.2"], ["base.json", "current.json"]),
+    (["--sizes", "small", "--compare", "base.json", "--repeat", "3", "--output", "out.json"], ["base.json"]),
+    (["--compare", "--threshold", "0.2"], []),
+])
+def test_compare_files(argv, expected):
+    assert _compare_files(["benchmark.py"] + argv) == expected
@@ -0,0 +1,51 @@
+"""A pair reached through a symlink must be planned like the same pair on its real path."""
+
+import json
+import os
+import subprocess
+
+import pytest
+
+from ci_runner import load_matrix, plan_runs
+
+pytestmark = pytest.mark.skipif(subprocess.run(["git", "--version"], capture_output=True).returncode != 0,
+                                reason="git is not available")
+
+
+def _git(repo_dir, *args):
+    subprocess.run(["git", "-C", repo_dir, "-c", "user.name=ci", "-c", "user.email=ci@example.com"] + list(args),
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def mono(tmp_path):
+    repo_dir = tmp_path / "real" / "mono"
+    (repo_dir / "cfg").mkdir(parents=True)
+    (repo_dir / "prj").mkdir()
+    (repo_dir / "cfg" / "issp_dataset_replacements.json").write_text('{"replacements": []}')
+    (repo_dir / "prj" / "issp_dataset.json").write_text('{}')
+    (repo_dir / "ci_matrix.json").write_text(json.dumps({'pairs': [{'project': "prj", 'config': "cfg"}]}))
+    _git(str(repo_dir), "init", "-q")
+    _git(str(repo_dir), "add", "-A")
+    _git(str(repo_dir), "commit", "-q", "-m", "base")
+    _git(str(repo_dir), "branch", "base")
+    (repo_dir / "cfg" / "issp_dataset_replacements.json").write_text('{"replacements": [{"from": "a", "to": "b"}]}')
+    (tmp_path / "link").symlink_to(tmp_path / "real")
+    return tmp_path
+
+
+@pytest.mark.parametrize("root", ["real", "link"])
+def test_config_change_is_planned_through_a_symlink(mono, root):
+    pairs = load_matrix(str(mono / root / "mono" / "ci_matrix.json"))
+    planned = plan_runs(pairs, "base", use_cache=False)
+    assert planned[0]['action'] == 'run'
+    assert planned[0]['reason'] == "config changed: issp_dataset_replacements.json"
+
+
+@pytest.mark.parametrize("root", ["real", "link"])
+def test_manifest_change_is_planned_through_a_symlink(mono, root):
+    _git(str(mono / "real" / "mono"), "checkout", "-q", "--", "cfg")
+    (mono / "real" / "mono" / "prj" / "issp_dataset.json").write_text('{"a": 1}')
+    pairs = load_matrix(str(mono / root / "mono" / "ci_matrix.json"))
+    planned = plan_runs(pairs, "base", use_cache=False)
+    assert (planned[0]['action'], planned[0]['reason']) == ('run', "manifest changed: issp_dataset.json")
@@ -0,0 +1,89 @@
+"""Whitespace-flexible matching must find what the old '\\s*' regex found, in linear time."""
+
+import json
+import os
+import re
+import time
+
+import pytest
+
+from flexible_match import flexible_replace
+from generate_test_data import generate_dataset
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _regex_replace(content, from_pattern, to_pattern):
+    """The matcher flexible_match.py replaced: every escaped space became \\s*"""
+    pattern = re.escape(from_pattern).replace(r'\ ', r'\s*')
+    return re.subn(pattern, lambda match: to_pattern, content, flags=re.DOTALL)
+
+
+def _flexible_rules(config):
+    with open(os.path.join(REPO_DIR, config, "issp_dataset_replacements.json")) as f:
+        replacements = json.load(f)['replacements']
+    rules = []
+    for replacement in replacements:
+        from_patterns = replacement['from'] if isinstance(replacement['from'], list) else [replacement['from']]
+        rules += [(from_pattern, replacement['to']) for from_pattern in from_patterns
+                  if '[' in from_pattern and ']' in from_pattern]
+    return rules
+
+
+@pytest.mark.parametrize("config", ["bmw_f11", "zotac"])
+@pytest.mark.parametrize("indent", [None, 2, 4])
+def test_shipped_reference_table_rules_match_like_the_regex(config, indent):
+    rules = _flexible_rules(config)
+    assert rules
+    content = json.dumps(generate_dataset(cameras=2, path_fields=1, depth=1), indent=indent)
+    for from_pattern, to_pattern in rules:
+        expected = _regex_replace(content, from_pattern, to_pattern)
+        if expected[1]:
+            assert flexible_replace(content, from_pattern, to_pattern) == expected
+
+
+@pytest.mark.parametrize("config", ["bmw_f11", "zotac"])
+def test_converted_table_is_a_fast_miss(config):
+    content = json.dumps(generate_dataset(cameras=50, path_fields=1, depth=1), indent=2)
+    for from_pattern, to_pattern in _flexible_rules(config):
+        content, _ = flexible_replace(content, from_pattern, to_pattern)
+    start = time.perf_counter()
+    for from_pattern, to_pattern in _flexible_rules(config):
+        assert flexible_replace(content, from_pattern, to_pattern)[1] == 0
+    assert time.perf_counter() - start < 5
+
+
+@pytest.mark.parametrize("content, from_pattern", [
+    ('{"model path": [1, 2]}', 'model path": [1,  2]'),
+    ('{"model path": [\n  1,\n  2\n]}', 'path": [ 1, 2 ]'),
+    ('{"a": [1, 2], "next key": 3}', '[1, 2], "next key'),
+    ('{"a": [1, 2], "next  key": 3}', '[1, 2], "next  key'),
+])
+def test_pattern_starting_or_ending_inside_a_string(content, from_pattern):
+    new_content, count = flexible_replace(content, from_pattern, "X")
+    assert count == 1
+    assert "X" in new_content
+    expected = _regex_replace(content, from_pattern, "X")
+    if expected[1]:
+        assert (new_content, count) == expected
+
+
+def test_whitespace_inside_strings_must_match_exactly():
+    assert flexible_replace('{"model path": [1]}', '"modelpath": [1]', "X")[1] == 0
+    assert flexible_replace('{"model  path": [1]}', 'model path": [1]', "X")[1] == 0
+
+
+def test_budget_aborts_a_rule():
+    content = "[" + " 4," * 200000 + " 3]"
+    with pytest.raises(TimeoutError):
+        flexible_replace(content, "[4, 4, 5]", "X", "slow rule", budget=0)
+
+
+def test_cache_is_owned_by_the_caller():
+    content = json.dumps(generate_dataset(cameras=2, path_fields=1, depth=1), indent=2)
+    cache = {}
+    flexible_replace(content, '"reference_table_model_logit_with_seatbelt_status": [9]', "X", cache=cache)
+    assert cache['content'] is content
+    view = cache['view']
+    flexible_replace(content, '"reference_table_model_logit_with_seatbelt_status": [8]', "X", cache=cache)
+    assert cache['view'] is view
@@ -0,0 +1,47 @@
+"""Patch plans are only recorded for complete runs, under the options that produced them."""
+
+import os
+
+from patch_plans import config_fingerprint, load_plans
+from rule_analyzer import RULE_FILES
+from set_settings import _mark_incomplete, apply_with_plan
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(tmp_path, monkeypatch, apply_function):
+    monkeypatch.setenv("JSON_TOOLS_DATA_DIR", str(tmp_path / "store"))
+    file_path = tmp_path / "dataset.json"
+    file_path.write_text('{"a": 1}')
+    options = {'plans': True, 'journal': False, 'rule_budget': None}
+    assert apply_with_plan(apply_function, "dataset", str(file_path), os.path.join(REPO_DIR, "etron"), options)
+    assert 'incomplete' not in options
+    return load_plans(str(tmp_path / "store"))
+
+
+def _change(file_path):
+    with open(file_path, 'w') as f:
+        f.write('{"a": 2}')
+
+
+def test_complete_run_is_recorded(tmp_path, monkeypatch):
+    def apply_function(file_path, config_path, options):
+        _change(file_path)
+        return True
+    assert len(_run(tmp_path, monkeypatch, apply_function)) == 1
+
+
+def test_incomplete_run_is_not_recorded(tmp_path, monkeypatch):
+    def apply_function(file_path, config_path, options):
+        _change(file_path)
+        _mark_incomplete(options, "rule timeout")
+        return True
+    assert _run(tmp_path, monkeypatch, apply_function) == {}
+
+
+def test_rule_budget_is_part_of_the_key():
+    config_dir = os.path.join(REPO_DIR, "etron")
+    assert (config_fingerprint(config_dir, RULE_FILES, {'rule_budget': None})
+            == config_fingerprint(config_dir, RULE_FILES))
+    assert (config_fingerprint(config_dir, RULE_FILES, {'rule_budget': 5.0})
+            != config_fingerprint(config_dir, RULE_FILES))
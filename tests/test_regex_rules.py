@@ -0,0 +1,39 @@
+"""Group renaming must follow the regex syntax, and a rule that cannot be combined is skipped, not fatal."""
+
+import pytest
+
+from regex_rules import apply_regex_rules, compile_regex_rules
+from reporter import SILENT, new_reporter
+
+
+def _apply(rules, data):
+    compiled = compile_regex_rules(rules, new_reporter(SILENT))
+    new_data, _, hits = apply_regex_rules(data, compiled)
+    return new_data, hits
+
+
+def test_conditional_group_reference_is_renamed():
+    rules = [{'pattern': '(?P<q>")?abc(?(q)")', 'template': "X{q}"}]
+    assert _apply(rules, b'"abc" abc') == (b'X" X', [2])
+
+
+def test_group_after_escaped_backslashes_is_renamed():
+    rules = [{'pattern': r'\\\\(?P<m>\w+)', 'template': "{m}"}]
+    assert _apply(rules, b'C:\\\\foo') == (b'C:foo', [1])
+
+
+def test_group_syntax_inside_a_character_class_is_literal():
+    rules = [{'pattern': r'[(?P<k>]+q', 'template': "C"}]
+    assert _apply(rules, b'(?P<k>q') == (b'C', [1])
+
+
+def test_same_group_names_in_several_rules():
+    rules = [{'pattern': r'a(?P<n>\d)(?P=n)', 'template': "A{n}"},
+             {'pattern': r'b(?P<n>\d)', 'template': "B{n}"}]
+    assert _apply(rules, b'a11 b2') == (b'A1 B2', [1, 1])
+
+
+@pytest.mark.parametrize("pattern", [r'(a)\1', r'(?P<x>z)(?(1)y)', '(?i)DEF', '(unclosed', 'a*'])
+def test_unusable_rule_is_skipped(pattern):
+    rules = [{'pattern': pattern, 'template': "n"}, {'pattern': "def", 'template': "DEF"}]
+    assert _apply(rules, b'def') == (b'DEF', [None, 1])
@@ -0,0 +1,65 @@
+"""Single-pass application must give the same output as sequential str.replace for every rule set the analyzer accepts."""
+
+import json
+import os
+import random
+
+import pytest
+
+from generate_test_data import generate_esme_manifest
+from rule_analyzer import analyze_text_rules, is_single_pass_safe
+from set_settings import apply_rules_single_pass
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sequential(content, rules):
+    hits = []
+    for rule in rules:
+        hits.append(content.count(rule['from']))
+        content = content.replace(rule['from'], rule['to'])
+    return content, hits
+
+
+def _random_text(rng, alphabet, low, high):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def test_output_inside_later_pattern_is_a_cascade():
+    rules = [{'from': "foo", 'to': "X"}, {'from': "aXb", 'to': "Y"}]
+    findings = analyze_text_rules(rules)
+    assert [finding['type'] for finding in findings] == ["CASCADE"]
+    assert not is_single_pass_safe(findings)
+    assert _sequential("afoob", rules)[0] == "Y"
+
+
+def test_duplicate_rule_cascading_into_itself_blocks_single_pass():
+    rules = [{'from': "a", 'to': "ba"}, {'from': "a", 'to': "ba"}]
+    assert not is_single_pass_safe(analyze_text_rules(rules))
+
+
+# Quotes are left out: the analyzer relies on the text being valid JSON for
+# patterns that share a quote
+@pytest.mark.parametrize("seed", range(4))
+def test_single_pass_matches_sequential_on_random_rule_sets(seed):
+    rng = random.Random(seed)
+    checked = 0
+    for _ in range(5000):
+        rules = [{'from': _random_text(rng, "abX", 1, 3), 'to': _random_text(rng, "abX", 1, 3)}
+                 for _ in range(rng.randint(1, 4))]
+        if not is_single_pass_safe(analyze_text_rules(rules)):
+            continue
+        for _ in range(5):
+            content = _random_text(rng, "abX", 0, 12)
+            assert apply_rules_single_pass(content, rules) == _sequential(content, rules), (rules, content)
+            checked += 1
+    assert checked > 1000
+
+
+@pytest.mark.parametrize("config", ["etron", "bmw_f11", "zotac"])
+def test_shipped_esme_rules_single_pass_matches_sequential(config):
+    with open(os.path.join(REPO_DIR, config, "esme_replacements.json")) as f:
+        rules = json.load(f)['replacements']
+    assert is_single_pass_safe(analyze_text_rules(rules))
+    content = json.dumps(generate_esme_manifest(processes=3), indent=2)
+    assert apply_rules_single_pass(content, rules) == _sequential(content, rules)
@@ -0,0 +1,79 @@
+"""The library API runs the command line's rule loops, so both write the same files."""
+
+import os
+import shutil
+
+import pytest
+
+from generate_test_data import write_project
+from reporter import SILENT, new_reporter
+from set_settings import apply_dataset_replacements, apply_esme_replacements, apply_steering_wheel_replacements
+from settings_session import apply_file, new_session
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI = {'esme': apply_esme_replacements, 'dataset': apply_dataset_replacements,
+       'steering': apply_steering_wheel_replacements}
+
+
+def _options():
+    return {'journal': False, 'prescan': True, 'reporter': new_reporter(SILENT)}
+
+
+def _read(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def projects(tmp_path):
+    files = write_project(str(tmp_path / "cli"), cameras=4, processes=3)
+    shutil.copytree(str(tmp_path / "cli"), str(tmp_path / "session"))
+    return tmp_path, files
+
+
+def _to_crlf(file_path):
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    with open(file_path, 'wb') as f:
+        f.write(data.replace(b"\n", b"\r\n"))
+
+
+@pytest.mark.parametrize("config", ["etron", "bmw_f11", "zotac"])
+@pytest.mark.parametrize("mode", ["esme", "dataset", "steering"])
+@pytest.mark.parametrize("crlf", [False, True])
+def test_session_writes_what_the_command_line_writes(projects, config, mode, crlf):
+    tmp_path, files = projects
+    name = os.path.basename(files['esme'] if mode == 'esme' else files['dataset'])
+    cli_path, session_path = str(tmp_path / "cli" / name), str(tmp_path / "session" / name)
+    if crlf:
+        _to_crlf(cli_path)
+        _to_crlf(session_path)
+    original = _read(session_path)
+    config_path = os.path.join(REPO_DIR, config)
+    assert CLI[mode](cli_path, config_path, _options())
+    result = apply_file(new_session(config_path), mode, session_path, journal=False)
+    assert result['errors'] == []
+    assert _read(session_path) == _read(cli_path)
+    if _read(session_path) != original:
+        assert result['status'] == 'changed'
+    else:
+        assert result['status'] in ('unchanged', 'skipped', 'no-config')
+
+
+def test_steering_without_hits_leaves_the_file_alone(tmp_path):
+    files = write_project(str(tmp_path), cameras=4, processes=1)
+    config_path = os.path.join(REPO_DIR, "etron")
+    session = new_session(config_path)
+    assert apply_file(session, "steering", files['dataset'], journal=False)['status'] == 'changed'
+    before = _read(files['dataset'])
+    result = apply_file(session, "steering", files['dataset'], journal=False)
+    assert result['status'] == 'unchanged'
+    assert _read(files['dataset']) == before
+
+
+def test_rule_budget_reaches_the_dataset_rules(tmp_path):
+    files = write_project(str(tmp_path), cameras=4, processes=1)
+    result = apply_file(new_session(os.path.join(REPO_DIR, "bmw_f11")), "dataset", files['dataset'], write=False,
+                        rule_budget=0)
+    assert any("time budget" in error for error in result['errors'])
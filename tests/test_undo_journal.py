@@ -0,0 +1,43 @@
+"""Recording a change must not depend on reading the whole journal."""
+
+import os
+
+import undo_journal
+from undo_journal import JOURNAL_FILE, get_object, read_journal, record_change
+
+
+def test_base_is_stored_once_per_file_chain(tmp_path):
+    store_dir = str(tmp_path / "store")
+    record_change("a.json", b"1", b"2", "run1", store_dir=store_dir)
+    record_change("a.json", b"2", b"3", "run2", store_dir=store_dir)
+    # Edited outside the tool: the new base is stored
+    record_change("a.json", b"7", b"8", "run3", store_dir=store_dir)
+    assert get_object(undo_journal.content_hash(b"1"), store_dir) == b"1"
+    assert get_object(undo_journal.content_hash(b"2"), store_dir) is None
+    assert get_object(undo_journal.content_hash(b"7"), store_dir) == b"7"
+
+
+def test_record_change_reads_only_new_journal_lines(tmp_path, monkeypatch):
+    store_dir = str(tmp_path / "store")
+    for number in range(50):
+        record_change(f"file{number % 5}.json", f"{number // 5}".encode(), f"{number // 5 + 1}".encode(), "run",
+                      store_dir=store_dir)
+    monkeypatch.setattr(undo_journal, "read_journal", None)
+    record_change("file0.json", b"10", b"x", "run", store_dir=store_dir)
+    monkeypatch.undo()
+    assert len(read_journal(store_dir)) == 51
+    assert get_object(undo_journal.content_hash(b"10"), store_dir) is None
+
+
+def test_index_rebuilt_when_missing_or_stale(tmp_path):
+    store_dir = str(tmp_path / "store")
+    record_change("a.json", b"0", b"1", "run0", store_dir=store_dir)
+    record_change("a.json", b"1", b"2", "run1", store_dir=store_dir)
+    os.remove(os.path.join(store_dir, undo_journal.JOURNAL_INDEX_FILE))
+    record_change("a.json", b"2", b"3", "run2", store_dir=store_dir)
+    assert get_object(undo_journal.content_hash(b"2"), store_dir) is None
+    # A replaced, shorter journal is indexed from the start
+    with open(os.path.join(store_dir, JOURNAL_FILE), 'w'):
+        pass
+    record_change("a.json", b"3", b"4", "run3", store_dir=store_dir)
+    assert get_object(undo_journal.content_hash(b"3"), store_dir) == b"3"
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Undo Journal
+Records every file change as a compressed reverse patch instead of a full
+backup copy. Base files are kept once in a content-addressed store shared by
+all projects, and any earlier state can be rebuilt with restore_run().
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import zlib
+from difflib import SequenceMatcher
+
+JOURNAL_FILE = "journal.jsonl"
+# Latest post-change hash per file and the journal offset it covers
+JOURNAL_INDEX_FILE = "journal_index.json"
+
+_COMPARE_BLOCK = 64 * 1024
+
+# Regions without anchor lines larger than this (lines x lines) are stored
+# as one replacement instead of being diffed with SequenceMatcher
+_MAX_GAP_DIFF = 40000
+
+
+def get_store_dir():
+    """Directory holding the journal and object store (JSON_TOOLS_DATA_DIR or XDG data dir)"""
+    store_dir = os.environ.get("JSON_TOOLS_DATA_DIR")
+    if not store_dir:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        store_dir = os.path.join(base, "json_tools")
+    return store_dir
+
+
+def new_run_id():
+    """Sortable, unique id for one tool invocation"""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(2)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _to_bytes(data):
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+# === Content-addressed object store ===
+
+def _object_path(store_dir, digest):
+    return os.path.join(store_dir, "objects", digest[:2], digest[2:])
+
+
+def put_object(data, store_dir=None):
+    """Store bytes compressed under their SHA-256; identical data is stored once"""
+    store_dir = store_dir or get_store_dir()
+    digest = content_hash(data)
+    path = _object_path(store_dir, digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(temp_path, path)
+    return digest
+
+
+def get_object(digest, store_dir=None):
+    """Return stored bytes, or None if the object is not in the store"""
+    path = _object_path(store_dir or get_store_dir(), digest)
+    try:
+        with open(path, 'rb') as f:
+            return zlib.decompress(f.read())
+    except OSError:
+        return None
+
+
+def has_object(digest, store_dir=None):
+    return os.path.exists(_object_path(store_dir or get_store_dir(), digest))
+
+
+# === Byte-range patches ===
+
+def _common_prefix_length(a, b):
+    limit = min(len(a), len(b))
+    low = 0
+    while low + _COMPARE_BLOCK <= limit and a[low:low + _COMPARE_BLOCK] == b[low:low + _COMPARE_BLOCK]:
+        low += _COMPARE_BLOCK
+    high = min(low + _COMPARE_BLOCK, limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _line_offsets(lines):
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def _unique_line_anchors(source_lines, target_lines):
+    """
+    Pairs (i, j) of lines that occur exactly once in both sequences, reduced to
+    the longest run that is increasing in both (patience diff anchors).
+    """
+    counts = {}
+    for line in source_lines:
+        counts[line] = counts.get(line, 0) + 1
+    target_index = {}
+    for j, line in enumerate(target_lines):
+        target_index[line] = None if line in target_index else j
+    pairs = [(i, target_index[line]) for i, line in enumerate(source_lines)
+             if counts[line] == 1 and target_index.get(line) is not None]
+
+    # Longest increasing subsequence on j
+    tails = []
+    tail_pairs = []
+    previous = [None] * len(pairs)
+    for position, (_, j) in enumerate(pairs):
+        low, high = 0, len(tails)
+        while low < high:
+            mid = (low + high) // 2
+            if tails[mid] < j:
+                low = mid + 1
+            else:
+                high = mid
+        previous[position] = tail_pairs[low - 1] if low else None
+        if low == len(tails):
+            tails.append(j)
+            tail_pairs.append(position)
+        else:
+            tails[low] = j
+            tail_pairs[low] = position
+    anchors = []
+    position = tail_pairs[-1] if tail_pairs else None
+    while position is not None:
+        anchors.append(pairs[position])
+        position = previous[position]
+    return anchors[::-1]
+
+
+def _diff_lines(source_lines, target_lines):
+    """
+    Line edits (i1, i2, j1, j2) turning source_lines into target_lines.
+
+    Patience-style: lines unique to both sides of a region split it into
+    smaller regions, recursively; regions without such anchors are diffed
+    with SequenceMatcher when small and replaced as a whole otherwise.
+    """
+    opcodes = []
+    regions = [(0, len(source_lines), 0, len(target_lines))]
+    while regions:
+        i1, i2, j1, j2 = regions.pop()
+        while i1 < i2 and j1 < j2 and source_lines[i1] == target_lines[j1]:
+            i1 += 1
+            j1 += 1
+        while i1 < i2 and j1 < j2 and source_lines[i2 - 1] == target_lines[j2 - 1]:
+            i2 -= 1
+            j2 -= 1
+        if i1 == i2 and j1 == j2:
+            continue
+        if i1 == i2 or j1 == j2:
+            opcodes.append((i1, i2, j1, j2))
+            continue
+        anchors = _unique_line_anchors(source_lines[i1:i2], target_lines[j1:j2])
+        if anchors:
+            i, j = i1, j1
+            for anchor_i, anchor_j in anchors:
+                regions.append((i, i1 + anchor_i, j, j1 + anchor_j))
+                i, j = i1 + anchor_i + 1, j1 + anchor_j + 1
+            regions.append((i, i2, j, j2))
+        elif (i2 - i1) * (j2 - j1) <= _MAX_GAP_DIFF:
+            matcher = SequenceMatcher(None, source_lines[i1:i2], target_lines[j1:j2], autojunk=False)
+            for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+                if tag != 'equal':
+                    opcodes.append((i1 + a1, i1 + a2, j1 + b1, j1 + b2))
+        else:
+            opcodes.append((i1, i2, j1, j2))
+    opcodes.sort()
+    return opcodes
+
+
+def compute_patch(source, target):
+    """
+    Byte-range edits that turn `source` into `target`.
+
+    Common prefix and suffix are trimmed first. The middle is diffed line by
+    line (see _diff_lines), so localized edits give small patches even in
+    files full of repeated lines such as ASCII arrays.
+
+    Returns:
+        list: (start, end, replacement) tuples in source offsets, in order.
+    """
+    prefix = _common_prefix_length(source, target)
+    limit = min(len(source), len(target)) - prefix
+    suffix = _common_prefix_length(source[::-1][:limit], target[::-1][:limit])
+    source_mid = source[prefix:len(source) - suffix]
+    target_mid = target[prefix:len(target) - suffix]
+    if not source_mid or not target_mid:
+        return [(prefix, prefix + len(source_mid), target_mid)] if source_mid or target_mid else []
+
+    source_lines = source_mid.splitlines(keepends=True)
+    target_lines = target_mid.splitlines(keepends=True)
+    source_offsets = _line_offsets(source_lines)
+    target_offsets = _line_offsets(target_lines)
+    return [(prefix + source_offsets[i1], prefix + source_offsets[i2],
+             target_mid[target_offsets[j1]:target_offsets[j2]])
+            for i1, i2, j1, j2 in _diff_lines(source_lines, target_lines)]
+
+
+def apply_patch(source, patch):
+    """Apply (start, end, replacement) edits produced by compute_patch()"""
+    pieces = []
+    position = 0
+    for start, end, replacement in patch:
+        pieces.append(source[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(source[position:])
+    return b''.join(pieces)
+
+
+def encode_patch(patch):
+    """Serialize a patch: 8-byte header length, JSON header, concatenated payloads"""
+    header = json.dumps([[start, end, len(replacement)] for start, end, replacement in patch]).encode('ascii')
+    return len(header).to_bytes(8, 'big') + header + b''.join(replacement for _, _, replacement in patch)
+
+
+def decode_patch(data):
+    header_length = int.from_bytes(data[:8], 'big')
+    header = json.loads(data[8:8 + header_length])
+    position = 8 + header_length
+    patch = []
+    for start, end, length in header:
+        patch.append((start, end, data[position:position + length]))
+        position += length
+    return patch
+
+
+# === Journal ===
+
+def read_journal(store_dir=None):
+    """All journal entries, oldest first"""
+    path = os.path.join(store_dir or get_store_dir(), JOURNAL_FILE)
+    entries = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except OSError:
+        pass
+    return entries
+
+
+def _append_entry(entry, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, JOURNAL_FILE), 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def _latest_hashes(store_dir):
+    """
+    The post_hash of the latest journal entry of every file.
+
+    Read from JOURNAL_INDEX_FILE; only the journal lines appended after the
+    offset it covers are parsed, so recording a change does not read the
+    whole journal. The index is updated for the next call.
+    """
+    index_path = os.path.join(store_dir, JOURNAL_INDEX_FILE)
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        offset, hashes = int(index['offset']), dict(index['files'])
+    except (OSError, ValueError, KeyError, TypeError):
+        offset, hashes = 0, {}
+    start = offset
+    try:
+        with open(os.path.join(store_dir, JOURNAL_FILE), 'rb') as f:
+            if f.seek(0, os.SEEK_END) < offset:
+                # The journal was replaced; index it from the start
+                start = offset = 0
+                hashes = {}
+            f.seek(offset)
+            for line in f:
+                # A line still being appended by another process is read next time
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    hashes[entry['file']] = entry['post_hash']
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except OSError:
+        return {}
+    if offset != start:
+        temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'offset': offset, 'files': hashes}, f)
+        os.replace(temp_path, index_path)
+    return hashes
+
+
+def record_change(file_path, old_data, new_data, run_id, mode="", store_dir=None, reverse_patch=None):
+    """
+    Journal one file change so it can be undone.
+
+    The first time a file is seen (or when it was edited outside the tool
+    since the last run) its pre-change content is put into the shared object
+    store. Every change stores a compressed reverse patch (new -> old).
+
+    Args:
+        file_path (str): File that was changed.
+        old_data (bytes or str): Content before the change.
+        new_data (bytes or str): Content after the change.
+        run_id (str): Id of the current tool run.
+        mode (str): Which replacement mode made the change.
+        store_dir (str, optional): Store location (default: get_store_dir()).
+        reverse_patch (list, optional): Precomputed new -> old patch.
+
+    Returns:
+        dict: The journal entry.
+    """
+    store_dir = store_dir or get_store_dir()
+    file_path = os.path.abspath(file_path)
+    old_data = _to_bytes(old_data)
+    new_data = _to_bytes(new_data)
+    pre_hash = content_hash(old_data)
+
+    if _latest_hashes(store_dir).get(file_path) != pre_hash:
+        put_object(old_data, store_dir)
+
+    if reverse_patch is None:
+        reverse_patch = compute_patch(new_data, old_data)
+    entry = {
+        'run_id': run_id,
+        'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'file': file_path,
+        'mode': mode,
+        'pre_hash': pre_hash,
+        'post_hash': content_hash(new_data),
+        'patch': put_object(encode_patch(reverse_patch), store_dir),
+        'old_size': len(old_data),
+        'new_size': len(new_data),
+    }
+    _append_entry(entry, store_dir)
+    return entry
+
+
+def list_runs(store_dir=None):
+    """Runs in order: [{'run_id', 'time', 'files': [...]}]"""
+    runs = {}
+    for entry in read_journal(store_dir):
+        run = runs.setdefault(entry['run_id'], {'run_id': entry['run_id'], 'time': entry['time'], 'files': []})
+        if entry['file'] not in run['files']:
+            run['files'].append(entry['file'])
+    return list(runs.values())
+
+
+def rebuild_state(file_path, target_hash, store_dir=None):
+    """
+    Rebuild the content a file had when its hash was `target_hash`.
+
+    Uses the object store directly when the state is stored there; otherwise
+    walks the journal backwards from the current file content, applying
+    reverse patches and checking every hash on the way.
+
+    Returns:
+        bytes: The rebuilt content, or None if the chain is broken.
+    """
+    store_dir = store_dir or get_store_dir()
+    stored = get_object(target_hash, store_dir)
+    if stored is not None:
+        return stored
+
+    entries = [entry for entry in read_journal(store_dir) if entry['file'] == file_path]
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    current_hash = content_hash(content)
+    for entry in reversed(entries):
+        if entry['post_hash'] != current_hash:
+            continue
+        patch_data = get_object(entry['patch'], store_dir)
+        if patch_data is None:
+            return None
+        content = apply_patch(content, decode_patch(patch_data))
+        current_hash = content_hash(content)
+        if current_hash != entry['pre_hash']:
+            return None
+        if current_hash == target_hash:
+            return content
+    return None
+
+
+def restore_run(run_id=None, store_dir=None, new_run=None):
+    """
+    Restore every file changed by a run to its state before that run.
+
+    Args:
+        run_id (str, optional): Run to undo (default: the latest run).
+        store_dir (str, optional): Store location.
+        new_run (str, optional): Run id under which the restore itself is journaled.
+
+    Returns:
+        bool: True if all files were restored.
+    """
+    store_dir = store_dir or get_store_dir()
+    runs = list_runs(store_dir)
+    if not runs:
+        print("ℹ️  The undo journal is empty")
+        return False
+    if run_id is None:
+        run_id = runs[-1]['run_id']
+    entries = [entry for entry in read_journal(store_dir) if entry['run_id'] == run_id]
+    if not entries:
+        print(f"❌ Error: Unknown run id: {run_id}")
+        return False
+
+    new_run = new_run or new_run_id()
+    print(f"⏪ Restoring state before run {run_id}")
+    ok = True
+    restored = set()
+    for entry in entries:
+        file_path = entry['file']
+        if file_path in restored:
+            continue
+        # The first entry of a file in this run holds its state before the run
+        restored.add(file_path)
+        content = rebuild_state(file_path, entry['pre_hash'], store_dir)
+        if content is None:
+            print(f"❌ Cannot rebuild {file_path}: it was modified outside the tool after run {run_id}")
+            ok = False
+            continue
+        try:
+            with open(file_path, 'rb') as f:
+                current = f.read()
+        except OSError:
+            current = b''
+        if current == content:
+            print(f"ℹ️  Already at that state: {file_path}")
+            continue
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, file_path)
+        record_change(file_path, current, content, new_run, mode=f"restore {run_id}", store_dir=store_dir)
+        print(f"✅ Restored: {file_path}")
+    return ok
+
+
+def print_runs(store_dir=None):
+    runs = list_runs(store_dir)
+    if not runs:
+        print("ℹ️  The undo journal is empty")
+        return
+    print("🧾 Recorded runs (oldest first):")
+    for run in runs:
+        print(f"   {run['run_id']}  {run['time']}  {len(run['files'])} file(s)")
+        for file_path in run['files']:
+            print(f"      {file_path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("--restore", "--list-runs"):
+        print("Usage: python undo_journal.py --list-runs")
+        print("       python undo_journal.py --restore [run-id]")
+        sys.exit(1)
+    if sys.argv[1] == "--list-runs":
+        print_runs()
+    else:
+        sys.exit(0 if restore_run(sys.argv[2] if len(sys.argv) > 2 else None) else 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+ISSP JSON Tools - Watch Mode
+Backs set_settings.py --watch: keeps the compiled rules and the pristine
+content of the target manifests in memory and polls the config folder, its
+base layers and the manifests. A changed rule file is recompiled on its own,
+and only the modes that depend on it are re-applied, always from the pristine
+base, so every save gives the result of a clean run within a fraction of a
+second.
+"""
+
+import os
+import time
+
+from config_layers import LAYERS_FILE, layer_chain
+from rule_analyzer import RULE_FILES
+from set_settings import decode_text, encode_text
+from settings_session import MODES, new_session, reload_session_file, transform_content
+from undo_journal import record_change
+
+# Seconds between polls of the watched files
+WATCH_INTERVAL = 0.3
+
+
+def _signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def _config_files(config_path):
+    """{path: file name} of the rule files and layer declarations of every layer, present or not"""
+    try:
+        layers = layer_chain(config_path)
+    except (OSError, ValueError):
+        layers = [os.path.abspath(config_path)]
+    return {os.path.join(layer, file_name): file_name for layer in layers for file_name in [LAYERS_FILE] + RULE_FILES}
+
+
+def _target_groups(project_files, modes):
+    """{file: [modes]} for the selected modes; dataset and steering are chained in that order"""
+    groups = {}
+    for mode in MODES:
+        file_path = project_files['esme'] if mode == 'esme' else project_files['dataset']
+        if mode in modes and file_path:
+            groups.setdefault(file_path, []).append(mode)
+    return groups
+
+
+def _apply_group(session, file_path, file_modes, base, state, options):
+    """Re-apply a file's modes from its pristine base and write the result if it differs from the file"""
+    start_time = time.perf_counter()
+    content = decode_text(base)
+    lines = []
+    for mode in file_modes:
+        try:
+            content, rules, errors = transform_content(session, mode, content, options.get('rule_budget'))
+        except Exception as e:
+            rules, errors = [], [f"{mode} failed: {e}"]
+        hit = [rule for rule in rules if rule['hits']]
+        missed = [rule['description'] for rule in rules if not rule['hits']]
+        if session[mode] is None:
+            lines.append(f"   ℹ️  {mode}: no rules")
+        else:
+            lines.append(f"   {'✅' if not errors else '⚠️ '} {mode}: {len(hit)}/{len(rules)} rule(s) hit")
+        lines.extend(f"      ℹ️  Not found: {description}" for description in missed)
+        lines.extend(f"      ❌ {error}" for error in errors)
+
+    current = state['written'][file_path]
+    # Compared as text like set_settings.py does, so line endings alone don't count as a change
+    if content != decode_text(current):
+        new_data = encode_text(content)
+        with open(file_path, 'wb') as f:
+            f.write(new_data)
+        if options.get('journal', True):
+            try:
+                record_change(file_path, current, new_data, options['run_id'], "+".join(file_modes))
+            except OSError as e:
+                lines.append(f"   ⚠️  Could not record undo information: {e}")
+        state['written'][file_path] = new_data
+        state['signatures'][file_path] = _signature(file_path)
+        state['writes'] += 1
+        outcome = f"written ({len(base)} -> {len(new_data)} bytes)"
+    else:
+        outcome = "unchanged"
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"🔁 {os.path.basename(file_path)}: {outcome} in {elapsed_ms:.0f} ms")
+    for line in lines:
+        print(line)
+
+
+def watch_project(project_files, config_path, modes, options, interval=WATCH_INTERVAL, max_polls=None):
+    """
+    Apply `modes` to a project and re-apply on every change until Ctrl+C.
+
+    The manifests' content at start is the pristine base. When a manifest is
+    changed by something else (an editor, a checkout), its new content
+    becomes the base. Writes are journaled under options['run_id'], so
+    --restore undoes the whole watch session.
+
+    Args:
+        project_files (dict): From find_project_files().
+        config_path (str): Configuration folder.
+        modes (tuple): Modes to apply ('esme', 'dataset', 'steering').
+        options (dict): Run options ('journal', 'run_id').
+        interval (float): Seconds between polls.
+        max_polls (int, optional): Stop after this many polls (tests).
+
+    Returns:
+        bool: False if the configuration could not be loaded at start.
+    """
+    try:
+        session = new_session(config_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading configuration from {config_path}: {e}")
+        return False
+    groups = _target_groups(project_files, modes)
+    if not groups:
+        print("❌ Error: none of the target manifests was found")
+        return False
+
+    base = {file_path: _read(file_path) for file_path in groups}
+    state = {'written': dict(base), 'signatures': {file_path: _signature(file_path) for file_path in groups},
+             'writes': 0}
+    config_files = _config_files(config_path)
+    config_signatures = {path: _signature(path) for path in config_files}
+
+    print(f"👀 Watching {config_path} and {len(groups)} manifest(s); press Ctrl+C to stop")
+    for file_path, file_modes in groups.items():
+        _apply_group(session, file_path, file_modes, base[file_path], state, options)
+
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            time.sleep(interval)
+            polls += 1
+            stale_modes = set()
+            for path, file_name in list(config_files.items()):
+                signature = _signature(path)
+                if signature == config_signatures[path]:
+                    continue
+                config_signatures[path] = signature
+                try:
+                    session, recompiled = reload_session_file(session, file_name)
+                except (OSError, ValueError) as e:
+                    # Usually a save in progress; the next save is picked up
+                    print(f"⚠️  {file_name}: {e} (keeping the previous rules)")
+                    continue
+                label = os.path.relpath(path, config_path)
+                print(f"\n📝 {label} changed: recompiled {', '.join(recompiled) or 'nothing'}")
+                stale_modes.update(recompiled)
+                if file_name == LAYERS_FILE:
+                    # Watch the rule files of the new base layers too
+                    config_files = _config_files(config_path)
+                    for new_path in config_files:
+                        config_signatures.setdefault(new_path, _signature(new_path))
+
+            stale_files = set()
+            for file_path in groups:
+                signature = _signature(file_path)
+                if signature == state['signatures'][file_path]:
+                    continue
+                state['signatures'][file_path] = signature
+                try:
+                    data = _read(file_path)
+                except OSError:
+                    continue
+                if data != state['written'][file_path]:
+                    print(f"\n📄 {os.path.basename(file_path)} changed outside the watch: using it as the new base")
+                    base[file_path] = data
+                    state['written'][file_path] = data
+                    stale_files.add(file_path)
+
+            for file_path, file_modes in groups.items():
+                if file_path in stale_files or stale_modes.intersection(file_modes):
+                    _apply_group(session, file_path, file_modes, base[file_path], state, options)
+    except KeyboardInterrupt:
+        print()
+    if options.get('journal', True) and state['writes']:
+        print(f"🧾 Undo the watch session with: python set_settings.py --restore {options['run_id']}")
+    return True